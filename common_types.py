@@ -1,6 +1,27 @@
+# The tokens of a TokenizedText are found with the very patterns the Markov parser and the sentiment analyzer use
+from markov_text.parse import WORD_REGEX
+from vaderSentiment.vaderSentiment import regex_remove_punctuation as PUNCTUATION_REGEX
+
 class Location:
 	def __init__(self, latitude=None,longitude=None, radius=10, imperial_units=True):
 		self.latitude = latitude
 		self.longitude = longitude
 		self.radius = radius
-		self.imperial_units = imperial_units
\ No newline at end of file
+		self.imperial_units = imperial_units
+
+class TokenizedText(unicode):
+	"""
+	A string of text that carries the tokens it splits into, worked out once when it is created,
+	so that the Markov parser and the sentiment analyzer can share them instead of each tokenizing the text again.
+	It is a unicode string in every other respect, and anything that takes a plain string still takes it.
+
+	@ivar tokens: The whitespace-separated tokens of the text, punctuation and all (as used by the sentiment analyzer).
+	@ivar bare_tokens: The whitespace-separated tokens of the text after all punctuation is removed (as used by the sentiment analyzer).
+	@ivar words: The words of the text, as found by the Markov parser.
+	"""
+	def __new__(cls, text):
+		self = unicode.__new__(cls, text)
+		self.tokens = self.split()
+		self.bare_tokens = PUNCTUATION_REGEX.sub('', self).split()
+		self.words = WORD_REGEX.findall(self)
+		return self
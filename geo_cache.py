@@ -0,0 +1,142 @@
+"""
+The geo_cache module exports L{GeoCache}, a bounded cache of values keyed by geographic cell,
+and helpers for comparing the circular areas searched for L{Location}s.
+
+Requests whose locations quantize to the same cell (see L{cell_key}) share a cache entry,
+so nearby requests can reuse each other's results instead of querying Twitter again.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+CELL_SIZE_DEGREES = 0.01 # Roughly 1.1km of latitude
+EARTH_RADIUS_KM = 6371.0
+KM_PER_MILE = 1.609344
+
+def cell_key(location, cell_size=CELL_SIZE_DEGREES):
+	"""Returns the canonical cell key of a L{Location}.
+
+	The latitude and longitude are quantized to a grid of cell_size degrees,
+	and the radius and units are kept as they are, since they change which tweets are found."""
+	return (int(round(location.latitude / cell_size)),
+		int(round(location.longitude / cell_size)),
+		location.radius,
+		bool(location.imperial_units))
+
+def radius_km(location):
+	"""Returns the radius of a L{Location} in kilometers, whichever units it is given in."""
+	return location.radius * KM_PER_MILE if location.imperial_units else location.radius
+
+def distance_km(a, b):
+	"""Returns the great-circle distance between the centers of two L{Location}s, in kilometers."""
+	lat_a, lat_b = math.radians(a.latitude), math.radians(b.latitude)
+	d_lat = lat_b - lat_a
+	d_lon = math.radians(b.longitude - a.longitude)
+	h = math.sin(d_lat / 2) ** 2 + math.cos(lat_a) * math.cos(lat_b) * math.sin(d_lon / 2) ** 2
+	return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+def contains(outer, inner):
+	"""Returns whether the area searched for the L{Location} inner lies entirely within the one searched for outer."""
+	return distance_km(outer, inner) + radius_km(inner) <= radius_km(outer)
+
+def outermost(located_values):
+	"""Keeps only the (location, value) pairs whose areas aren't inside the area of another pair that is kept,
+	so that no part of the map is covered twice by nested areas. Larger areas come first."""
+	kept = []
+	for location, value in sorted(located_values, key=lambda pair: radius_km(pair[0]), reverse=True):
+		if not any(contains(kept_location, location) for kept_location, _ in kept):
+			kept.append((location, value))
+	return kept
+
+class GeoCache:
+	"""A thread-safe LRU cache keyed by geographic cell, with a time-to-live and a size cap.
+
+	Entries older than ttl seconds are treated as missing. When the cache holds more than
+	max_entries entries, or the sum of sizeof(value) over all entries exceeds max_size,
+	the least recently used entries are evicted."""
+
+	def __init__(self, max_entries, ttl, max_size=None, sizeof=len, clock=time.time):
+		"""
+		@param max_entries: The maximum number of cells to keep.
+		@param ttl: The number of seconds an entry stays fresh.
+		@param max_size: Optional cap on the total size of all values, as measured by sizeof.
+		@param sizeof: Function giving the size of a value. Defaults to len.
+		@param clock: Function giving the current time in seconds (for mocking in unit tests).
+		"""
+		self.max_entries = max_entries
+		self.ttl = ttl
+		self.max_size = max_size
+		self.sizeof = sizeof
+		self.clock = clock
+		self.lock = threading.Lock()
+		self.entries = OrderedDict() # key -> (timestamp, size, value, location), least recently used first
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.expirations = 0
+
+	def get(self, location):
+		"""Returns the cached value for the location's cell, or None if there is no fresh entry."""
+		key = cell_key(location)
+		with self.lock:
+			entry = self.entries.pop(key, None)
+			if entry is None:
+				self.misses += 1
+				return None
+			timestamp, size, value, _ = entry
+			if self.clock() - timestamp > self.ttl:
+				self.size -= size
+				self.expirations += 1
+				self.misses += 1
+				return None
+			self.entries[key] = entry # re-insert as most recently used
+			self.hits += 1
+			return value
+
+	def put(self, location, value):
+		"""Stores a value for the location's cell, evicting older entries as needed.
+		Values larger than max_size on their own are not stored."""
+		key = cell_key(location)
+		size = self.sizeof(value)
+		with self.lock:
+			old = self.entries.pop(key, None)
+			if old is not None:
+				self.size -= old[1]
+			if self.max_size is not None and size > self.max_size:
+				return
+			self.entries[key] = (self.clock(), size, value, location)
+			self.size += size
+			while len(self.entries) > self.max_entries or (self.max_size is not None and self.size > self.max_size):
+				_, (_, evicted_size, _, _) = self.entries.popitem(last=False)
+				self.size -= evicted_size
+				self.evictions += 1
+
+	def within(self, location):
+		"""Returns a list of (location, value) pairs for the fresh entries whose areas lie entirely
+		within the location's area, not counting the location's own cell.
+		This is a scan of all the entries, and it doesn't count as a hit or miss, or make entries more recently used."""
+		key = cell_key(location)
+		with self.lock:
+			now = self.clock()
+			return [(entry_location, value)
+				for entry_key, (timestamp, _, value, entry_location) in self.entries.iteritems()
+				if entry_key != key and now - timestamp <= self.ttl and contains(location, entry_location)]
+
+	def clear(self):
+		"""Removes all entries. The counters are left untouched."""
+		with self.lock:
+			self.entries.clear()
+			self.size = 0
+
+	def stats(self):
+		"""Returns a dictionary of the cache's counters: hits, misses, evictions, expirations, entries and size."""
+		with self.lock:
+			return {
+				'hits': self.hits,
+				'misses': self.misses,
+				'evictions': self.evictions,
+				'expirations': self.expirations,
+				'entries': len(self.entries),
+				'size': self.size}
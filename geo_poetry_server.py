@@ -8,10 +8,12 @@ from flask.ext.cors import CORS
 from ConfigParser import SafeConfigParser
 from common_types import Location
 import geo_twitter
+import geo_cache
 import markov_text
 import vaderSentiment.vaderSentiment
 import spotipy
 import spotipy.oauth2
+import time
 
 VERSION = "0.2"
 
@@ -32,20 +34,102 @@ RESPONSE_KEY_GENRE = 'genre'
 MAX_TWEETS_TO_READ = 500
 MIN_TWEETS_TO_READ = 100
 MARKOV_DEPTH = 2
+MARKOV_BACKEND = markov_text.MEMORY_BACKEND
 POEM_LINES_TO_GENERATE = 3
+MARKOV_MAX_WORDS = 40 # per line of poetry
+MARKOV_MAX_ATTEMPTS = 20 # empty lines in a row before giving up
+MARKOV_TIME_LIMIT = 2.0 # seconds
 
 DEFAULT_RADIUS = 10
 DEFAULT_IMPERIAL_UNITS = False
 SENTIMENT_MIN_MAGNITUDE = 0.2
+SENTIMENT_WORKERS = 1 # processes that score cached tweets; more only pays off for large areas on multi-core hosts
+SENTIMENT_VECTORIZED = False # score cached tweets with NumPy, which must be installed
 SPOTIFY_DEFAULT_GENRE = 'ambient'
 SPOTIFY_DEFAULT_ENERGY = 0.5
 
 LOG_TWEETS = False
 
+TWEET_CACHE_TTL = 300 # seconds
+TWEET_CACHE_MAX_ENTRIES = 256
+TWEET_CACHE_MAX_CHARS = 16 * 1024 * 1024
+MARKOV_CACHE_MAX_MODELS = 64
+MARKOV_CACHE_MAX_CHARS = 4 * 1024 * 1024
+MARKOV_WINDOW_SECONDS = None # e.g. 3600 to build each cell's poetry from all tweets seen in the last hour
+MARKOV_WINDOW_MAX_TWEETS = 5000
+MARKOV_WINDOW_MAX_CELLS = 64
+TWEET_PREFETCH = True # fetch tweets in a background thread while the request thread processes them
+MARKOV_MERGE_MIN_AREAS = 2 # None to always fetch tweets for areas that aren't cached themselves
+SENTIMENT_CACHE_MAX_ENTRIES = 50000
+SENTIMENT_CACHE_MAX_CHARS = 8 * 1024 * 1024
+
 
 app = Flask(__name__)
 CORS(app)
 
+def tweets_size(tweets_list):
+	"""
+	Approximates the memory used by a list of tweets, in characters.
+	A L{common_types.TokenizedText} also holds its tokens, which are counted along with its text.
+	"""
+	size = 0
+	for tweet in tweets_list:
+		size += len(tweet)
+		for tokens in (getattr(tweet, 'tokens', ()), getattr(tweet, 'bare_tokens', ()), getattr(tweet, 'words', ())):
+			size += sum(len(token) for token in tokens)
+	return size
+
+# Tweets fetched for a location are reused by later requests that land in the same geo cell
+TWEET_CACHE = geo_cache.GeoCache(TWEET_CACHE_MAX_ENTRIES, TWEET_CACHE_TTL, TWEET_CACHE_MAX_CHARS, sizeof=tweets_size)
+# Markov chains trained on a set of tweets are reused for as long as the same set of tweets is served
+MARKOV_MODEL_CACHE = markov_text.ModelCache(MARKOV_CACHE_MAX_MODELS, MARKOV_CACHE_MAX_CHARS)
+# Sentiment scores of cleaned tweets, so tweets seen by earlier requests aren't analyzed again
+SENTIMENT_CACHE = vaderSentiment.vaderSentiment.ScoreCache(SENTIMENT_CACHE_MAX_ENTRIES, SENTIMENT_CACHE_MAX_CHARS)
+SENTIMENT_ANALYZER = vaderSentiment.vaderSentiment.SentimentAnalyzer(cache=SENTIMENT_CACHE)
+# When MARKOV_WINDOW_SECONDS is set, each geo cell instead keeps a long-lived Markov chain
+#  that new tweets are added to and old tweets are retired from
+# (a cell that goes unused for a whole window has nothing left in its chain, so it is dropped)
+MARKOV_WINDOWS = geo_cache.GeoCache(MARKOV_WINDOW_MAX_CELLS, MARKOV_WINDOW_SECONDS or 0, sizeof=len)
+
+def merge_cached_areas(location):
+	"""
+	Builds the tweets and Markov chain for a location out of those cached for smaller areas inside it,
+	so that a large radius can be served without fetching and parsing new tweets.
+
+	Areas nested inside other cached areas are skipped, since the larger area already covers them,
+	so cell models merge into regional models, which in turn merge into metropolitan ones.
+	Areas sharing tweets with an area already taken are skipped too, since summing their chains
+	would count the shared tweets twice.
+	@param location: The L{Location} of the request.
+	@return: A tuple of the merged list of tweets and their merged chain, which has also been put in
+		L{MARKOV_MODEL_CACHE} for later requests, or (None, None) if the cached areas don't add up to
+		at least L{MIN_TWEETS_TO_READ} tweets.
+	"""
+	if MARKOV_MERGE_MIN_AREAS is None:
+		return None, None
+	areas = geo_cache.outermost(TWEET_CACHE.within(location))
+	if len(areas) < MARKOV_MERGE_MIN_AREAS:
+		return None, None
+	tweets_list = []
+	seen_tweets = set()
+	models = []
+	for _, area_tweets in areas:
+		if not seen_tweets.isdisjoint(area_tweets):
+			continue # the area overlaps one already taken
+		model = MARKOV_MODEL_CACHE.get(MARKOV_MODEL_CACHE.fingerprint(area_tweets, MARKOV_DEPTH))
+		if model is None:
+			continue # the area's chain has been evicted, and training it again costs as much as fetching
+		models.append(model)
+		seen_tweets.update(area_tweets)
+		tweets_list.extend(area_tweets)
+	if len(models) < MARKOV_MERGE_MIN_AREAS or len(tweets_list) < MIN_TWEETS_TO_READ:
+		return None, None
+	start = time.time()
+	model = markov_text.merge_models(models)
+	MARKOV_MODEL_CACHE.put(MARKOV_MODEL_CACHE.fingerprint(tweets_list, MARKOV_DEPTH), model,
+		MARKOV_MODEL_CACHE.sizeof(tweets_list), time.time() - start)
+	return tweets_list, model
+
 @app.route("/ping")
 def ping():
 	"""
@@ -72,6 +156,21 @@ def get_genres():
 	spotify_response = spotify.recommendation_genre_seeds()
 	return jsonify(spotify_response)
 
+@app.route("/cache-stats")
+def get_cache_stats():
+	"""
+	Server method that reports the hit, miss and eviction counters of the server's caches.
+
+	Route: /cache-stats
+	HTTP Methods supported: GET
+	@return: A JSON object with four attributes: 'tweets' (the counters of the geo-cell tweet cache),
+		'markov' (the counters and build times of the Markov model cache),
+		'windows' (the counters of the per-cell sliding-window Markov chains; size is the number of tweets in them),
+		'sentiment' (the counters of the sentiment score cache).
+	"""
+	return jsonify({'tweets': TWEET_CACHE.stats(), 'markov': MARKOV_MODEL_CACHE.stats(), 'windows': MARKOV_WINDOWS.stats(),
+		'sentiment': SENTIMENT_CACHE.stats()})
+
 class NoSSLException(Exception):
 	"""
 	Indicates that the client did not use SSL, but should have.
@@ -109,7 +208,7 @@ def get_geo_poetry():
 	if request.url.startswith('http://') and not app.debug:
 		raise(NoSSLException)
 
-	getSentiment = vaderSentiment.vaderSentiment.sentiment
+	getSentiment = SENTIMENT_ANALYZER.sentiment
 	SpotifyClientCredentials = spotipy.oauth2.SpotifyClientCredentials
 	
 	try:
@@ -150,34 +249,74 @@ def get_geo_poetry():
 		abort(400)
 
 	# ===== Fetch Tweets =====
-	tweets = geo_twitter.GeoTweets(TWITTER_CONSUMER_KEY, TWITTER_CONSUMER_SECRET)
-	# because both the Markov generator and sentiment analyzer need the tweets,
-	#  we have to store them instead of using an iterator
-	def tweet_limitor(generator):
-		for i in range(MAX_TWEETS_TO_READ):
-			yield generator.next()
-	tweets_list = [tweet for tweet in tweet_limitor(tweets.Tweets(location, LOG_TWEETS))]
-	if len(tweets_list) < MIN_TWEETS_TO_READ:
-		# If we hit Twitter's rate limit, tweets.Tweets(location) will raise StopIteration early
-		abort(429)
+	model = None # the Markov chain, if it was merged from smaller areas or trained as the tweets arrived
+	tweets_list = TWEET_CACHE.get(location)
+	if tweets_list is None and not MARKOV_WINDOW_SECONDS:
+		tweets_list, model = merge_cached_areas(location)
+		if tweets_list is not None:
+			TWEET_CACHE.put(location, tweets_list) # so it can be merged into even larger areas in turn
+	sentiment = None
+	if tweets_list is None:
+		tweets = geo_twitter.GeoTweets(TWITTER_CONSUMER_KEY, TWITTER_CONSUMER_SECRET)
+		def tweet_limitor(generator):
+			for i in range(MAX_TWEETS_TO_READ):
+				yield generator.next()
+		tweet_stream = tweet_limitor(tweets.Tweets(location, LOG_TWEETS))
+		if TWEET_PREFETCH:
+			tweet_stream = geo_twitter.prefetch(tweet_stream)
+		# Each tweet is analyzed, and added to a new Markov chain, as soon as it arrives.
+		# The tweets are still kept for the caches, and for the window model, which adds them itself.
+		# In order to give more variability to the results, we ignore relatively neutral tweets
+		sentiment = vaderSentiment.vaderSentiment.CompoundMean(SENTIMENT_MIN_MAGNITUDE)
+		trainer = None
+		if not MARKOV_WINDOW_SECONDS and MARKOV_BACKEND == markov_text.MEMORY_BACKEND:
+			trainer = markov_text.ModelTrainer(MARKOV_DEPTH)
+		tweets_list = []
+		for tweet in tweet_stream:
+			tweets_list.append(tweet)
+			sentiment.add(getSentiment(tweet))
+			if trainer:
+				trainer.add(tweet)
+		if len(tweets_list) < MIN_TWEETS_TO_READ:
+			# If we hit Twitter's rate limit, tweets.Tweets(location) will raise StopIteration early
+			abort(429)
+		TWEET_CACHE.put(location, tweets_list)
+		if trainer:
+			# The Markov generator below is given the chain directly; it's cached for later requests
+			model = trainer.model()
+			MARKOV_MODEL_CACHE.put(MARKOV_MODEL_CACHE.fingerprint(tweets_list, MARKOV_DEPTH), model,
+				MARKOV_MODEL_CACHE.sizeof(tweets_list), trainer.build_time)
 
 	# ===== Generate Poetry =====
-	poems = markov_text.MarkovGenerator(tweets_list, MARKOV_DEPTH, ":memory:")
-	poetry = "\n".join([poems.next() for _ in range(POEM_LINES_TO_GENERATE)])
+	if MARKOV_WINDOW_SECONDS:
+		window = MARKOV_WINDOWS.get(location)
+		if window is None:
+			window = markov_text.WindowModel(MARKOV_DEPTH, MARKOV_WINDOW_SECONDS, MARKOV_WINDOW_MAX_TWEETS)
+		window.update(tweets_list) # only tweets not already in the window are parsed
+		MARKOV_WINDOWS.put(location, window) # keeps the window alive while its cell is in use
+		# A snapshot, since other requests for the cell may update the window while this one generates
+		poems = markov_text.MarkovGenerator(None, MARKOV_DEPTH, None, db=window.snapshot())
+	elif model is not None:
+		poems = markov_text.MarkovGenerator(None, MARKOV_DEPTH, None, db=model)
+	else:
+		poems = markov_text.MarkovGenerator(tweets_list, MARKOV_DEPTH, ":memory:", cache=MARKOV_MODEL_CACHE, backend=MARKOV_BACKEND)
+	try:
+		poem_lines = poems.generate_many(POEM_LINES_TO_GENERATE,
+			max_words=MARKOV_MAX_WORDS, max_attempts=MARKOV_MAX_ATTEMPTS, time_limit=MARKOV_TIME_LIMIT)
+	except markov_text.GenerationBudgetExceeded as err:
+		# Rather than keep the request waiting, answer with the lines generated so far.
+		# The tweets themselves are never sent back in their place, since they are other people's words.
+		app.logger.warning('Markov generation stopped early: %s', err)
+		poem_lines = err.sentences
+	poetry = "\n".join(poem_lines)
 
 	# ===== Sentiment Analysis =====
-	total_sentiment = 0
-	sentiment_included_count = 0
-	for tweet in tweets_list:
-		vs = getSentiment(tweet)
-		# In order to give more variability to the results, we ignore relatively neutral tweets
-		if (vs['compound'] > SENTIMENT_MIN_MAGNITUDE) or (vs['compound'] < -SENTIMENT_MIN_MAGNITUDE):
-			total_sentiment += vs['compound']
-			sentiment_included_count += 1
-	try:
-		avg_sentiment = total_sentiment / float(sentiment_included_count)
-	except ZeroDivisionError:
-		avg_sentiment = 0.0
+	if sentiment is None: # the tweets came from the cache, so they haven't been analyzed yet
+		_, avg_sentiment = vaderSentiment.vaderSentiment.sentiment_batch(tweets_list,
+			workers=SENTIMENT_WORKERS, min_magnitude=SENTIMENT_MIN_MAGNITUDE, vectorized=SENTIMENT_VECTORIZED,
+			analyzer=SENTIMENT_ANALYZER)
+	else:
+		avg_sentiment = sentiment.mean()
 
 	# ===== Music Recommendations =====
 	client_credentials_manager = SpotifyClientCredentials(client_id=SPOTIFY_CLIENT_ID, client_secret=SPOTIFY_CLIENT_SECRET)
@@ -1,13 +1,19 @@
 """
-The geo_twitter module exports a single class, L{GeoTweets}, that handles fetching tweets near a location.
+The geo_twitter module exports a class, L{GeoTweets}, that handles fetching tweets near a location,
+and L{prefetch}, to fetch them in the background.
 """
 import twython
 import re
+import sys
+import threading
+import Queue
 from common_types import *
+from common_types import TokenizedText
 
 URL_REGEX = r'(https?://\S*)' # Eh, good enough for my purposes
 MIN_NUM_FOLLOWERS = 0
 MAX_NUM_FOLLOWERS = 10000
+PREFETCH_MAX_ITEMS = 500 # tweets fetched ahead of the caller before the background thread waits for it
 
 import os.path
 import codecs
@@ -26,6 +32,46 @@ def asciify(string):
 		else:
 			continue
 
+def prefetch(generator, max_items=PREFETCH_MAX_ITEMS):
+	"""Generator that runs another generator in a background thread and yields its items as they arrive,
+	so that waiting on Twitter for the next page of tweets overlaps with processing the ones already fetched.
+	Exceptions raised by the generator are re-raised here. At most max_items items are held at a time;
+	once the queue is full, the background thread waits for the caller to catch up, and it stops if
+	the caller stops early."""
+	items = Queue.Queue(max_items)
+	stopped = threading.Event()
+	def produce():
+		end = (False, None)
+		try:
+			for item in generator:
+				if stopped.is_set():
+					return
+				items.put((True, item))
+		except BaseException:
+			end = (False, sys.exc_info())
+		finally:
+			if not stopped.is_set():
+				items.put(end)
+	thread = threading.Thread(target=produce)
+	thread.daemon = True
+	thread.start()
+	try:
+		while True:
+			more, item = items.get()
+			if not more:
+				if item is not None:
+					raise item[0], item[1], item[2]
+				return
+			yield item
+	finally:
+		stopped.set()
+		# frees a background thread waiting on a full queue, so it can see it has been stopped
+		try:
+			while True:
+				items.get_nowait()
+		except Queue.Empty:
+			pass
+
 class GeoTweets:
 	"""Fetches recent tweets from the area surrounding a particular GPS location.
 	Methods may throw TwythonAuthError."""
@@ -57,7 +103,8 @@ class GeoTweets:
 			yield tweet['text']
 
 	def CleanTweets(self, list):
-		"""Generator that removes unwanted text (URLs, #tags, @mentions) from a list of strings."""
+		"""Generator that removes unwanted text (URLs, #tags, @mentions) from a list of strings.
+		The cleaned strings are L{TokenizedText}s, so they are only tokenized once for all the later stages."""
 		for tweet in list:
 			tweet_clean = re.sub(URL_REGEX, '', tweet) # Remove URLs
 			tweet_clean = re.sub(r'@\w+', '', tweet_clean) # Remove mentions
@@ -66,7 +113,7 @@ class GeoTweets:
 			if len(tweet_clean) > 0:
 				if self.tweet_log_cleaned:
 					self.tweet_log_cleaned.write(u"{}\n".format(tweet_clean))
-				yield tweet_clean
+				yield TokenizedText(tweet_clean)
 			else: # Skip tweets that are now empty
 				continue
 
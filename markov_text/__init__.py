@@ -1,33 +1,150 @@
-from db import Db
+from db import Db, InternedDb, open_db
 from gen import Generator
 from parse import Parser
-from sql import Sql
+from sql import Sql, InternedSql
 from rnd import Rnd
+from cache import ModelCache
+from memdb import MemDb, copy_words
+from compiled import CompiledDb, compile_model
+from window import WindowModel
+from frozen import FrozenDb, freeze, merge_models
 import sqlite3
+import time
 
 SENTENCE_SEPARATOR = '.'
 WORD_SEPARATOR = ' '
 DB_NAME = 'name'  #value here doesn't matter, only used in command line (markov.py script)
+SQLITE_BACKEND = 'sqlite'
+MEMORY_BACKEND = 'memory'
+COMPILED_BACKEND = 'compiled'
 
-def MarkovGenerator(sentence_list, depth, db_filepath, db = None, rnd = None):
-	"""Generator that generates new sentences from a list of sentences.
+class GenerationBudgetExceeded(Exception):
+	"""Raised when MarkovGenerator runs out of attempts or time before generating all the sentences asked for.
+	The sentences that were generated in time are in its sentences attribute."""
+
+	def __init__(self, message, sentences):
+		Exception.__init__(self, message)
+		self.sentences = sentences
+
+class MarkovGenerator:
+	"""Iterator that generates new sentences from a list of sentences.
 	Arguments:
 		sentence_list		List of strings, each being a single sentence to learn from
+							(must be empty or None for the compiled backend)
 		depth				Depth of analysis at which to build the Markov chain
-		db_filepath			Path to file where sqlite database will be stored
+		db_filepath			Path to file where sqlite database will be stored (ignored by the memory backend),
+							or path to the model file written by compile_model for the compiled backend
 		db (optional)		Db object (for mocking in unit tests)
-		rnd (optional)		Rnd object (for mocking in unit tests)"""
-	if not db:
-		db = Db(sqlite3.connect(db_filepath), Sql())
-		db.setup(depth)
-	if not rnd:
-		rnd = Rnd()
-
-	parser = Parser(DB_NAME, db, SENTENCE_SEPARATOR).parse_list(sentence_list)
-	generator = Generator(DB_NAME, db, rnd)
-	while True:
-		sentence = generator.generate(WORD_SEPARATOR).strip()
-		if len(sentence) == 0:
-			continue # avoid generating the empty string
+		rnd (optional)		Rnd object (for mocking in unit tests)
+		cache (optional)	ModelCache object; if given, a model trained on the same sentences
+							is reused instead of training a new one. Cached models are frozen
+							(see FrozenDb), so threads can share them
+		backend (optional)	SQLITE_BACKEND (the default) to store the chain in sqlite,
+							MEMORY_BACKEND to keep it in Python dicts, which is faster,
+							or COMPILED_BACKEND to mmap a pre-trained, read-only model
+		seed (optional)		Seed for the random choices, so the same model generates the same sentences
+							(ignored if rnd is given)
+		max_words (optional)	Longest sentence to generate; longer sentences are cut off
+		max_attempts (optional)	Number of empty sentences in a row after which to give up
+		time_limit (optional)	Number of seconds each call to next or generate_many may take
+		clock (optional)	Function giving the current time in seconds (for mocking in unit tests)
+	The last three budgets make next and generate_many raise GenerationBudgetExceeded when they run out,
+	and can be overridden per call of generate_many."""
+
+	def __init__(self, sentence_list, depth, db_filepath, db = None, rnd = None, cache = None, backend = SQLITE_BACKEND, seed = None,
+			max_words = None, max_attempts = None, time_limit = None, clock = time.time):
+		if backend == COMPILED_BACKEND and not db:
+			if sentence_list:
+				raise ValueError('Compiled models are read-only, sentence_list must be empty')
+			db = CompiledDb(db_filepath)
+		if db:
+			if sentence_list:
+				Parser(DB_NAME, db, SENTENCE_SEPARATOR).parse_list(sentence_list)
+		elif cache is not None:
+			key = cache.fingerprint(sentence_list, depth)
+			db = cache.get(key)
+			if not db:
+				start = time.time()
+				db = freeze(_train_db(sentence_list, depth, db_filepath, backend))
+				cache.put(key, db, cache.sizeof(sentence_list), time.time() - start)
 		else:
-			yield sentence
+			db = _train_db(sentence_list, depth, db_filepath, backend)
+		if not rnd:
+			rnd = Rnd(seed)
+
+		self.generator    = Generator(DB_NAME, db, rnd)
+		self.max_words    = max_words
+		self.max_attempts = max_attempts
+		self.time_limit   = time_limit
+		self.clock        = clock
+
+	def __iter__(self):
+		return self
+
+	def next(self):
+		return self.generate_many(1)[0]
+
+	def generate_many(self, count, max_words = None, max_attempts = None, time_limit = None):
+		"""Returns a list of count sentences, sharing the looked up word counts between all of them.
+		Budgets not given here default to the ones given to the constructor."""
+		if max_words is None:
+			max_words = self.max_words
+		if max_attempts is None:
+			max_attempts = self.max_attempts
+		if time_limit is None:
+			time_limit = self.time_limit
+		deadline = None if time_limit is None else self.clock() + time_limit
+
+		sentences = []
+		attempts = 0
+		while len(sentences) < count:
+			if max_attempts is not None and attempts >= max_attempts:
+				raise GenerationBudgetExceeded('Only empty sentences after %d attempts' % (attempts, ), sentences)
+			if deadline is not None and self.clock() > deadline:
+				raise GenerationBudgetExceeded('Ran out of time after %d sentences' % (len(sentences), ), sentences)
+			sentence = self.generator.generate(WORD_SEPARATOR, max_words).strip()
+			if len(sentence) == 0:
+				attempts += 1 # avoid generating the empty string
+			else:
+				sentences.append(sentence)
+				attempts = 0
+		return sentences
+
+class ModelTrainer:
+	"""Trains an in-memory model one sentence at a time, for sentences that arrive as a stream,
+	and freezes it once they are all in.
+	Arguments:
+		depth				Depth of analysis at which to build the Markov chain"""
+
+	def __init__(self, depth):
+		self.db = MemDb()
+		self.db.setup(depth)
+		self.parser = Parser(DB_NAME, self.db, SENTENCE_SEPARATOR)
+		self.build_time = 0.0 # seconds spent training so far
+
+	def add(self, sentence):
+		start = time.time()
+		self.parser.add_sentence(sentence)
+		self.build_time += time.time() - start
+
+	def model(self):
+		"""Returns the trained model as a FrozenDb, the same as MarkovGenerator would cache."""
+		start = time.time()
+		model = freeze(self.db)
+		self.build_time += time.time() - start
+		return model
+
+def _train_db(sentence_list, depth, db_filepath, backend):
+	if backend == MEMORY_BACKEND:
+		db = MemDb()
+	elif backend == SQLITE_BACKEND:
+		db = Db(sqlite3.connect(db_filepath), Sql())
+	else:
+		raise ValueError('Unknown backend %s' % (backend, ))
+	db.setup(depth)
+	parser = Parser(DB_NAME, db, SENTENCE_SEPARATOR)
+	if backend == SQLITE_BACKEND:
+		parser.parse_list_bulk(sentence_list)
+	else:
+		parser.parse_list(sentence_list)
+	return db
@@ -0,0 +1,168 @@
+"""Throughput benchmark for the markov_text backends.
+
+Usage: python benchmark.py [<path to txt file>]
+
+Without a text file, a synthetic corpus of tweet-sized sentences is generated."""
+from db import Db, InternedDb
+from gen import Generator
+from parse import Parser
+from sql import Sql
+from rnd import Rnd
+from memdb import MemDb
+from compiled import CompiledDb, compile_model
+from parallel import parallel_parse
+import sys
+import time
+import random
+import sqlite3
+import codecs
+import os
+import tempfile
+import multiprocessing
+
+SENTENCE_SEPARATOR = '.'
+WORD_SEPARATOR = ' '
+DEPTH = 2
+SYNTHETIC_SENTENCES = 5000
+SYNTHETIC_VOCABULARY = 2000
+SENTENCES_TO_GENERATE = 500
+PARALLEL_SENTENCES = 100000
+PARALLEL_CHUNK_SIZE = 5000
+UPSERT_SENTENCES = 50000
+
+def synthetic_corpus(sentence_count = SYNTHETIC_SENTENCES, vocabulary_size = SYNTHETIC_VOCABULARY, seed = 0):
+	"""Returns a list of sentences whose word frequencies roughly follow Zipf's law, like natural text."""
+	rnd = random.Random(seed)
+	vocabulary = ['w%d' % (n, ) for n in range(vocabulary_size)]
+	weights = [1.0 / (n + 1) for n in range(vocabulary_size)]
+	cumulative = []
+	total = 0.0
+	for weight in weights:
+		total += weight
+		cumulative.append(total)
+
+	def pick():
+		x = rnd.random() * total
+		lo, hi = 0, len(cumulative) - 1
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if cumulative[mid] < x:
+				lo = mid + 1
+			else:
+				hi = mid
+		return vocabulary[lo]
+
+	return [' '.join(pick() for _ in range(rnd.randint(4, 20))) for _ in range(sentence_count)]
+
+def new_sqlite_db(depth):
+	db = Db(sqlite3.connect(':memory:'), Sql())
+	db.setup(depth)
+	return db
+
+def new_interned_db(depth):
+	db = InternedDb(sqlite3.connect(':memory:'))
+	db.setup(depth)
+	return db
+
+def sqlite_size(db):
+	"""Returns the number of bytes the database would take up on disk."""
+	page_count = db.conn.execute('PRAGMA page_count').fetchone()[0]
+	page_size  = db.conn.execute('PRAGMA page_size').fetchone()[0]
+	return page_count * page_size
+
+def new_memory_db(depth):
+	db = MemDb()
+	db.setup(depth)
+	return db
+
+def time_parse(new_db, sentences, depth = DEPTH, bulk = False):
+	db = new_db(depth)
+	parser = Parser('benchmark', db, SENTENCE_SEPARATOR)
+	start = time.time()
+	if bulk:
+		parser.parse_list_bulk(sentences)
+	else:
+		parser.parse_list(sentences)
+	return db, time.time() - start
+
+def time_generate(db, count = SENTENCES_TO_GENERATE):
+	generator = Generator('benchmark', db, Rnd())
+	start = time.time()
+	generator.generate_many(count, WORD_SEPARATOR)
+	return time.time() - start
+
+def report(label, count, unit, seconds):
+	print '%-28s %10.0f %s/sec  (%.3fs)' % (label, count / seconds if seconds else float('inf'), unit, seconds)
+
+def benchmark_backends(sentences):
+	print 'Parsing %d sentences at depth %d, generating %d sentences' % (len(sentences), DEPTH, SENTENCES_TO_GENERATE)
+	for label, new_db in (('sqlite', new_sqlite_db), ('interned', new_interned_db), ('memory', new_memory_db)):
+		db, parse_time = time_parse(new_db, sentences)
+		generate_time = time_generate(db)
+		report(label + ' parse', len(sentences), 'sentences', parse_time)
+		report(label + ' generate', SENTENCES_TO_GENERATE, 'sentences', generate_time)
+		if new_db is not new_memory_db:
+			db.conn.commit()
+			print '%s database: %d bytes' % (label, sqlite_size(db))
+	_, bulk_parse_time = time_parse(new_sqlite_db, sentences, bulk = True)
+	report('sqlite bulk parse', len(sentences), 'sentences', bulk_parse_time)
+
+	compiled_path = os.path.join(tempfile.mkdtemp(), 'benchmark.mkc')
+	start = time.time()
+	compile_model(db, compiled_path)
+	compile_time = time.time() - start
+	start = time.time()
+	compiled_db = CompiledDb(compiled_path)
+	open_time = time.time() - start
+	report('compiled generate', SENTENCES_TO_GENERATE, 'sentences', time_generate(compiled_db))
+	print 'compiled model: %d bytes, compiled in %.3fs, opened in %.6fs' % (os.path.getsize(compiled_path), compile_time, open_time)
+	compiled_db.close()
+	os.remove(compiled_path)
+	os.rmdir(os.path.dirname(compiled_path))
+
+def benchmark_upsert(sentences):
+	"""Compares adding counts with a single UPSERT against the two statements used for .db files without a unique key."""
+	print 'Parsing %d sentences at depth %d into sqlite' % (len(sentences), DEPTH)
+	for bulk in (False, True):
+		timings = []
+		for upsert in (False, True):
+			db = new_sqlite_db(DEPTH)
+			db.upsert = upsert
+			parser = Parser('benchmark', db, SENTENCE_SEPARATOR)
+			start = time.time()
+			if bulk:
+				parser.parse_list_bulk(sentences)
+			else:
+				parser.parse_list(sentences)
+			timings.append(time.time() - start)
+			report('%s%s' % ('bulk ' if bulk else '', 'upsert' if upsert else 'two statements'), len(sentences), 'sentences', timings[-1])
+		print '%-28s %10.2fx' % ('  speedup', timings[0] / timings[1])
+
+def benchmark_parallel(sentences):
+	print 'Parallel parsing of %d sentences at depth %d, in chunks of %d' % (len(sentences), DEPTH, PARALLEL_CHUNK_SIZE)
+	worker_counts = [1]
+	while worker_counts[-1] * 2 <= multiprocessing.cpu_count():
+		worker_counts.append(worker_counts[-1] * 2)
+	baseline = None
+	for workers in worker_counts:
+		db = new_sqlite_db(DEPTH)
+		start = time.time()
+		parallel_parse(sentences, db, workers, PARALLEL_CHUNK_SIZE)
+		seconds = time.time() - start
+		if baseline is None:
+			baseline = seconds
+		report('%d worker(s)' % (workers, ), len(sentences), 'sentences', seconds)
+		print '%-28s %10.2fx' % ('  speedup', baseline / seconds)
+
+if __name__ == '__main__':
+	if len(sys.argv) > 1:
+		corpus = codecs.open(sys.argv[1], 'r', 'utf-8').read().split(SENTENCE_SEPARATOR)
+	else:
+		corpus = synthetic_corpus()
+	benchmark_backends(corpus)
+	print
+	benchmark_upsert(corpus if len(sys.argv) > 1 else synthetic_corpus(UPSERT_SENTENCES))
+	print
+	if len(sys.argv) <= 1:
+		corpus = synthetic_corpus(PARALLEL_SENTENCES)
+	benchmark_parallel(corpus)
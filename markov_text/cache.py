@@ -0,0 +1,84 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+class ModelCache:
+	"""LRU cache of trained Markov models, keyed by a fingerprint of the sentences they were trained on.
+	Arguments:
+		max_models			Maximum number of models to keep
+		max_chars (optional)	Maximum total length of the sentences behind the cached models,
+							used as an estimate of the memory they take up"""
+
+	def __init__(self, max_models, max_chars = None):
+		self.max_models = max_models
+		self.max_chars  = max_chars
+		self.lock       = threading.Lock()
+		self.models     = OrderedDict() # key -> (size, db), least recently used first
+		self.size       = 0
+		self.hits       = 0
+		self.misses     = 0
+		self.evictions  = 0
+		self.builds     = 0
+		self.total_build_time = 0.0
+		self.last_build_time  = 0.0
+
+	@staticmethod
+	def fingerprint(sentence_list, depth):
+		digest = hashlib.sha1(str(depth))
+		for sentence in sentence_list:
+			if isinstance(sentence, unicode):
+				sentence = sentence.encode('utf-8')
+			digest.update('\0')
+			digest.update(sentence)
+		return digest.hexdigest()
+
+	@staticmethod
+	def sizeof(sentence_list):
+		return sum(len(sentence) for sentence in sentence_list)
+
+	def get(self, key):
+		with self.lock:
+			entry = self.models.pop(key, None)
+			if entry is None:
+				self.misses += 1
+				return None
+			self.models[key] = entry
+			self.hits += 1
+			return entry[1]
+
+	def put(self, key, db, size, build_time):
+		with self.lock:
+			self.builds += 1
+			self.total_build_time += build_time
+			self.last_build_time = build_time
+
+			old = self.models.pop(key, None)
+			if old is not None:
+				self.size -= old[0]
+			if self.max_chars is not None and size > self.max_chars:
+				return
+			self.models[key] = (size, db)
+			self.size += size
+			while len(self.models) > self.max_models or (self.max_chars is not None and self.size > self.max_chars):
+				_, (evicted_size, _) = self.models.popitem(last = False)
+				self.size -= evicted_size
+				self.evictions += 1
+
+	def clear(self):
+		with self.lock:
+			self.models.clear()
+			self.size = 0
+
+	def stats(self):
+		with self.lock:
+			lookups = self.hits + self.misses
+			return {
+				'hits'             : self.hits,
+				'misses'           : self.misses,
+				'hit_rate'         : float(self.hits) / lookups if lookups else 0.0,
+				'evictions'        : self.evictions,
+				'models'           : len(self.models),
+				'size'             : self.size,
+				'builds'           : self.builds,
+				'total_build_time' : self.total_build_time,
+				'last_build_time'  : self.last_build_time}
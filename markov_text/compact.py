@@ -0,0 +1,21 @@
+"""Pruning of rarely used transitions, to keep long-lived Markov chains from growing without bound."""
+
+def keep_transition(rank, count, min_count = None, top_k = None):
+	"""Returns whether to keep a state's transition, given its rank among the state's transitions
+	by descending count (starting at 0). The most common transition of every state is always kept,
+	so that no state that can be reached is left without a way to continue the sentence."""
+	if rank == 0:
+		return True
+	if top_k is not None and rank >= top_k:
+		return False
+	return min_count is None or count >= min_count
+
+def compact(db, min_count = None, top_k = None):
+	"""Prunes db (a Db, InternedDb or MemDb) with its prune() method, then compacts its storage.
+	Returns a dict with the number of transitions removed, and the size_stats() of db before and after."""
+	before  = db.size_stats()
+	removed = db.prune(min_count, top_k)
+	db.commit()
+	if hasattr(db, 'vacuum'):
+		db.vacuum()
+	return {'removed' : removed, 'before' : before, 'after' : db.size_stats()}
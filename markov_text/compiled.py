@@ -0,0 +1,182 @@
+"""Compact, read-only file format for trained Markov chains.
+
+A compiled model is a single file that can be mmap'ed and sampled from directly,
+so any number of processes can share one copy of a large model through the OS page cache,
+and opening it costs next to nothing. All integers are little-endian unsigned 32-bit values.
+
+	header			MAGIC, VERSION, depth, vocabulary size, state count, transition count
+	vocabulary		(vocabulary size + 1) byte offsets into the word blob, then the blob itself:
+					every word encoded as UTF-8, sorted bytewise, so a word's id is its rank.
+					The blob is padded to a multiple of 4 bytes.
+	states			state count rows of (depth - 1) word ids, sorted, one row per distinct
+					sequence of preceding words
+	offsets			(state count + 1) indexes into the transition arrays; the transitions of
+					state i run from offsets[i] to offsets[i + 1]
+	next words		transition count word ids
+	cumulative		transition count running totals of the transition counts within each state"""
+from array import array
+import mmap
+import struct
+import sys
+
+MAGIC   = 0x434b564d # 'MVKC'
+VERSION = 1
+HEADER  = struct.Struct('<6I')
+UINT    = struct.Struct('<I')
+
+def _uint_array(values):
+	a = array('I', values)
+	if a.itemsize != 4:
+		a = array('L', values)
+	if sys.byteorder == 'big':
+		a.byteswap()
+	return a
+
+def compile_model(db, file_path):
+	"""Writes the chain stored in db (any object with get_depth() and items()) to file_path."""
+	depth = db.get_depth()
+	states = {}
+	vocabulary = set()
+	for word_list, count in db.items():
+		words = [w.encode('utf-8') if isinstance(w, unicode) else w for w in word_list]
+		vocabulary.update(words)
+		next_words = states.setdefault(tuple(words[:-1]), {})
+		next_words[words[-1]] = next_words.get(words[-1], 0) + count
+
+	vocabulary = sorted(vocabulary)
+	word_ids = dict((word, n) for n, word in enumerate(vocabulary))
+	word_offsets = [0]
+	for word in vocabulary:
+		word_offsets.append(word_offsets[-1] + len(word))
+	blob = ''.join(vocabulary)
+	blob += '\0' * (-len(blob) % 4)
+
+	state_keys = sorted((tuple(word_ids[w] for w in prefix), prefix) for prefix in states)
+	state_ids = []
+	offsets = [0]
+	next_word_ids = []
+	cumulative = []
+	for ids, prefix in state_keys:
+		state_ids.extend(ids)
+		t = 0
+		for word_id, count in sorted((word_ids[w], c) for w, c in states[prefix].iteritems()):
+			t += count
+			next_word_ids.append(word_id)
+			cumulative.append(t)
+		offsets.append(len(next_word_ids))
+
+	with open(file_path, 'wb') as f:
+		f.write(HEADER.pack(MAGIC, VERSION, depth, len(vocabulary), len(state_keys), len(next_word_ids)))
+		_uint_array(word_offsets).tofile(f)
+		f.write(blob)
+		for values in (state_ids, offsets, next_word_ids, cumulative):
+			_uint_array(values).tofile(f)
+
+class CompiledDb:
+	"""Read-only Db over a file written by compile_model. Lookups are binary searches in the
+	mmap'ed file, nothing is loaded up front."""
+
+	def __init__(self, file_path):
+		with open(file_path, 'rb') as f:
+			self.data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+		magic, version, self.depth, self.vocabulary_size, self.state_count, self.transition_count = HEADER.unpack_from(self.data, 0)
+		if magic != MAGIC or version != VERSION:
+			raise ValueError('%s is not a compiled Markov model' % (file_path, ))
+
+		self.word_offsets_start = HEADER.size
+		self.blob_start = self.word_offsets_start + 4 * (self.vocabulary_size + 1)
+		blob_size = self._uint(self.word_offsets_start, self.vocabulary_size)
+		self.states_start = self.blob_start + blob_size + (-blob_size % 4)
+		self.state_size = 4 * (self.depth - 1)
+		self.state_struct = struct.Struct('<%dI' % (self.depth - 1, ))
+		self.offsets_start = self.states_start + self.state_size * self.state_count
+		self.next_words_start = self.offsets_start + 4 * (self.state_count + 1)
+		self.cumulative_start = self.next_words_start + 4 * self.transition_count
+
+	def close(self):
+		self.data.close()
+
+	def _uint(self, start, index):
+		return UINT.unpack_from(self.data, start + 4 * index)[0]
+
+	def _word_bytes(self, word_id):
+		start = self.blob_start + self._uint(self.word_offsets_start, word_id)
+		end = self.blob_start + self._uint(self.word_offsets_start, word_id + 1)
+		return self.data[start:end]
+
+	def _word(self, word_id):
+		return self._word_bytes(word_id).decode('utf-8')
+
+	def _word_id(self, word):
+		if isinstance(word, unicode):
+			word = word.encode('utf-8')
+		lo, hi = 0, self.vocabulary_size
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if self._word_bytes(mid) < word:
+				lo = mid + 1
+			else:
+				hi = mid
+		if lo < self.vocabulary_size and self._word_bytes(lo) == word:
+			return lo
+		return None
+
+	def _state_index(self, ids):
+		lo, hi = 0, self.state_count
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if self.state_struct.unpack_from(self.data, self.states_start + self.state_size * mid) < ids:
+				lo = mid + 1
+			else:
+				hi = mid
+		if lo < self.state_count and self.state_struct.unpack_from(self.data, self.states_start + self.state_size * lo) == ids:
+			return lo
+		return None
+
+	def setup(self, depth):
+		raise ValueError('Compiled models are read-only')
+
+	def get_depth(self):
+		return self.depth
+
+	def add_word(self, word_list, count = 1):
+		raise ValueError('Compiled models are read-only')
+
+	def add_words(self, word_counts):
+		raise ValueError('Compiled models are read-only')
+
+	def commit(self):
+		pass
+
+	def get_word_table(self, word_list):
+		"""Returns the candidate next words and their cumulative counts, as stored in the file."""
+		ids = tuple(self._word_id(w) for w in word_list)
+		if None in ids:
+			return [], []
+		state = self._state_index(ids)
+		if state is None:
+			return [], []
+		first = self._uint(self.offsets_start, state)
+		last = self._uint(self.offsets_start, state + 1)
+		count = last - first
+		word_ids = struct.unpack_from('<%dI' % (count, ), self.data, self.next_words_start + 4 * first)
+		cumulative = struct.unpack_from('<%dI' % (count, ), self.data, self.cumulative_start + 4 * first)
+		return [self._word(word_id) for word_id in word_ids], list(cumulative)
+
+	def get_word_count(self, word_list):
+		words, cumulative = self.get_word_table(word_list)
+		counts = {}
+		previous = 0
+		for word, t in zip(words, cumulative):
+			counts[word] = t - previous
+			previous = t
+		return counts
+
+	def items(self):
+		for state in range(self.state_count):
+			prefix = [self._word(word_id) for word_id in self.state_struct.unpack_from(self.data, self.states_start + self.state_size * state)]
+			previous = 0
+			for n in range(self._uint(self.offsets_start, state), self._uint(self.offsets_start, state + 1)):
+				t = self._uint(self.cumulative_start, n)
+				yield prefix + [self._word(self._uint(self.next_words_start, n))], t - previous
+				previous = t
@@ -1,3 +1,8 @@
+from sql import Sql, InternedSql
+from compact import keep_transition
+import sqlite3
+
+UPSERT_SQLITE_VERSION = (3, 24, 0)
 
 class Db:
 	DEPTH_PARAM_NAME = 'depth'
@@ -7,19 +12,42 @@ class Db:
 		self.cursor = conn.cursor()
 		self.sql    = sql
 		self.depth  = None
+		# SQL text built for this db's depth, by Sql method name. Reusing the same text also lets
+		# sqlite3 reuse its prepared statement instead of compiling the SQL again.
+		self.statements = {}
+		# Whether counts can be added with a single UPSERT, checked on first use: it needs
+		# sqlite 3.24 and a unique key on the words, which .db files created before it lack
+		self.upsert = None
+
+	def _statement(self, name):
+		sql = self.statements.get(name)
+		if sql is None:
+			sql = getattr(self.sql, name)(self.get_depth())
+			self.statements[name] = sql
+		return sql
+
+	def _can_upsert(self):
+		if self.upsert is None:
+			self.upsert = sqlite3.sqlite_version_info >= UPSERT_SQLITE_VERSION and any(
+				row[2] for row in self.conn.cursor().execute(self.sql.list_word_indexes_sql()))
+		return self.upsert
+
+	def _check_word_list(self, word_list):
+		if len(word_list) != self.get_depth():
+			raise ValueError('Expected %s words in list but found %s' % (self.get_depth(), len(word_list)))
 
 	def setup(self, depth):
 		self.depth = depth
+		self.statements = {}
 		self.cursor.execute(self.sql.create_word_table_sql(depth))
 		self.cursor.execute(self.sql.create_index_sql(depth))
 		self.cursor.execute(self.sql.create_param_table_sql())
 		self.cursor.execute(self.sql.set_param_sql(), (self.DEPTH_PARAM_NAME, depth))
 
 	def _get_word_list_count(self, word_list):
-		if len(word_list) != self.get_depth():
-			raise ValueError('Expected %s words in list but found %s' % (self.get_depth(), len(word_list)))
+		self._check_word_list(word_list)
 
-		self.cursor.execute(self.sql.select_count_for_words_sql(self.get_depth()), word_list)
+		self.cursor.execute(self._statement('select_count_for_words_sql'), word_list)
 		r = self.cursor.fetchone()
 		if r:
 			return r[0]
@@ -37,20 +65,169 @@ class Db:
 			
 		return self.depth
 		
-	def add_word(self, word_list):
-		count = self._get_word_list_count(word_list)
-		if count:
-			self.cursor.execute(self.sql.update_count_for_words_sql(self.get_depth()), [count + 1] + word_list)
+	def add_word(self, word_list, count = 1):
+		self._check_word_list(word_list)
+		if self._can_upsert():
+			self.cursor.execute(self._statement('upsert_word_sql'), word_list + [count])
+			return
+
+		old_count = self._get_word_list_count(word_list)
+		if old_count:
+			self.cursor.execute(self._statement('update_count_for_words_sql'), [old_count + count] + word_list)
 		else:
-			self.cursor.execute(self.sql.insert_row_for_words_sql(self.get_depth()), word_list + [1])
+			self.cursor.execute(self._statement('insert_row_for_words_sql'), word_list + [count])
+
+	def add_words(self, word_counts):
+		"""Adds many word lists at once, from an iterable of (word list, count) pairs.
+		All the counts are written with a single executemany UPSERT, or, for .db files without
+		a unique key, with two: one adds to the rows that already exist, the other inserts the rows that don't."""
+		rows = [(list(word_list), count) for word_list, count in word_counts]
+		for word_list, _ in rows:
+			self._check_word_list(word_list)
+		if self._can_upsert():
+			self.cursor.executemany(self._statement('upsert_word_sql'),
+				[word_list + [count] for word_list, count in rows])
+			return
+
+		self.cursor.executemany(self._statement('increment_count_for_words_sql'),
+			[[count] + word_list for word_list, count in rows])
+		self.cursor.executemany(self._statement('insert_row_if_missing_for_words_sql'),
+			[word_list + [count] + word_list for word_list, count in rows])
+
+	def remove_word(self, word_list, count = 1):
+		"""Subtracts count from the word list's count, deleting its row once the count reaches zero."""
+		self._check_word_list(word_list)
+
+		self.cursor.execute(self._statement('increment_count_for_words_sql'), [-count] + word_list)
+		self.cursor.execute(self._statement('delete_used_up_words_sql'), word_list)
 
 	def commit(self):
 		self.conn.commit()
 
 	def get_word_count(self, word_list):
 		counts = {}
-		sql = self.sql.select_words_and_counts_sql(self.get_depth())
-		for row in self.cursor.execute(sql, word_list):
+		for row in self.cursor.execute(self._statement('select_words_and_counts_sql'), word_list):
 			counts[row[0]] = row[1]
 
 		return counts
+
+	def items(self):
+		depth = self.get_depth()
+		for row in self.conn.cursor().execute(self._statement('select_all_words_sql')):
+			yield list(row[:depth]), row[depth]
+
+	def prune(self, min_count = None, top_k = None):
+		"""Deletes the transitions of each state with a count below min_count, or ranked below
+		the top_k most common, except for each state's most common one (see keep_transition).
+		Returns the number of transitions deleted."""
+		depth = self.get_depth()
+		doomed = []
+		state = None
+		for row in self.conn.cursor().execute(self._statement('select_all_words_by_state_sql')):
+			if row[:depth - 1] != state:
+				state = row[:depth - 1]
+				rank = 0
+			if not keep_transition(rank, row[depth], min_count, top_k):
+				doomed.append(list(row[:depth]))
+			rank += 1
+		self.cursor.executemany(self._statement('delete_word_list_sql'), doomed)
+		return len(doomed)
+
+	def vacuum(self):
+		"""Rebuilds the indexes and the file itself, giving the space freed by deleted rows back to the OS."""
+		self.conn.commit()
+		self.cursor.execute(self.sql.reindex_sql())
+		self.cursor.execute(self.sql.vacuum_sql())
+
+	def size_stats(self):
+		self.cursor.execute(self.sql.count_words_sql())
+		transitions = self.cursor.fetchone()[0]
+		self.cursor.execute(self.sql.page_count_sql())
+		page_count = self.cursor.fetchone()[0]
+		self.cursor.execute(self.sql.page_size_sql())
+		page_size = self.cursor.fetchone()[0]
+		return {'transitions' : transitions, 'bytes' : page_count * page_size}
+
+class InternedDb(Db):
+	"""Db over the InternedSql schema. Words are translated to and from their integer ids
+	here, at the edges, so the queries themselves only ever compare integers."""
+
+	def __init__(self, conn, sql = None):
+		Db.__init__(self, conn, sql or InternedSql())
+		self.word_ids = {}
+		self.words    = {}
+
+	def setup(self, depth):
+		self.depth = depth
+		self.statements = {}
+		self.cursor.execute(self.sql.create_vocab_table_sql())
+		self.cursor.execute(self.sql.create_word_table_sql(depth))
+		self.cursor.execute(self.sql.create_param_table_sql())
+		self.cursor.execute(self.sql.set_param_sql(), (self.DEPTH_PARAM_NAME, depth))
+
+	def _remember(self, word_id, word):
+		self.word_ids[word] = word_id
+		self.words[word_id] = word
+
+	def _word_id(self, word, create = False):
+		word_id = self.word_ids.get(word)
+		if word_id is None:
+			if create:
+				self.cursor.execute(self.sql.insert_vocab_sql(), (word, ))
+			self.cursor.execute(self.sql.select_vocab_id_sql(), (word, ))
+			r = self.cursor.fetchone()
+			if not r:
+				return None
+			word_id = r[0]
+			self._remember(word_id, word)
+		return word_id
+
+	def _word_ids(self, word_list, create = False):
+		return [self._word_id(word, create) for word in word_list]
+
+	def _word(self, word_id):
+		word = self.words.get(word_id)
+		if word is None:
+			self.cursor.execute(self.sql.select_vocab_text_sql(), (word_id, ))
+			word = self.cursor.fetchone()[0]
+			self._remember(word_id, word)
+		return word
+
+	def add_word(self, word_list, count = 1):
+		Db.add_word(self, self._word_ids(word_list, True), count)
+
+	def add_words(self, word_counts):
+		Db.add_words(self, [(self._word_ids(word_list, True), count) for word_list, count in word_counts])
+
+	def remove_word(self, word_list, count = 1):
+		self._check_word_list(word_list)
+
+		ids = self._word_ids(word_list)
+		if None not in ids:
+			Db.remove_word(self, ids, count)
+
+	def get_word_count(self, word_list):
+		ids = self._word_ids(word_list)
+		if None in ids:
+			return {} # a word that was never seen can't be followed by anything
+		return dict((self._word(word_id), count) for word_id, count in Db.get_word_count(self, ids).iteritems())
+
+	def items(self):
+		for word_id, word in self.conn.cursor().execute(self.sql.select_all_vocab_sql()):
+			self._remember(word_id, word)
+		for ids, count in Db.items(self):
+			yield [self.words[word_id] for word_id in ids], count
+
+	def prune(self, min_count = None, top_k = None):
+		removed = Db.prune(self, min_count, top_k)
+		# Drop the words nothing refers to any more, and forget the ids of everything, in case they get reused
+		self.cursor.execute(self.sql.delete_unused_vocab_sql(self.get_depth()))
+		self.word_ids = {}
+		self.words    = {}
+		return removed
+
+def open_db(conn):
+	"""Returns a Db or InternedDb for an existing database, depending on the schema it was created with."""
+	if conn.cursor().execute(InternedSql().vocab_table_exists_sql()).fetchone():
+		return InternedDb(conn)
+	return Db(conn, Sql())
@@ -0,0 +1,92 @@
+EMPTY_TABLE = ((), ())
+
+class FrozenDb:
+	"""Read-only Db holding a finished Markov chain in immutable tuples, built with freeze().
+	Nothing about it changes after it is built, and it keeps no cursor or connection,
+	so any number of threads can generate from it at the same time without locking."""
+
+	def __init__(self, depth, tables):
+		self.depth  = depth
+		self.tables = tables # tuple of (depth - 1) words -> (tuple of next words, tuple of their cumulative counts)
+
+	def setup(self, depth):
+		raise ValueError('Frozen models are read-only')
+
+	def get_depth(self):
+		return self.depth
+
+	def add_word(self, word_list, count = 1):
+		raise ValueError('Frozen models are read-only')
+
+	def add_words(self, word_counts):
+		raise ValueError('Frozen models are read-only')
+
+	def remove_word(self, word_list, count = 1):
+		raise ValueError('Frozen models are read-only')
+
+	def commit(self):
+		pass
+
+	def get_word_table(self, word_list):
+		return self.tables.get(tuple(word_list), EMPTY_TABLE)
+
+	def get_word_count(self, word_list):
+		words, cumulative = self.get_word_table(word_list)
+		counts = {}
+		previous = 0
+		for word, t in zip(words, cumulative):
+			counts[word] = t - previous
+			previous = t
+		return counts
+
+	def items(self):
+		for prefix, (words, cumulative) in self.tables.iteritems():
+			previous = 0
+			for word, t in zip(words, cumulative):
+				yield list(prefix) + [word], t - previous
+				previous = t
+
+def freeze(db):
+	"""Returns a FrozenDb with the same chain as db (any object with get_depth() and items())."""
+	return merge_models([db])
+
+def merge_models(dbs):
+	"""Returns a FrozenDb whose counts are the sums of the counts in all of dbs, as if it had been
+	trained on all of their sentences. The dbs must all have the same depth."""
+	depth = dbs[0].get_depth()
+	counts = {}
+	for db in dbs:
+		if db.get_depth() != depth:
+			raise ValueError('Cannot merge a chain of depth %s with one of depth %s' % (db.get_depth(), depth))
+		for word_list, count in db.items():
+			next_words = counts.setdefault(tuple(word_list[:-1]), {})
+			next_words[word_list[-1]] = next_words.get(word_list[-1], 0) + count
+
+	tables = {}
+	for prefix, next_words in counts.iteritems():
+		tables[prefix] = frozen_table(next_words)
+	return FrozenDb(depth, tables)
+
+def frozen_table(next_words):
+	"""Returns the (tuple of next words, tuple of their cumulative counts) table of a FrozenDb
+	for a dict of next words to their counts."""
+	words = tuple(sorted(next_words))
+	cumulative = []
+	t = 0
+	for word in words:
+		t += next_words[word]
+		cumulative.append(t)
+	return (words, tuple(cumulative))
+
+def refreeze(frozen, db, prefixes):
+	"""Returns a FrozenDb with the chain of db, which is the same as the chain of the FrozenDb frozen
+	except in the states listed in prefixes (tuples of (depth - 1) words). Only those states are
+	frozen again; the tables of all the others are shared with frozen, which is left as it was."""
+	tables = dict(frozen.tables)
+	for prefix in prefixes:
+		next_words = db.get_word_count(list(prefix))
+		if next_words:
+			tables[prefix] = frozen_table(next_words)
+		else:
+			tables.pop(prefix, None)
+	return FrozenDb(frozen.depth, tables)
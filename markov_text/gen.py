@@ -1,24 +1,46 @@
 from parse import Parser
+import bisect
 
 class Generator:
 	def __init__(self, name, db, rnd):
 		self.name = name
 		self.db   = db
 		self.rnd  = rnd
+		self.depth = None
+		# Maps each tuple of preceding words to the candidate next words and their cumulative counts.
+		# Tables are built on first use; call clear_cache() if the db changes afterwards.
+		self.tables = {}
+
+	def clear_cache(self):
+		self.tables = {}
+
+	def _get_depth(self):
+		if self.depth is None:
+			self.depth = self.db.get_depth()
+		return self.depth
+
+	def _get_table(self, word_list):
+		key = tuple(word_list)
+		table = self.tables.get(key)
+		if table is None:
+			if hasattr(self.db, 'get_word_table'):
+				# Compiled models store the table as it is
+				table = self.db.get_word_table(word_list)
+			else:
+				table = _make_table(self.db.get_word_count(word_list))
+			self.tables[key] = table
+		return table
 
 	def _get_next_word(self, word_list):
-		candidate_words = self.db.get_word_count(word_list)
-		total_next_words = sum(candidate_words.values())
+		words, cumulative = self._get_table(word_list)
+		total_next_words = cumulative[-1] if cumulative else 0
 		i = self.rnd.randint(total_next_words)
-		t=0
-		for w in candidate_words.keys():
-			t += candidate_words[w]
-			if (i <= t):
-				return w
-		assert False
-
-	def generate(self, word_separator):
-		depth = self.db.get_depth()
+		# The first word whose cumulative count reaches i, as if walking the candidates in order
+		return words[bisect.bisect_left(cumulative, i)]
+
+	def generate(self, word_separator, max_words = None):
+		"""Returns a new sentence. If max_words is given, the sentence is cut off after that many words."""
+		depth = self._get_depth()
 		sentence = [Parser.SENTENCE_START_SYMBOL] * (depth - 1)
 		end_symbol = [Parser.SENTENCE_END_SYMBOL] * (depth - 1)
 
@@ -26,7 +48,27 @@ class Generator:
 			tail = sentence[(-depth+1):]
 			if tail == end_symbol:
 				break
+			if max_words is not None and len(sentence) - (depth - 1) >= max_words:
+				break
 			word = self._get_next_word(tail)
 			sentence.append(word)
-		
-		return word_separator.join(sentence[depth-1:][:1-depth])
+
+		words = sentence[depth-1:]
+		while words and words[-1] == Parser.SENTENCE_END_SYMBOL:
+			words.pop()
+		return word_separator.join(words)
+
+	def generate_many(self, count, word_separator, max_words = None):
+		"""Returns a list of count sentences. The tables looked up for one sentence are
+		reused by all the others, so each state is only fetched from the db once."""
+		return [self.generate(word_separator, max_words) for _ in range(count)]
+
+def _make_table(candidate_words):
+	words = []
+	cumulative = []
+	t = 0
+	for w in candidate_words.keys():
+		t += candidate_words[w]
+		words.append(w)
+		cumulative.append(t)
+	return words, cumulative
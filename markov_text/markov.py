@@ -1,44 +1,114 @@
-from db import Db
+from db import Db, InternedDb, open_db
 from gen import Generator
 from parse import Parser
 from sql import Sql
 from rnd import Rnd
+from memdb import MemDb, copy_words
+from compiled import CompiledDb, compile_model
+from parallel import parallel_parse
+from compact import compact
+from stream import read_sentences
 import sys
 import sqlite3
-import codecs
+import argparse
+import time
 
 SENTENCE_SEPARATOR = '.'
 WORD_SEPARATOR = ' '
 
-if __name__ == '__main__':
-	args = sys.argv
-	usage = 'Usage: %s (parse <name> <depth> <path to txt file>|gen <name> <count>)' % (args[0], )
+BACKENDS = ('sqlite', 'memory', 'parallel')
+GEN_BACKENDS = ('sqlite', 'memory', 'compiled')
+COMPILED_EXTENSION = '.mkc'
+MAX_WORDS = 200
+
+def print_progress(sentence_count, sentences_per_sec):
+	print '%d sentences (%.0f sentences/sec)' % (sentence_count, sentences_per_sec)
+	sys.stdout.flush()
+
+def make_arg_parser():
+	arg_parser = argparse.ArgumentParser(description = 'Markov chain text generator')
+	modes = arg_parser.add_subparsers(dest = 'mode')
+
+	parse_args = modes.add_parser('parse', help = 'count how often words follow each other in text files, into <name>.db')
+	parse_args.add_argument('name')
+	parse_args.add_argument('depth', type = int)
+	parse_args.add_argument('file_names', metavar = 'file', nargs = '+',
+		help = 'text files or glob patterns to read, in order; - reads stdin, and .gz and .bz2 files are decompressed')
+	parse_args.add_argument('-b', '--backend', choices = BACKENDS, default = 'sqlite',
+		help = 'sqlite counts directly in the .db file, memory counts in memory first, '
+			'parallel counts chunks of the text in several processes (default: sqlite)')
+	parse_args.add_argument('-i', '--interned', action = 'store_true',
+		help = 'store each word once and the counts as integer word ids, for a smaller and faster .db file')
+	parse_args.add_argument('-j', '--workers', type = int, default = None,
+		help = 'number of worker processes for the parallel backend (default: number of CPUs)')
+
+	compile_args = modes.add_parser('compile', help = 'compile <name>.db into the read-only <name>' + COMPILED_EXTENSION)
+	compile_args.add_argument('name')
+
+	compact_args = modes.add_parser('compact', help = 'drop rare transitions from <name>.db and shrink the file')
+	compact_args.add_argument('name')
+	compact_args.add_argument('-m', '--min-count', type = int, default = None,
+		help = 'drop the transitions seen fewer than this many times')
+	compact_args.add_argument('-k', '--top-k', type = int, default = None,
+		help = 'keep only the this many most common transitions of each state')
 
-	if (len(args) < 3):
-		raise ValueError(usage)
+	gen_args = modes.add_parser('gen', help = 'generate sentences from a parsed or compiled model')
+	gen_args.add_argument('name')
+	gen_args.add_argument('count', type = int)
+	gen_args.add_argument('backend', nargs = '?', choices = GEN_BACKENDS, default = 'sqlite')
+	gen_args.add_argument('-w', '--max-words', type = int, default = MAX_WORDS,
+		help = 'cut sentences off after this many words, since compacted chains can loop (default: %d)' % (MAX_WORDS, ))
+	gen_args.add_argument('-s', '--seed', type = int, default = None,
+		help = 'seed for the random choices, to generate the same sentences every time')
+	return arg_parser
 
-	mode  = args[1]
-	name  = args[2]
+if __name__ == '__main__':
+	args = make_arg_parser().parse_args()
+	name = args.name
 	
-	if mode == 'parse':
-		if (len(args) != 5):
-			raise ValueError(usage)
-		
-		depth = int(args[3])
-		file_name = args[4]
-		
-		db = Db(sqlite3.connect(name + '.db'), Sql())
+	if args.mode == 'parse':
+		depth = args.depth
+		if args.interned:
+			db = InternedDb(sqlite3.connect(name + '.db'))
+		else:
+			db = Db(sqlite3.connect(name + '.db'), Sql())
 		db.setup(depth)
 		
-		txt = codecs.open(file_name, 'r', 'utf-8').read()
-		Parser(name, db, SENTENCE_SEPARATOR).parse(txt)
+		# The input is streamed, so only one chunk of text is in memory at a time
+		sentences = read_sentences(args.file_names, SENTENCE_SEPARATOR)
+		start = time.time()
+		if args.backend == 'parallel':
+			parallel_parse(sentences, db, args.workers, progress = print_progress)
+		elif args.backend == 'memory':
+			# Count everything in memory, then write each distinct word list to the file once
+			mem_db = MemDb()
+			mem_db.setup(depth)
+			Parser(name, mem_db, SENTENCE_SEPARATOR).parse_list(sentences, print_progress)
+			copy_words(mem_db, db)
+		else:
+			Parser(name, db, SENTENCE_SEPARATOR).parse_list_bulk(sentences, progress = print_progress)
+		print 'Parsed in %.2fs' % (time.time() - start, )
 	
-	elif mode == 'gen':
-		count = int(args[3])
-		db = Db(sqlite3.connect(name + '.db'), Sql())
-		generator = Generator(name, db, Rnd())
-		for i in range(0, count):
-			print generator.generate(WORD_SEPARATOR)
-	
-	else:
-		raise ValueError(usage)
\ No newline at end of file
+	elif args.mode == 'compile':
+		compile_model(open_db(sqlite3.connect(name + '.db')), name + COMPILED_EXTENSION)
+
+	elif args.mode == 'compact':
+		result = compact(open_db(sqlite3.connect(name + '.db')), args.min_count, args.top_k)
+		print 'Removed %d transitions' % (result['removed'], )
+		for label in ('before', 'after'):
+			print '%-6s %10d transitions %12d bytes' % (label, result[label]['transitions'], result[label]['bytes'])
+
+	elif args.mode == 'gen':
+		if args.backend == 'compiled':
+			db = CompiledDb(name + COMPILED_EXTENSION)
+		else:
+			db = open_db(sqlite3.connect(name + '.db'))
+		if args.backend == 'memory':
+			# Load the whole chain into memory once, rather than querying sqlite for every word
+			mem_db = MemDb()
+			mem_db.setup(db.get_depth())
+			copy_words(db, mem_db)
+			db = mem_db
+		generator = Generator(name, db, Rnd(args.seed))
+		for sentence in generator.generate_many(args.count, WORD_SEPARATOR, args.max_words):
+			print sentence
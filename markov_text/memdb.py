@@ -0,0 +1,91 @@
+from compact import keep_transition
+
+class MemDb:
+	"""In-memory alternative to Db, for chains that don't need to be persisted.
+	Counts are kept in a dict that maps each tuple of (depth - 1) words to a dict of
+	the words that follow them and how often they do, so no SQL is run at all."""
+
+	def __init__(self):
+		self.depth  = None
+		self.counts = {}
+
+	def setup(self, depth):
+		self.depth = depth
+
+	def get_depth(self):
+		if self.depth == None:
+			raise ValueError('No depth value set, setup() has not been called')
+		return self.depth
+
+	def add_word(self, word_list, count = 1):
+		if len(word_list) != self.get_depth():
+			raise ValueError('Expected %s words in list but found %s' % (self.get_depth(), len(word_list)))
+
+		next_words = self.counts.setdefault(tuple(word_list[:-1]), {})
+		next_words[word_list[-1]] = next_words.get(word_list[-1], 0) + count
+
+	def add_words(self, word_counts):
+		for word_list, count in word_counts:
+			self.add_word(word_list, count)
+
+	def merge(self, other):
+		"""Adds all the counts of another MemDb of the same depth to this one."""
+		if other.get_depth() != self.get_depth():
+			raise ValueError('Cannot merge a chain of depth %s into one of depth %s' % (other.get_depth(), self.get_depth()))
+		for prefix, other_next_words in other.counts.iteritems():
+			next_words = self.counts.get(prefix)
+			if next_words is None:
+				self.counts[prefix] = dict(other_next_words)
+			else:
+				for word, count in other_next_words.iteritems():
+					next_words[word] = next_words.get(word, 0) + count
+
+	def remove_word(self, word_list, count = 1):
+		"""Subtracts count from the word list's count, dropping it once the count reaches zero."""
+		if len(word_list) != self.get_depth():
+			raise ValueError('Expected %s words in list but found %s' % (self.get_depth(), len(word_list)))
+
+		prefix = tuple(word_list[:-1])
+		next_words = self.counts.get(prefix)
+		if next_words is None or word_list[-1] not in next_words:
+			return
+		remaining = next_words[word_list[-1]] - count
+		if remaining > 0:
+			next_words[word_list[-1]] = remaining
+		else:
+			del next_words[word_list[-1]]
+			if not next_words:
+				del self.counts[prefix]
+
+	def prune(self, min_count = None, top_k = None):
+		"""Drops the transitions of each state with a count below min_count, or ranked below
+		the top_k most common, except for each state's most common one (see keep_transition).
+		Returns the number of transitions dropped."""
+		removed = 0
+		for next_words in self.counts.itervalues():
+			ranked = sorted(next_words.iteritems(), key = lambda item: (-item[1], item[0]))
+			for rank, (word, count) in enumerate(ranked):
+				if not keep_transition(rank, count, min_count, top_k):
+					del next_words[word]
+					removed += 1
+		return removed
+
+	def size_stats(self):
+		return {'transitions' : sum(len(next_words) for next_words in self.counts.itervalues()), 'states' : len(self.counts)}
+
+	def commit(self):
+		pass
+
+	def get_word_count(self, word_list):
+		# The returned dict is the one held by the model, callers must not modify it
+		return self.counts.get(tuple(word_list), {})
+
+	def items(self):
+		for prefix, next_words in self.counts.iteritems():
+			for word, count in next_words.iteritems():
+				yield list(prefix) + [word], count
+
+def copy_words(source, target):
+	"""Adds every word list and count in source (a Db or MemDb) to target, then commits target."""
+	target.add_words(source.items())
+	target.commit()
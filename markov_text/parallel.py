@@ -0,0 +1,75 @@
+from parse import Parser
+from memdb import MemDb
+import multiprocessing
+import time
+
+CHUNK_SIZE = 10000
+
+def chunk_sentences(sentences, chunk_size = CHUNK_SIZE):
+	"""Generator that groups an iterable of sentences into lists of chunk_size sentences."""
+	chunk = []
+	for sentence in sentences:
+		chunk.append(sentence)
+		if len(chunk) == chunk_size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+def count_chunk(args):
+	"""Counts the n-grams of a list of sentences into a new MemDb. Runs in the worker processes."""
+	sentences, depth = args
+	db = MemDb()
+	db.setup(depth)
+	Parser('chunk', db).parse_list(sentences)
+	return db
+
+def parallel_parse(sentences, db, workers = None, chunk_size = CHUNK_SIZE, progress = None):
+	"""Parses sentences into db using a pool of worker processes.
+	The sentences are split into chunks of chunk_size sentences, each chunk is counted in a worker,
+	and the counts are merged in this process and written to db with a single add_words call.
+	At most two chunks per worker are in flight at a time, so sentences can come from a stream.
+	If given, progress(sentence_count, sentences_per_sec) is called after every chunk is merged.
+	Arguments:
+		sentences			Iterable of strings, each being a single sentence to learn from
+		db					Db or MemDb object to add the counts to
+		workers (optional)	Number of worker processes; defaults to the number of CPUs.
+							With 1 worker, the chunks are counted in this process"""
+	depth = db.get_depth()
+	if workers is None:
+		workers = multiprocessing.cpu_count()
+	merged = MemDb()
+	merged.setup(depth)
+	sentence_count = [0]
+	start = time.time()
+
+	def merge(chunk_db, chunk_length):
+		merged.merge(chunk_db)
+		sentence_count[0] += chunk_length
+		if progress:
+			progress(sentence_count[0], sentence_count[0] / max(time.time() - start, 1e-9))
+
+	chunks = chunk_sentences(sentences, chunk_size)
+	if workers == 1:
+		for chunk in chunks:
+			merge(count_chunk((chunk, depth)), len(chunk))
+	else:
+		pool = multiprocessing.Pool(workers)
+		try:
+			in_flight = []
+			for chunk in chunks:
+				in_flight.append((pool.apply_async(count_chunk, ((chunk, depth), )), len(chunk)))
+				if len(in_flight) >= 2 * workers:
+					result, chunk_length = in_flight.pop(0)
+					merge(result.get(), chunk_length)
+			for result, chunk_length in in_flight:
+				merge(result.get(), chunk_length)
+			pool.close()
+		except:
+			pool.terminate()
+			raise
+		finally:
+			pool.join()
+
+	db.add_words(merged.items())
+	db.commit()
@@ -1,36 +1,93 @@
-import sys
 import re
+import time
+
+# In addition to alphanumeric and underscore characters, ' and - are part of a word,
+#  but only if they don't occur at the beginning or end of a word.
+WORD_REGEX = re.compile("\\b[\\w'-/]+\\b")
 
 class Parser:
 	SENTENCE_START_SYMBOL = '^'
 	SENTENCE_END_SYMBOL = '$'
+	PROGRESS_INTERVAL = 1000
+	BULK_BATCH_SIZE = 10000
 
 	def __init__(self, name, db, sentence_split_char = '\n'):
 		self.name = name
 		self.db   = db
 		self.sentence_split_char = sentence_split_char
-		# In addition to alphanumeric and underscore characters, ' and - are part of a word,
-		#  but only if they don't occur at the beginning or end of a word.
-		self.word_regex = re.compile("\\b[\\w'-/]+\\b")
+		self.word_regex = WORD_REGEX
 
-	def parse(self, txt):
+	def parse(self, txt, progress = None, bulk = False):
 		sentences = txt.split(self.sentence_split_char)
-		self.parse_list(sentences)
+		if bulk:
+			self.parse_list_bulk(sentences, progress = progress)
+		else:
+			self.parse_list(sentences, progress)
+
+	def _words(self, sentence, depth):
+		# Sentences that were tokenized ahead of time carry their words with them
+		list_of_words = getattr(sentence, 'words', None)
+		if list_of_words is None:
+			list_of_words = self.word_regex.findall(sentence)
+		return [Parser.SENTENCE_START_SYMBOL] * (depth - 1) + list_of_words + [Parser.SENTENCE_END_SYMBOL] * (depth - 1)
 
-	def parse_list(self, sentences):
+	def add_sentence(self, sentence, depth = None):
+		"""Adds every n-gram of a single sentence to the db, without committing."""
+		if depth is None:
+			depth = self.db.get_depth()
+		words = self._words(sentence, depth)
+		for n in range(0, len(words) - depth + 1):
+			self.db.add_word(words[n:n+depth])
+
+	def parse_list(self, sentences, progress = None):
+		"""Adds every n-gram of every sentence to the db, committing after each sentence.
+		If given, progress(sentence_count, sentences_per_sec) is called every PROGRESS_INTERVAL sentences."""
 		depth = self.db.get_depth()
 		i = 0
+		start = time.time()
 
 		for sentence in sentences:
-			list_of_words = self.word_regex.findall(sentence)
+			self.add_sentence(sentence, depth)
+			self.db.commit()
+			i += 1
+			if progress and i % self.PROGRESS_INTERVAL == 0:
+				progress(i, i / max(time.time() - start, 1e-9))
 
-			words = [Parser.SENTENCE_START_SYMBOL] * (depth - 1) + list_of_words + [Parser.SENTENCE_END_SYMBOL] * (depth - 1)
-			
+	def forget_list(self, sentences):
+		"""Undoes parse_list: subtracts every n-gram of every sentence from the db."""
+		depth = self.db.get_depth()
+
+		for sentence in sentences:
+			words = self._words(sentence, depth)
 			for n in range(0, len(words) - depth + 1):
-				self.db.add_word(words[n:n+depth])
+				self.db.remove_word(words[n:n+depth])
+		self.db.commit()
+
+	def parse_list_bulk(self, sentences, batch_size = BULK_BATCH_SIZE, progress = None):
+		"""Like parse_list, but counts the n-grams of batch_size sentences in memory and then adds
+		the counts to the db in one call to add_words and one commit per batch.
+		If given, progress(sentence_count, sentences_per_sec) is called after every batch."""
+		depth = self.db.get_depth()
+		i = 0
+		start = time.time()
+		counts = {}
+
+		for sentence in sentences:
+			words = self._words(sentence, depth)
+			for n in range(0, len(words) - depth + 1):
+				ngram = tuple(words[n:n+depth])
+				counts[ngram] = counts.get(ngram, 0) + 1
 
-			self.db.commit()
 			i += 1
-			if i % 1000 == 0:
-				print i
-				sys.stdout.flush()
+			if i % batch_size == 0:
+				self._write_batch(counts, i, start, progress)
+				counts = {}
+
+		if counts:
+			self._write_batch(counts, i, start, progress)
+
+	def _write_batch(self, counts, sentence_count, start, progress):
+		self.db.add_words(counts.iteritems())
+		self.db.commit()
+		if progress:
+			progress(sentence_count, sentence_count / max(time.time() - start, 1e-9))
@@ -1,5 +1,9 @@
-from random import randint
+import random
 
 class Rnd:
+    def __init__(self, seed = None):
+        # Each Rnd draws from its own stream, so seeding one doesn't affect any other
+        self.random = random.Random(seed)
+
     def randint(self, maxint):
-        return randint(1, maxint)
\ No newline at end of file
+        return self.random.randint(1, maxint)
@@ -30,7 +30,7 @@ class Sql:
         return 'SELECT %s FROM %s WHERE %s=?' % (self.VAL_COL_NAME, self.PARAM_TABLE_NAME, self.KEY_COL_NAME)
 
     def create_index_sql(self, column_count):
-        return 'CREATE INDEX IF NOT EXISTS %s ON %s (%s)' % (self.INDEX_NAME, self.WORD_TABLE_NAME, self._make_column_name_list(column_count))
+        return 'CREATE UNIQUE INDEX IF NOT EXISTS %s ON %s (%s)' % (self.INDEX_NAME, self.WORD_TABLE_NAME, self._make_column_name_list(column_count))
     
     def select_count_for_words_sql(self, column_count):
         return 'SELECT %s FROM %s WHERE %s' % (self.COUNT_COL_NAME, self.WORD_TABLE_NAME, self._make_column_names_and_placeholders(column_count)) 
@@ -38,6 +38,24 @@ class Sql:
     def update_count_for_words_sql(self, column_count):
         return 'UPDATE %s SET %s=? WHERE %s' % (self.WORD_TABLE_NAME, self.COUNT_COL_NAME, self._make_column_names_and_placeholders(column_count)) 
     
+    def increment_count_for_words_sql(self, column_count):
+        return 'UPDATE %s SET %s=%s+? WHERE %s' % (self.WORD_TABLE_NAME, self.COUNT_COL_NAME, self.COUNT_COL_NAME, self._make_column_names_and_placeholders(column_count))
+
+    def insert_row_if_missing_for_words_sql(self, column_count):
+        columns = self._make_column_name_list(column_count) + ', ' + self.COUNT_COL_NAME
+        values  = ', '.join(['?'] * (column_count + 1))
+
+        return 'INSERT INTO %s (%s) SELECT %s WHERE NOT EXISTS (SELECT 1 FROM %s WHERE %s)' % (self.WORD_TABLE_NAME, columns, values, self.WORD_TABLE_NAME, self._make_column_names_and_placeholders(column_count))
+
+    def upsert_word_sql(self, column_count):
+        columns = self._make_column_name_list(column_count)
+        values  = ', '.join(['?'] * (column_count + 1))
+
+        return 'INSERT INTO %s (%s, %s) VALUES (%s) ON CONFLICT (%s) DO UPDATE SET %s=%s+excluded.%s' % (self.WORD_TABLE_NAME, columns, self.COUNT_COL_NAME, values, columns, self.COUNT_COL_NAME, self.COUNT_COL_NAME, self.COUNT_COL_NAME)
+
+    def list_word_indexes_sql(self):
+        return 'PRAGMA index_list(%s)' % (self.WORD_TABLE_NAME, )
+
     def insert_row_for_words_sql(self, column_count):
         columns = self._make_column_name_list(column_count) + ', ' + self.COUNT_COL_NAME
         values  = ', '.join(['?'] * (column_count + 1))
@@ -49,6 +67,80 @@ class Sql:
         
         return 'SELECT %s, %s FROM %s WHERE %s' % (last_word_col_name, self.COUNT_COL_NAME, self.WORD_TABLE_NAME, self._make_column_names_and_placeholders(column_count - 1))
     
+    def select_all_words_sql(self, column_count):
+        return 'SELECT %s, %s FROM %s' % (self._make_column_name_list(column_count), self.COUNT_COL_NAME, self.WORD_TABLE_NAME)
+
+    def delete_used_up_words_sql(self, column_count):
+        return 'DELETE FROM %s WHERE %s AND %s<=0' % (self.WORD_TABLE_NAME, self._make_column_names_and_placeholders(column_count), self.COUNT_COL_NAME)
+
+    def select_all_words_by_state_sql(self, column_count):
+        states = self._make_column_name_list(column_count - 1)
+        last_word_col_name = self.WORD_COL_NAME_PREFIX + str(column_count)
+
+        return 'SELECT %s, %s FROM %s ORDER BY %s, %s DESC, %s' % (self._make_column_name_list(column_count), self.COUNT_COL_NAME, self.WORD_TABLE_NAME, states, self.COUNT_COL_NAME, last_word_col_name)
+
+    def delete_word_list_sql(self, column_count):
+        return 'DELETE FROM %s WHERE %s' % (self.WORD_TABLE_NAME, self._make_column_names_and_placeholders(column_count))
+
+    def count_words_sql(self):
+        return 'SELECT COUNT(*) FROM ' + self.WORD_TABLE_NAME
+
+    def reindex_sql(self):
+        return 'REINDEX ' + self.WORD_TABLE_NAME
+
+    def vacuum_sql(self):
+        return 'VACUUM'
+
+    def page_count_sql(self):
+        return 'PRAGMA page_count'
+
+    def page_size_sql(self):
+        return 'PRAGMA page_size'
+
     def delete_words_sql(self):
         return 'DELETE FROM ' + self.WORD_TABLE_NAME
-        
\ No newline at end of file
+        
+class InternedSql(Sql):
+    """Schema that stores each distinct word once, in the vocabulary table, and the word
+    table as integer word ids with a composite primary key, so no separate index is needed."""
+    VOCAB_TABLE_NAME = 'vocab'
+    ID_COL_NAME      = 'id'
+    TEXT_COL_NAME    = 'text'
+
+    def create_word_table_sql(self, column_count):
+        columns = ', '.join(['%s%s INTEGER NOT NULL' % (self.WORD_COL_NAME_PREFIX, n) for n in range(1, column_count + 1)])
+
+        return 'CREATE TABLE IF NOT EXISTS %s (%s, %s INTEGER NOT NULL, PRIMARY KEY (%s)) WITHOUT ROWID' % (self.WORD_TABLE_NAME, columns, self.COUNT_COL_NAME, self._make_column_name_list(column_count))
+
+    def create_vocab_table_sql(self):
+        return 'CREATE TABLE IF NOT EXISTS %s (%s INTEGER PRIMARY KEY, %s TEXT NOT NULL UNIQUE)' % (self.VOCAB_TABLE_NAME, self.ID_COL_NAME, self.TEXT_COL_NAME)
+
+    def insert_vocab_sql(self):
+        return 'INSERT OR IGNORE INTO %s (%s) VALUES (?)' % (self.VOCAB_TABLE_NAME, self.TEXT_COL_NAME)
+
+    def select_vocab_id_sql(self):
+        return 'SELECT %s FROM %s WHERE %s=?' % (self.ID_COL_NAME, self.VOCAB_TABLE_NAME, self.TEXT_COL_NAME)
+
+    def select_vocab_text_sql(self):
+        return 'SELECT %s FROM %s WHERE %s=?' % (self.TEXT_COL_NAME, self.VOCAB_TABLE_NAME, self.ID_COL_NAME)
+
+    def select_all_vocab_sql(self):
+        return 'SELECT %s, %s FROM %s' % (self.ID_COL_NAME, self.TEXT_COL_NAME, self.VOCAB_TABLE_NAME)
+
+    def delete_unused_vocab_sql(self, column_count):
+        used = ' UNION '.join(['SELECT %s%s FROM %s' % (self.WORD_COL_NAME_PREFIX, n, self.WORD_TABLE_NAME) for n in range(1, column_count + 1)])
+
+        return 'DELETE FROM %s WHERE %s NOT IN (%s)' % (self.VOCAB_TABLE_NAME, self.ID_COL_NAME, used)
+
+    def select_all_words_by_state_sql(self, column_count):
+        # Like Sql's, ties in count are broken by the text of the next word, not by its id
+        states = self._make_column_name_list(column_count - 1)
+        last_word_col_name = self.WORD_COL_NAME_PREFIX + str(column_count)
+
+        return 'SELECT %s, %s FROM %s JOIN %s ON %s = %s ORDER BY %s, %s DESC, %s' % (self._make_column_name_list(column_count), self.COUNT_COL_NAME, self.WORD_TABLE_NAME, self.VOCAB_TABLE_NAME, self.ID_COL_NAME, last_word_col_name, states, self.COUNT_COL_NAME, self.TEXT_COL_NAME)
+
+    def reindex_sql(self):
+        return 'REINDEX'
+
+    def vocab_table_exists_sql(self):
+        return "SELECT 1 FROM sqlite_master WHERE type='table' AND name='%s'" % (self.VOCAB_TABLE_NAME, )
@@ -0,0 +1,57 @@
+"""Streaming text input for markov.py: sentences are read and split incrementally,
+so memory use does not grow with the size of the input."""
+import bz2
+import codecs
+import glob
+import gzip
+import sys
+
+READ_SIZE = 64 * 1024 # characters read at a time
+STDIN_NAME = '-'
+
+def expand_paths(paths):
+	"""Expands glob patterns in a list of paths. '-' (stdin) and paths that match nothing are kept as they are."""
+	expanded = []
+	for path in paths:
+		matches = sorted(glob.glob(path)) if path != STDIN_NAME else []
+		expanded.extend(matches if matches else [path])
+	return expanded
+
+def open_text(path, encoding = 'utf-8'):
+	"""Opens a file for reading decoded text. '-' is stdin; .gz and .bz2 files are decompressed as they are read."""
+	if path == STDIN_NAME:
+		raw = sys.stdin
+	elif path.endswith('.gz'):
+		raw = gzip.open(path, 'rb')
+	elif path.endswith('.bz2'):
+		raw = bz2.BZ2File(path, 'rb')
+	else:
+		raw = open(path, 'rb')
+	return codecs.getreader(encoding)(raw)
+
+def split_stream(text_file, separator, read_size = READ_SIZE):
+	"""Generator that yields the sentences of a text file one at a time.
+	Only the current chunk and the unfinished sentence at its end are held in memory."""
+	remainder = u''
+	while True:
+		chunk = text_file.read(read_size)
+		if not chunk:
+			break
+		sentences = (remainder + chunk).split(separator)
+		remainder = sentences.pop()
+		for sentence in sentences:
+			yield sentence
+	yield remainder
+
+def read_sentences(paths, separator, read_size = READ_SIZE):
+	"""Generator that yields the sentences of every file in paths, in order.
+	Paths may be glob patterns, '-' for stdin, or .gz/.bz2 compressed files.
+	Sentences never span two files."""
+	for path in expand_paths(paths):
+		text_file = open_text(path)
+		try:
+			for sentence in split_stream(text_file, separator, read_size):
+				yield sentence
+		finally:
+			if path != STDIN_NAME:
+				text_file.close()
@@ -0,0 +1,46 @@
+import unittest
+from cache import ModelCache
+
+class ModelCacheTest(unittest.TestCase):
+    def test_fingerprint_depends_on_sentences_and_depth(self):
+        fingerprint = ModelCache.fingerprint(['the cat', 'sat'], 2)
+        self.assertEqual(fingerprint, ModelCache.fingerprint(['the cat', 'sat'], 2))
+        self.assertEqual(fingerprint, ModelCache.fingerprint([u'the cat', u'sat'], 2))
+        self.assertNotEqual(fingerprint, ModelCache.fingerprint(['the cat', 'sat'], 3))
+        self.assertNotEqual(fingerprint, ModelCache.fingerprint(['the', 'cat sat'], 2))
+
+    def test_get_returns_stored_model_and_counts_hits(self):
+        cache = ModelCache(2)
+        self.assertEqual(cache.get('key'), None)
+        cache.put('key', 'db', 10, 0.5)
+        self.assertEqual(cache.get('key'), 'db')
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+        self.assertEqual(stats['builds'], 1)
+        self.assertEqual(stats['last_build_time'], 0.5)
+
+    def test_least_recently_used_model_evicted(self):
+        cache = ModelCache(2)
+        cache.put('a', 'db a', 1, 0)
+        cache.put('b', 'db b', 1, 0)
+        cache.get('a')
+        cache.put('c', 'db c', 1, 0)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 'db a')
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_models_evicted_when_over_max_chars(self):
+        cache = ModelCache(10, 5)
+        cache.put('a', 'db a', 3, 0)
+        cache.put('b', 'db b', 3, 0)
+        cache.put('c', 'db c', 6, 0)
+        self.assertEqual(cache.get('a'), None)
+        self.assertEqual(cache.get('b'), 'db b')
+        self.assertEqual(cache.get('c'), None)
+        self.assertEqual(cache.stats()['size'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import sqlite3
+from compact import keep_transition, compact
+from db import Db, InternedDb
+from sql import Sql
+from memdb import MemDb
+
+WORD_COUNTS = [(['^', 'the'], 5), (['^', 'a'], 1), (['the', 'cat'], 3), (['the', 'dog'], 2), (['the', 'end'], 1),
+    (['cat', '$'], 3), (['dog', '$'], 2), (['end', '$'], 1), (['a', 'cow'], 1), (['cow', '$'], 1)]
+
+class CompactTest(unittest.TestCase):
+    def new_dbs(self):
+        dbs = [MemDb(), Db(sqlite3.connect(':memory:'), Sql()), InternedDb(sqlite3.connect(':memory:'))]
+        for db in dbs:
+            db.setup(2)
+            db.add_words(WORD_COUNTS)
+            db.commit()
+        return dbs
+
+    def test_keep_transition(self):
+        self.assertTrue(keep_transition(0, 1, min_count = 5, top_k = 1))
+        self.assertFalse(keep_transition(1, 10, top_k = 1))
+        self.assertFalse(keep_transition(1, 1, min_count = 2))
+        self.assertTrue(keep_transition(1, 2, min_count = 2, top_k = 2))
+        self.assertTrue(keep_transition(5, 1))
+
+    def test_min_count_keeps_most_common_transition_of_each_state(self):
+        for db in self.new_dbs():
+            self.assertEqual(db.prune(min_count = 2), 2)
+            self.assertEqual(sorted(db.items()), sorted([(['^', 'the'], 5), (['the', 'cat'], 3), (['the', 'dog'], 2),
+                (['cat', '$'], 3), (['dog', '$'], 2), (['end', '$'], 1), (['a', 'cow'], 1), (['cow', '$'], 1)]))
+
+    def test_top_k(self):
+        for db in self.new_dbs():
+            self.assertEqual(db.prune(top_k = 1), 3)
+            self.assertEqual(db.get_word_count(['the']), {'cat' : 3})
+            self.assertEqual(db.get_word_count(['^']), {'the' : 5})
+
+    def test_ties_broken_by_word_text_on_every_backend(self):
+        # 'dog' and 'cow' are added first, so the interned ids are in a different order from the words
+        tied = [(['the', 'dog'], 2), (['the', 'cow'], 2), (['the', 'ant'], 2), (['the', 'bee'], 2), (['^', 'the'], 1)]
+        dbs = [MemDb(), Db(sqlite3.connect(':memory:'), Sql()), InternedDb(sqlite3.connect(':memory:'))]
+        for db in dbs:
+            db.setup(2)
+            db.add_words(tied)
+            db.commit()
+            self.assertEqual(db.prune(top_k = 2), 2)
+            db.commit()
+        for db in dbs:
+            self.assertEqual(db.get_word_count(['the']), {'ant' : 2, 'bee' : 2})
+            self.assertEqual(sorted(db.items()), sorted(dbs[0].items()))
+
+    def test_compact_reports_sizes(self):
+        for db in self.new_dbs():
+            result = compact(db, top_k = 1)
+            self.assertEqual(result['removed'], 3)
+            self.assertEqual(result['before']['transitions'], 10)
+            self.assertEqual(result['after']['transitions'], 7)
+            if 'bytes' in result['before']:
+                self.assertTrue(result['after']['bytes'] <= result['before']['bytes'])
+
+    def test_interned_prune_drops_unused_words(self):
+        db = self.new_dbs()[2]
+        db.add_word(['moo', 'cow'])
+        db.remove_word(['moo', 'cow'])
+        db.prune(top_k = 1)
+        words = set(row[0] for row in db.conn.execute('SELECT text FROM vocab'))
+        self.assertEqual(words, set(['^', 'the', 'cat', 'dog', 'end', 'a', 'cow', '$']))
+        self.assertEqual(db.get_word_count(['end']), {'$' : 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+# coding: utf-8
+import unittest
+import os
+import shutil
+import tempfile
+from compiled import CompiledDb, compile_model
+from memdb import MemDb
+
+class CompiledDbTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'model.mkc')
+        self.mem_db = MemDb()
+        self.mem_db.setup(3)
+        self.mem_db.add_word(['i', 'like', 'dogs'])
+        self.mem_db.add_word(['i', 'like', 'cats'], 2)
+        self.mem_db.add_word(['i', 'like', u'caf\xe9s'], 3)
+        self.mem_db.add_word(['you', 'like', 'dogs'])
+        compile_model(self.mem_db, self.path)
+        self.db = CompiledDb(self.path)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.dir)
+
+    def test_depth_read_from_file(self):
+        self.assertEqual(self.db.get_depth(), 3)
+
+    def test_get_word_counts_works_correctly(self):
+        self.assertEqual(self.db.get_word_count(['i', 'like']), {'dogs' : 1, 'cats' : 2, u'caf\xe9s' : 3})
+        self.assertEqual(self.db.get_word_count([u'you', u'like']), {'dogs' : 1})
+        self.assertEqual(self.db.get_word_count(['we', 'like']), {})
+        self.assertEqual(self.db.get_word_count(['like', 'i']), {})
+
+    def test_get_word_table_has_cumulative_counts(self):
+        self.assertEqual(self.db.get_word_table(['i', 'like']), ([u'caf\xe9s', 'cats', 'dogs'], [3, 5, 6]))
+
+    def test_items_round_trip(self):
+        self.assertEqual(sorted(self.db.items()), sorted(self.mem_db.items()))
+
+    def test_error_when_modified(self):
+        self.assertRaises(ValueError, self.db.add_word, ['i', 'like', 'frogs'])
+        self.assertRaises(ValueError, self.db.setup, 3)
+
+    def test_error_when_not_a_compiled_model(self):
+        with open(self.path, 'wb') as f:
+            f.write('\0' * 64)
+        self.assertRaises(ValueError, CompiledDb, self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 import unittest
+import sqlite3
 from db import Db
+from sql import Sql
 
 class DbTest(unittest.TestCase):
     def setUp(self):
@@ -23,6 +25,7 @@ class DbTest(unittest.TestCase):
     def test_insert_row_when_add_new_word_list(self):
         db = Db(self.conn, self.sql)
         db.setup(3)
+        db.upsert = False
         word_list = ['one', 'two', 'three']
         db.add_word(word_list)
         
@@ -34,6 +37,7 @@ class DbTest(unittest.TestCase):
     def test_update_row_when_add_repeated_word_list(self):
         db = Db(self.conn, self.sql)
         db.setup(3)
+        db.upsert = False
         row_count = 10
         word_list = ['one', 'two', 'three']
         self.conn.stub_cursor.fetchone_results.append([row_count])
@@ -45,6 +49,73 @@ class DbTest(unittest.TestCase):
         self.assertEqual(execute_args[4], ('select_count_for_words_sql 3', word_list))
         self.assertEqual(execute_args[5], ('update_count_for_words_sql 3', [row_count + 1] + word_list))
 
+    def test_add_word_adds_given_count(self):
+        db = Db(self.conn, self.sql)
+        db.setup(3)
+        db.upsert = False
+        word_list = ['one', 'two', 'three']
+        self.conn.stub_cursor.fetchone_results.append([10])
+
+        db.add_word(word_list, 5)
+        db.add_word(word_list, 5)
+
+        execute_args = self.conn.stub_cursor.execute_args
+        self.assertEqual(execute_args[5], ('update_count_for_words_sql 3', [15] + word_list))
+        self.assertEqual(execute_args[7], ('insert_row_for_words_sql 3', word_list + [5]))
+
+    def test_add_words_uses_executemany(self):
+        db = Db(self.conn, self.sql)
+        db.setup(2)
+        db.upsert = False
+        db.add_words([(('i', 'like'), 2), (['you', 'like'], 1)])
+
+        executemany_args = self.conn.stub_cursor.executemany_args
+        self.assertEqual(executemany_args, [
+            ('increment_count_for_words_sql 2', [[2, 'i', 'like'], [1, 'you', 'like']]),
+            ('insert_row_if_missing_for_words_sql 2', [['i', 'like', 2, 'i', 'like'], ['you', 'like', 1, 'you', 'like']])])
+
+    def test_add_word_upserts_with_single_statement(self):
+        db = Db(self.conn, self.sql)
+        db.setup(3)
+        db.upsert = True
+        word_list = ['one', 'two', 'three']
+        db.add_word(word_list, 2)
+
+        execute_args = self.conn.stub_cursor.execute_args
+        self.assertEqual(execute_args[4:], [('upsert_word_sql 3', word_list + [2])])
+
+    def test_add_words_upserts_with_single_executemany(self):
+        db = Db(self.conn, self.sql)
+        db.setup(2)
+        db.upsert = True
+        db.add_words([(('i', 'like'), 2), (['you', 'like'], 1)])
+
+        self.assertEqual(self.conn.stub_cursor.executemany_args, [
+            ('upsert_word_sql 2', [['i', 'like', 2], ['you', 'like', 1]])])
+
+    def test_error_when_add_words_count_wrong(self):
+        db = Db(self.conn, self.sql)
+        db.setup(3)
+        self.assertRaises(ValueError, db.add_words, [(['one', 'two'], 1)])
+
+    def test_remove_word_decrements_and_deletes_used_up_rows(self):
+        db = Db(self.conn, self.sql)
+        db.setup(2)
+        db.remove_word(['i', 'like'], 2)
+
+        execute_args = self.conn.stub_cursor.execute_args
+        self.assertEqual(execute_args[4:], [
+            ('increment_count_for_words_sql 2', [-2, 'i', 'like']),
+            ('delete_used_up_words_sql 2', ['i', 'like'])])
+
+    def test_items_returns_all_word_lists_and_counts(self):
+        db = Db(self.conn, self.sql)
+        db.setup(2)
+        self.conn.stub_cursor.execute_results = [[['i', 'like', 1], ['you', 'like', 2]]]
+
+        self.assertEqual(list(db.items()), [(['i', 'like'], 1), (['you', 'like'], 2)])
+        self.assertEqual(self.conn.stub_cursor.execute_args[4], ('select_all_words_sql 2',))
+
     def test_db_commit_performed_correctly(self):
         db = Db(self.conn, self.sql)
         db.setup(3)
@@ -65,10 +136,56 @@ class DbTest(unittest.TestCase):
         self.assertEqual(len(execute_args), 5)
         self.assertEqual(execute_args[4], ('select_words_and_counts_sql 3', word_list))
 
+class SqliteDbTest(unittest.TestCase):
+    def test_new_db_upserts(self):
+        db = Db(sqlite3.connect(':memory:'), Sql())
+        db.setup(2)
+        db.add_word(['i', 'like'])
+        db.add_words([(['i', 'like'], 2), (['you', 'like'], 1)])
+        self.assertTrue(db.upsert)
+        self.assertEqual(sorted(db.items()), [([u'i', u'like'], 3), ([u'you', u'like'], 1)])
+
+    def test_db_without_unique_key_adds_with_two_statements(self):
+        conn = sqlite3.connect(':memory:')
+        # The schema of .db files created before the index was unique
+        conn.execute('CREATE TABLE word (word1, word2, count)')
+        conn.execute('CREATE INDEX i_word ON word (word1, word2)')
+        conn.execute('CREATE TABLE param (name, value)')
+        conn.execute("INSERT INTO param (name, value) VALUES ('depth', 2)")
+        db = Db(conn, Sql())
+        db.add_word(['i', 'like'])
+        db.add_words([(['i', 'like'], 2), (['you', 'like'], 1)])
+        self.assertFalse(db.upsert)
+        self.assertEqual(sorted(db.items()), [([u'i', u'like'], 3), ([u'you', u'like'], 1)])
+
+    def test_statements_built_once(self):
+        db = Db(sqlite3.connect(':memory:'), CountingSql())
+        db.setup(2)
+        for _ in range(3):
+            db.add_word(['i', 'like'])
+            db.get_word_count(['i'])
+        self.assertEqual(db.sql.calls, {'upsert_word_sql' : 1, 'select_words_and_counts_sql' : 1})
+
+class CountingSql(Sql):
+    def __init__(self):
+        self.calls = {}
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def upsert_word_sql(self, column_count):
+        self._count('upsert_word_sql')
+        return Sql.upsert_word_sql(self, column_count)
+
+    def select_words_and_counts_sql(self, column_count):
+        self._count('select_words_and_counts_sql')
+        return Sql.select_words_and_counts_sql(self, column_count)
+
 class StubCursor:
     def __init__(self):
         self.execute_results = []
         self.execute_args = []
+        self.executemany_args = []
         self.fetchone_results = []
         self.fetchone_count = 0
         
@@ -88,6 +205,9 @@ class StubCursor:
         
         return None
     
+    def executemany(self, *args):
+        self.executemany_args.append(args)
+
     def get_execute_count(self):
         return self.execute_count
     
@@ -124,12 +244,27 @@ class StubSql:
     def update_count_for_words_sql(self, column_count):
         return 'update_count_for_words_sql'  + ' ' + str(column_count)
     
+    def upsert_word_sql(self, column_count):
+        return 'upsert_word_sql' + ' ' + str(column_count)
+
     def insert_row_for_words_sql(self, column_count):
         return 'insert_row_for_words_sql' + ' ' + str(column_count)
+
+    def increment_count_for_words_sql(self, column_count):
+        return 'increment_count_for_words_sql' + ' ' + str(column_count)
+
+    def insert_row_if_missing_for_words_sql(self, column_count):
+        return 'insert_row_if_missing_for_words_sql' + ' ' + str(column_count)
     
     def select_words_and_counts_sql(self, column_count):
         return 'select_words_and_counts_sql' + ' ' + str(column_count)
     
+    def select_all_words_sql(self, column_count):
+        return 'select_all_words_sql' + ' ' + str(column_count)
+
+    def delete_used_up_words_sql(self, column_count):
+        return 'delete_used_up_words_sql' + ' ' + str(column_count)
+
     def delete_words_sql(self):
         return 'delete_words_sql'            
     
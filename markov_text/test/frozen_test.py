@@ -0,0 +1,72 @@
+import unittest
+import threading
+from frozen import FrozenDb, freeze, merge_models
+from memdb import MemDb
+from gen import Generator
+from rnd import Rnd
+
+class FrozenDbTest(unittest.TestCase):
+    def setUp(self):
+        source = MemDb()
+        source.setup(3)
+        source.add_words([(['^', '^', 'the'], 3), (['^', 'the', 'cat'], 2), (['^', 'the', 'dog'], 1),
+            (['the', 'cat', '$'], 2), (['the', 'dog', '$'], 1), (['cat', '$', '$'], 2), (['dog', '$', '$'], 1)])
+        self.source = source
+        self.db = freeze(source)
+
+    def test_same_chain_as_source(self):
+        self.assertEqual(self.db.get_depth(), 3)
+        self.assertEqual(sorted(self.db.items()), sorted(self.source.items()))
+        self.assertEqual(self.db.get_word_count(['^', 'the']), {'cat' : 2, 'dog' : 1})
+        self.assertEqual(self.db.get_word_count(['no', 'such']), {})
+
+    def test_word_table_is_immutable(self):
+        self.assertEqual(self.db.get_word_table(['^', 'the']), (('cat', 'dog'), (2, 3)))
+        self.assertEqual(self.db.get_word_table(['no', 'such']), ((), ()))
+
+    def test_source_changes_not_seen(self):
+        self.source.add_word(['^', 'the', 'cat'])
+        self.assertEqual(self.db.get_word_count(['^', 'the']), {'cat' : 2, 'dog' : 1})
+
+    def test_writes_raise(self):
+        self.assertRaises(ValueError, self.db.setup, 3)
+        self.assertRaises(ValueError, self.db.add_word, ['a', 'b', 'c'])
+        self.assertRaises(ValueError, self.db.add_words, [])
+        self.assertRaises(ValueError, self.db.remove_word, ['a', 'b', 'c'])
+
+    def test_merge_sums_counts(self):
+        other = MemDb()
+        other.setup(3)
+        other.add_words([(['^', 'the', 'cat'], 1), (['^', 'a', 'cat'], 4)])
+        merged = merge_models([self.db, other])
+
+        self.assertEqual(merged.get_word_count(['^', 'the']), {'cat' : 3, 'dog' : 1})
+        self.assertEqual(merged.get_word_count(['^', 'a']), {'cat' : 4})
+        self.assertEqual(merged.get_word_count(['the', 'cat']), {'$' : 2})
+
+    def test_merge_of_different_depths_raises(self):
+        other = MemDb()
+        other.setup(2)
+        self.assertRaises(ValueError, merge_models, [self.db, other])
+
+    def test_concurrent_generation(self):
+        results = []
+        errors = []
+        def generate():
+            try:
+                generator = Generator('name', self.db, Rnd())
+                results.extend(generator.generate_many(200, ' '))
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target = generate) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), 1600)
+        self.assertEqual(set(results), set(['the cat', 'the dog']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,22 +14,56 @@ class GenTest(unittest.TestCase):
             OrderedDict([('sat', 2)]), 
             OrderedDict([('on', 1), ('under' , 4)]), 
             OrderedDict([('my', 2), ('the', 2)]), 
-            OrderedDict([('mat', 1), ('cat', 1)]), 
             OrderedDict([('$', 1)])]
         
         self.rnd.vals = [1, 2, 2, 1, 4, 1, 1]
         
         self.assertEqual(Generator('name', self.db, self.rnd).generate(' '), 'the cat sat on the mat')
-        self.assertEqual(self.db.get_word_count_args, [['^'], ['the'], ['cat'], ['sat'], ['on'], ['the'], ['mat']])
+        # The candidates following 'the' are only fetched once
+        self.assertEqual(self.db.get_word_count_args, [['^'], ['the'], ['cat'], ['sat'], ['on'], ['mat']])
         self.assertEqual(self.rnd.maxints, [3, 2, 2, 5, 4, 2, 1])
-    
+
+    def test_weighted_choice_matches_cumulative_counts(self):
+        self.db.count_values = [OrderedDict([('a', 2), ('b', 3), ('c', 1)])]
+        self.rnd.vals = [1, 2, 3, 5, 6]
+        generator = Generator('name', self.db, self.rnd)
+
+        self.assertEqual([generator._get_next_word(['^']) for _ in range(5)], ['a', 'a', 'b', 'b', 'c'])
+        self.assertEqual(self.db.get_word_count_args, [['^']])
+        self.assertEqual(self.rnd.maxints, [6, 6, 6, 6, 6])
+
+    def test_clear_cache_refetches_counts(self):
+        self.db.count_values = [OrderedDict([('a', 1)]), OrderedDict([('b', 1)])]
+        self.rnd.vals = [1, 1]
+        generator = Generator('name', self.db, self.rnd)
+
+        self.assertEqual(generator._get_next_word(['^']), 'a')
+        generator.clear_cache()
+        self.assertEqual(generator._get_next_word(['^']), 'b')
+
+    def test_generate_many_shares_tables_and_depth(self):
+        self.db.count_values = [OrderedDict([('a', 1), ('b', 1)]), OrderedDict([('$', 1)]), OrderedDict([('$', 1)])]
+        self.rnd.vals = [1, 1, 2, 1, 1, 1]
+
+        self.assertEqual(Generator('name', self.db, self.rnd).generate_many(3, ' '), ['a', 'b', 'a'])
+        self.assertEqual(self.db.get_word_count_args, [['^'], ['a'], ['b']])
+        self.assertEqual(self.db.get_depth_calls, 1)
+
+    def test_max_words_cuts_sentence_off(self):
+        self.db.count_values = [OrderedDict([('a', 1)]), OrderedDict([('a', 1)])]
+        self.rnd.vals = [1, 1]
+
+        self.assertEqual(Generator('name', self.db, self.rnd).generate(' ', max_words = 2), 'a a')
+
 class StubDb:
     def __init__(self):
         self.count_values = []
         self.get_word_count_args = []
         self.depth = 2
+        self.get_depth_calls = 0
         
     def get_depth(self):
+        self.get_depth_calls += 1
         return self.depth
     
     def get_word_count(self, word_list):   
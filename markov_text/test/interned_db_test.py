@@ -0,0 +1,60 @@
+# coding: utf-8
+import unittest
+import sqlite3
+from db import Db, InternedDb, open_db
+from sql import Sql
+
+class InternedDbTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.db = InternedDb(self.conn)
+        self.db.setup(3)
+
+    def test_words_stored_once_as_ids(self):
+        self.db.add_word(['the', 'cat', 'sat'])
+        self.db.add_word(['the', 'cat', 'ran'], 2)
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM vocab').fetchone()[0], 4)
+        for row in self.conn.execute('SELECT word1, word2, word3, count FROM word'):
+            self.assertTrue(all(isinstance(value, (int, long)) for value in row))
+
+    def test_get_word_count_translates_ids(self):
+        self.db.add_words([(['the', 'cat', 'sat'], 1), (['the', 'cat', 'ran'], 2), ([u'caf\xe9', 'cat', 'sat'], 5)])
+        self.assertEqual(self.db.get_word_count(['the', 'cat']), {'sat' : 1, 'ran' : 2})
+        self.assertEqual(self.db.get_word_count([u'caf\xe9', 'cat']), {'sat' : 5})
+
+    def test_get_word_count_of_unknown_word_empty(self):
+        self.db.add_word(['the', 'cat', 'sat'])
+        self.assertEqual(self.db.get_word_count(['the', 'dog']), {})
+
+    def test_add_words_adds_to_existing_counts(self):
+        self.db.add_words([(['a', 'b', 'c'], 1)])
+        self.db.add_words([(['a', 'b', 'c'], 2), (['a', 'b', 'd'], 1)])
+        self.assertEqual(sorted(self.db.items()), [(['a', 'b', 'c'], 3), (['a', 'b', 'd'], 1)])
+
+    def test_remove_word(self):
+        self.db.add_word(['a', 'b', 'c'], 2)
+        self.db.remove_word(['a', 'b', 'c'])
+        self.db.remove_word(['x', 'y', 'z'])
+        self.assertEqual(self.db.get_word_count(['a', 'b']), {'c' : 1})
+        self.db.remove_word(['a', 'b', 'c'])
+        self.assertEqual(list(self.db.items()), [])
+
+    def test_error_when_word_count_wrong(self):
+        self.assertRaises(ValueError, self.db.add_word, ['one', 'two'])
+        self.assertRaises(ValueError, self.db.remove_word, ['one', 'two'])
+
+    def test_reopened_db_reads_words_back(self):
+        self.db.add_word(['a', 'b', 'c'])
+        self.db.commit()
+        db = open_db(self.conn)
+        self.assertTrue(isinstance(db, InternedDb))
+        self.assertEqual(db.get_depth(), 3)
+        self.assertEqual(db.get_word_count(['a', 'b']), {'c' : 1})
+
+    def test_open_db_of_plain_schema(self):
+        conn = sqlite3.connect(':memory:')
+        Db(conn, Sql()).setup(2)
+        self.assertFalse(isinstance(open_db(conn), InternedDb))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from memdb import MemDb, copy_words
+
+class MemDbTest(unittest.TestCase):
+    def setUp(self):
+        self.db = MemDb()
+        self.db.setup(3)
+
+    def test_error_when_depth_not_set(self):
+        self.assertRaises(ValueError, MemDb().get_depth)
+
+    def test_error_when_add_word_count_wrong(self):
+        self.assertRaises(ValueError, self.db.add_word, ['one', 'two'])
+
+    def test_get_word_counts_works_correctly(self):
+        self.db.add_word(['i', 'like', 'dogs'])
+        self.db.add_word(['i', 'like', 'cats'])
+        self.db.add_word(['i', 'like', 'cats'])
+        self.db.add_word(['i', 'like', 'frogs'], 3)
+        self.db.add_word(['you', 'like', 'dogs'])
+
+        self.assertEqual(self.db.get_word_count(['i', 'like']), {'dogs' : 1, 'cats' : 2, 'frogs' : 3})
+        self.assertEqual(self.db.get_word_count(['we', 'like']), {})
+
+    def test_copy_words_copies_all_counts(self):
+        self.db.add_word(['i', 'like', 'dogs'])
+        self.db.add_word(['i', 'like', 'cats'], 2)
+        target = MemDb()
+        target.setup(3)
+        target.add_word(['i', 'like', 'cats'])
+
+        copy_words(self.db, target)
+
+        self.assertEqual(sorted(target.items()), [(['i', 'like', 'cats'], 3), (['i', 'like', 'dogs'], 1)])
+
+if __name__ == '__main__':
+    unittest.main()
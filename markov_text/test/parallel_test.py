@@ -0,0 +1,50 @@
+import unittest
+from parallel import chunk_sentences, parallel_parse
+from parse import Parser
+from memdb import MemDb
+
+SENTENCES = ['the cat sat on the mat', 'the dog sat on the cat', 'a bird flew', 'the cat ran'] * 5
+
+class ParallelTest(unittest.TestCase):
+    def new_db(self):
+        db = MemDb()
+        db.setup(2)
+        return db
+
+    def expected_counts(self):
+        db = self.new_db()
+        Parser('name', db).parse_list(SENTENCES)
+        return sorted(db.items())
+
+    def test_chunks_keep_every_sentence_in_order(self):
+        chunks = list(chunk_sentences(iter(['a', 'b', 'c', 'd', 'e']), 2))
+        self.assertEqual(chunks, [['a', 'b'], ['c', 'd'], ['e']])
+
+    def test_counts_match_serial_parse_in_process(self):
+        db = self.new_db()
+        progress = []
+        parallel_parse(SENTENCES, db, 1, 6, lambda count, rate: progress.append(count))
+        self.assertEqual(sorted(db.items()), self.expected_counts())
+        self.assertEqual(progress, [6, 12, 18, 20])
+
+    def test_counts_match_serial_parse_with_worker_processes(self):
+        db = self.new_db()
+        parallel_parse(iter(SENTENCES), db, 2, 3)
+        self.assertEqual(sorted(db.items()), self.expected_counts())
+
+    def test_merge_sums_counts(self):
+        db = self.new_db()
+        db.add_word(['the', 'cat'])
+        other = self.new_db()
+        other.add_word(['the', 'cat'], 2)
+        other.add_word(['a', 'cat'])
+        db.merge(other)
+        self.assertEqual(sorted(db.items()), [(['a', 'cat'], 1), (['the', 'cat'], 3)])
+
+    def test_error_when_merging_different_depths(self):
+        other = MemDb()
+        other.setup(3)
+        self.assertRaises(ValueError, self.new_db().merge, other)
+
+if __name__ == '__main__':
+    unittest.main()
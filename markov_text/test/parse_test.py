@@ -16,10 +16,32 @@ class ParserTest(unittest.TestCase):
         self.assertEqual(self.db.commit_count, 1)
         self.assertEqual(self.db.added_word_list, [['^', '^', '^', 'the'], ['^', '^', 'the', 'cat'], ['^', 'the', 'cat', 'sat'], ['the', 'cat', 'sat', 'on'], ['cat', 'sat', 'on', 'the'], ['sat', 'on', 'the', 'mat'], ['on', 'the', 'mat', '$'], ['the', 'mat', '$', '$'], ['mat', '$', '$', '$']])
 
+    def test_progress_reported_every_interval(self):
+        progress = []
+        Parser('name', self.db, '\n').parse('\n'.join(['the cat'] * 2500), lambda count, rate: progress.append(count))
+        self.assertEqual(progress, [1000, 2000])
+
+    def test_bulk_parse_adds_counts_in_batches(self):
+        progress = []
+        Parser('name', self.db, '\n').parse_list_bulk(['the cat', 'the cat', 'a cat'], 2, lambda count, rate: progress.append(count))
+        self.assertEqual(self.db.commit_count, 2)
+        self.assertEqual(self.db.added_word_counts, [
+            {('^', 'the') : 2, ('the', 'cat') : 2, ('cat', '$') : 2},
+            {('^', 'a') : 1, ('a', 'cat') : 1, ('cat', '$') : 1}])
+        self.assertEqual(self.db.added_word_list, [])
+        self.assertEqual(progress, [2, 3])
+
+    def test_forget_list_removes_every_ngram(self):
+        Parser('name', self.db, '\n').forget_list(['the cat'])
+        self.assertEqual(self.db.removed_word_list, [['^', 'the'], ['the', 'cat'], ['cat', '$']])
+        self.assertEqual(self.db.commit_count, 1)
+
 class StubDb:
     def __init__(self):
         self.commit_count = 0
         self.added_word_list = []
+        self.added_word_counts = []
+        self.removed_word_list = []
         self.depth = 2
         
     def get_depth(self):
@@ -28,6 +50,12 @@ class StubDb:
     def add_word(self, word_list):
         self.added_word_list.append(word_list)
 
+    def remove_word(self, word_list):
+        self.removed_word_list.append(word_list)
+
+    def add_words(self, word_counts):
+        self.added_word_counts.append(dict(word_counts))
+
     def commit(self):
         self.commit_count += 1
 
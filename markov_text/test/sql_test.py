@@ -1,5 +1,5 @@
 import unittest
-from sql import Sql
+from sql import Sql, InternedSql
 
 class SqlTest(unittest.TestCase):
     def test_create_word_table_sql_correct(self):
@@ -12,7 +12,7 @@ class SqlTest(unittest.TestCase):
         self.assertEqual(Sql().set_param_sql(), 'INSERT INTO param (name, value) VALUES (?, ?)')
     
     def test_create_index_sql_correct(self):
-        self.assertEqual(Sql().create_index_sql(3), 'CREATE INDEX IF NOT EXISTS i_word ON word (word1, word2, word3)')
+        self.assertEqual(Sql().create_index_sql(3), 'CREATE UNIQUE INDEX IF NOT EXISTS i_word ON word (word1, word2, word3)')
     
     def test_select_count_for_words_sql_correct(self):
         self.assertEqual(Sql().select_count_for_words_sql(3), 'SELECT count FROM word WHERE word1=? AND word2=? AND word3=?')
@@ -20,14 +20,60 @@ class SqlTest(unittest.TestCase):
     def test_update_count_for_words_sql_correct(self):
         self.assertEqual(Sql().update_count_for_words_sql(3), 'UPDATE word SET count=? WHERE word1=? AND word2=? AND word3=?')
 
+    def test_increment_count_for_words_sql_correct(self):
+        self.assertEqual(Sql().increment_count_for_words_sql(3), 'UPDATE word SET count=count+? WHERE word1=? AND word2=? AND word3=?')
+
+    def test_insert_row_if_missing_for_words_sql_correct(self):
+        self.assertEqual(Sql().insert_row_if_missing_for_words_sql(2), 'INSERT INTO word (word1, word2, count) SELECT ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM word WHERE word1=? AND word2=?)')
+
+    def test_upsert_word_sql_correct(self):
+        self.assertEqual(Sql().upsert_word_sql(2), 'INSERT INTO word (word1, word2, count) VALUES (?, ?, ?) ON CONFLICT (word1, word2) DO UPDATE SET count=count+excluded.count')
+
+    def test_list_word_indexes_sql_correct(self):
+        self.assertEqual(Sql().list_word_indexes_sql(), 'PRAGMA index_list(word)')
+
     def test_insert_row_for_words_sql_correct(self):
         self.assertEqual(Sql().insert_row_for_words_sql(3), 'INSERT INTO word (word1, word2, word3, count) VALUES (?, ?, ?, ?)')
 
     def test_select_words_and_counts_sql_correct(self):
         self.assertEqual(Sql().select_words_and_counts_sql(3), 'SELECT word3, count FROM word WHERE word1=? AND word2=?')
 
+    def test_select_all_words_sql_correct(self):
+        self.assertEqual(Sql().select_all_words_sql(3), 'SELECT word1, word2, word3, count FROM word')
+
+    def test_delete_used_up_words_sql_correct(self):
+        self.assertEqual(Sql().delete_used_up_words_sql(2), 'DELETE FROM word WHERE word1=? AND word2=? AND count<=0')
+
+    def test_select_all_words_by_state_sql_correct(self):
+        self.assertEqual(Sql().select_all_words_by_state_sql(3), 'SELECT word1, word2, word3, count FROM word ORDER BY word1, word2, count DESC, word3')
+
+    def test_delete_word_list_sql_correct(self):
+        self.assertEqual(Sql().delete_word_list_sql(2), 'DELETE FROM word WHERE word1=? AND word2=?')
+
     def test_delete_words_sql_correct(self):
         self.assertEqual(Sql().delete_words_sql(), 'DELETE FROM word')
 
+class InternedSqlTest(unittest.TestCase):
+    def test_create_word_table_sql_correct(self):
+        self.assertEqual(InternedSql().create_word_table_sql(2), 'CREATE TABLE IF NOT EXISTS word (word1 INTEGER NOT NULL, word2 INTEGER NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (word1, word2)) WITHOUT ROWID')
+
+    def test_create_vocab_table_sql_correct(self):
+        self.assertEqual(InternedSql().create_vocab_table_sql(), 'CREATE TABLE IF NOT EXISTS vocab (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE)')
+
+    def test_insert_vocab_sql_correct(self):
+        self.assertEqual(InternedSql().insert_vocab_sql(), 'INSERT OR IGNORE INTO vocab (text) VALUES (?)')
+
+    def test_select_vocab_id_sql_correct(self):
+        self.assertEqual(InternedSql().select_vocab_id_sql(), 'SELECT id FROM vocab WHERE text=?')
+
+    def test_select_vocab_text_sql_correct(self):
+        self.assertEqual(InternedSql().select_vocab_text_sql(), 'SELECT text FROM vocab WHERE id=?')
+
+    def test_delete_unused_vocab_sql_correct(self):
+        self.assertEqual(InternedSql().delete_unused_vocab_sql(2), 'DELETE FROM vocab WHERE id NOT IN (SELECT word1 FROM word UNION SELECT word2 FROM word)')
+
+    def test_word_queries_unchanged(self):
+        self.assertEqual(InternedSql().select_words_and_counts_sql(3), Sql().select_words_and_counts_sql(3))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
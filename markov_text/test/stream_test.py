@@ -0,0 +1,44 @@
+# coding: utf-8
+import unittest
+import bz2
+import gzip
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+from stream import expand_paths, read_sentences, split_stream
+
+TEXT = u'the cat sat. on the mat.. caf\xe9 au lait. good cat'
+
+class StreamTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, opener = open):
+        path = os.path.join(self.dir, name)
+        f = opener(path, 'wb')
+        f.write(TEXT.encode('utf-8'))
+        f.close()
+        return path
+
+    def test_split_matches_split_of_whole_text_for_any_chunk_size(self):
+        for read_size in (1, 2, 3, 7, 100):
+            self.assertEqual(list(split_stream(StringIO(TEXT), '.', read_size)), TEXT.split('.'))
+
+    def test_split_of_empty_text(self):
+        self.assertEqual(list(split_stream(StringIO(u''), '.')), [u''])
+
+    def test_compressed_files_read_in_order(self):
+        paths = [self.write('a.txt'), self.write('b.txt.gz', gzip.open), self.write('c.txt.bz2', bz2.BZ2File)]
+        self.assertEqual(list(read_sentences(paths, '.', 4)), TEXT.split('.') * 3)
+
+    def test_globs_expanded_in_sorted_order(self):
+        b = self.write('b.txt')
+        a = self.write('a.txt')
+        self.assertEqual(expand_paths([os.path.join(self.dir, '*.txt'), '-']), [a, b, '-'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,36 @@
 import unittest
-from db_test import DbTest
+from cache_test import ModelCacheTest
+from compact_test import CompactTest
+from compiled_test import CompiledDbTest
+from db_test import DbTest, SqliteDbTest
+from frozen_test import FrozenDbTest
 from gen_test import GenTest
+from memdb_test import MemDbTest
+from parallel_test import ParallelTest
 from parse_test import ParserTest
-from sql_test import SqlTest
+from sql_test import SqlTest, InternedSqlTest
+from interned_db_test import InternedDbTest
+from stream_test import StreamTest
+from window_test import WindowModelTest, RemoveWordTest
 
 def suite():
     test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(ModelCacheTest))
+    test_suite.addTest(unittest.makeSuite(CompactTest))
+    test_suite.addTest(unittest.makeSuite(CompiledDbTest))
     test_suite.addTest(unittest.makeSuite(DbTest))
+    test_suite.addTest(unittest.makeSuite(SqliteDbTest))
+    test_suite.addTest(unittest.makeSuite(FrozenDbTest))
     test_suite.addTest(unittest.makeSuite(GenTest))
+    test_suite.addTest(unittest.makeSuite(MemDbTest))
+    test_suite.addTest(unittest.makeSuite(ParallelTest))
     test_suite.addTest(unittest.makeSuite(ParserTest))
     test_suite.addTest(unittest.makeSuite(SqlTest))
+    test_suite.addTest(unittest.makeSuite(InternedSqlTest))
+    test_suite.addTest(unittest.makeSuite(InternedDbTest))
+    test_suite.addTest(unittest.makeSuite(StreamTest))
+    test_suite.addTest(unittest.makeSuite(WindowModelTest))
+    test_suite.addTest(unittest.makeSuite(RemoveWordTest))
     return test_suite
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+import unittest
+import threading
+from window import WindowModel
+from memdb import MemDb
+from gen import Generator
+from rnd import Rnd
+
+class WindowModelTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.model = WindowModel(2, 60, clock = lambda: self.now)
+
+    def test_sentences_added_once(self):
+        self.assertEqual(self.model.update(['the cat', 'the dog', 'the cat']), 2)
+        self.assertEqual(self.model.update(['the dog', 'a cat']), 1)
+        self.assertEqual(len(self.model), 3)
+        self.assertEqual(self.model.db.get_word_count(['the']), {'cat' : 1, 'dog' : 1})
+        self.assertEqual(self.model.db.get_word_count(['^']), {'the' : 2, 'a' : 1})
+
+    def test_expired_sentences_retired(self):
+        self.model.update(['the cat'])
+        self.now += 30
+        self.model.update(['the dog'])
+        self.now += 31
+        self.assertEqual(self.model.update([]), 0)
+
+        self.assertEqual(len(self.model), 1)
+        self.assertEqual(sorted(self.model.db.items()), [(['^', 'the'], 1), (['dog', '$'], 1), (['the', 'dog'], 1)])
+
+    def test_retired_sentence_can_be_added_again(self):
+        self.model.update(['the cat'])
+        self.now += 61
+        self.assertEqual(self.model.update(['the cat']), 1)
+        self.assertEqual(self.model.db.get_word_count(['the']), {'cat' : 1})
+
+    def test_oldest_sentences_retired_beyond_max_sentences(self):
+        model = WindowModel(2, 60, 2, clock = lambda: self.now)
+        model.update(['the cat', 'the dog', 'a frog'])
+        self.assertEqual(len(model), 2)
+        self.assertEqual(model.db.get_word_count(['the']), {'dog' : 1})
+
+    def test_snapshot_reused_until_chain_changes(self):
+        self.model.update(['the cat'])
+        snapshot = self.model.snapshot()
+        self.assertEqual(snapshot.get_word_count(['the']), {'cat' : 1})
+        self.model.update(['the cat'])
+        self.assertIs(self.model.snapshot(), snapshot)
+        self.model.update(['the dog'])
+        self.assertEqual(snapshot.get_word_count(['the']), {'cat' : 1})
+        self.assertEqual(self.model.snapshot().get_word_count(['the']), {'cat' : 1, 'dog' : 1})
+        self.now += 61
+        self.model.update([])
+        self.assertEqual(self.model.snapshot().get_word_count(['the']), {})
+
+    def test_snapshot_shares_unchanged_states(self):
+        self.model.update(['the cat sat', 'a dog ran'])
+        first = self.model.snapshot()
+        self.model.update(['the cat ran'])
+        second = self.model.snapshot()
+        self.assertIs(second.tables[('a', )], first.tables[('a', )])
+        self.assertIs(second.tables[('dog', )], first.tables[('dog', )])
+        self.assertIs(second.tables[('sat', )], first.tables[('sat', )])
+        self.assertEqual(second.get_word_count(['cat']), {'sat' : 1, 'ran' : 1})
+        self.assertEqual(first.get_word_count(['cat']), {'sat' : 1})
+        self.now += 61
+        self.model.update(['the bird'])
+        third = self.model.snapshot()
+        self.assertEqual(sorted(third.items()), sorted(self.model.db.items()))
+        self.assertNotIn(('a', ), third.tables)
+
+    def test_generate_from_snapshot_while_updating(self):
+        model = WindowModel(2, 60, 20, clock = lambda: self.now)
+        model.update(['the cat sat'])
+        errors = []
+        def update():
+            for i in range(300):
+                model.update(['the cat sat %d' % i, 'a dog ran %d' % i])
+        def generate():
+            try:
+                for _ in range(300):
+                    sentence = Generator('name', model.snapshot(), Rnd()).generate(' ')
+                    self.assertTrue(sentence.startswith('the ') or sentence.startswith('a '))
+            except Exception as err:
+                errors.append(err)
+        threads = [threading.Thread(target = update)] + [threading.Thread(target = generate) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(model), 20)
+
+class RemoveWordTest(unittest.TestCase):
+    def test_memdb_counts_decremented_and_dropped(self):
+        db = MemDb()
+        db.setup(2)
+        db.add_word(['i', 'like'], 2)
+        db.add_word(['i', 'run'])
+        db.remove_word(['i', 'like'])
+        db.remove_word(['i', 'run'])
+        db.remove_word(['you', 'run'])
+        self.assertEqual(db.get_word_count(['i']), {'like' : 1})
+        db.remove_word(['i', 'like'])
+        self.assertEqual(db.counts, {})
+
+if __name__ == '__main__':
+    unittest.main()
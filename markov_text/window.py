@@ -0,0 +1,94 @@
+from parse import Parser
+from memdb import MemDb
+from frozen import freeze, refreeze
+from collections import deque
+import threading
+import time
+
+class WindowModel:
+	"""Markov chain over the sentences added in the last window seconds.
+	Arguments:
+		depth					Depth of analysis at which to build the Markov chain
+		window					Number of seconds a sentence stays in the chain after it is first added
+		max_sentences (optional)	Maximum number of sentences to keep; the oldest are retired beyond this
+		db (optional)			Db object to hold the chain, already set up; defaults to a new MemDb
+		clock (optional)		Function giving the current time in seconds (for mocking in unit tests)
+
+	Sentences are identified by their text, so a sentence that is already in the window is not
+	added again. Retiring a sentence subtracts its n-gram counts, so updating the chain costs time
+	in proportion to the sentences added and retired, not to the size of the window.
+
+	db changes with every update, so threads that generate while others update must use snapshot()."""
+
+	def __init__(self, depth, window, max_sentences = None, db = None, clock = time.time):
+		if not db:
+			db = MemDb()
+			db.setup(depth)
+		self.db            = db
+		self.parser        = Parser('window', db)
+		self.window        = window
+		self.max_sentences = max_sentences
+		self.clock         = clock
+		self.lock          = threading.Lock()
+		self.sentences     = deque() # (time added, sentence), oldest first
+		self.seen          = set()
+		self.frozen        = None # snapshot of db as of the last call to snapshot()
+		self.changed       = set() # states of db changed since then
+
+	def __len__(self):
+		return len(self.sentences)
+
+	def snapshot(self):
+		"""Returns a FrozenDb copy of the chain as of the last update, which is safe to generate from
+		while other threads update the window. The copy is reused until an update changes the chain;
+		then only the states the updates changed are frozen again, and the rest are shared with the
+		previous copy."""
+		with self.lock:
+			if self.frozen is None:
+				self.frozen = freeze(self.db)
+			elif self.changed:
+				self.frozen = refreeze(self.frozen, self.db, self.changed)
+			self.changed = set()
+			return self.frozen
+
+	def update(self, sentence_list):
+		"""Retires expired sentences, then adds the sentences that aren't in the window yet.
+		Returns the number of sentences added."""
+		with self.lock:
+			now = self.clock()
+			self._retire(lambda added, count: now - added > self.window)
+
+			new_sentences = []
+			for sentence in sentence_list:
+				if sentence not in self.seen:
+					self.seen.add(sentence)
+					new_sentences.append(sentence)
+					self.sentences.append((now, sentence))
+			if new_sentences:
+				self.parser.parse_list(new_sentences)
+				self._changed(new_sentences)
+
+			if self.max_sentences is not None:
+				self._retire(lambda added, count: count > self.max_sentences)
+			return len(new_sentences)
+
+	def _retire(self, should_retire):
+		"""Retires sentences from the oldest while should_retire(time added, number of sentences) is true."""
+		retired = []
+		while self.sentences and should_retire(self.sentences[0][0], len(self.sentences)):
+			_, sentence = self.sentences.popleft()
+			self.seen.discard(sentence)
+			retired.append(sentence)
+		if retired:
+			self.parser.forget_list(retired)
+			self._changed(retired)
+
+	def _changed(self, sentences):
+		"""Notes the states whose counts were changed by adding or retiring sentences, for snapshot()."""
+		if self.frozen is None:
+			return # the next snapshot freezes the whole chain anyway
+		depth = self.db.get_depth()
+		for sentence in sentences:
+			words = self.parser._words(sentence, depth)
+			for n in range(0, len(words) - depth + 1):
+				self.changed.add(tuple(words[n:n+depth-1]))
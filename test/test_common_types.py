@@ -0,0 +1,71 @@
+# coding: utf-8
+"""
+Unit tests for module L{common_types}
+"""
+import sys
+import os
+# Add the parent directory (one level above test/) to the import search path
+parent_dir = os.path.split(os.path.split(os.path.realpath(__file__))[0])[0]
+sys.path.append(parent_dir)
+
+import pytest
+import common_types
+from common_types import TokenizedText
+import markov_text
+import vaderSentiment.vaderSentiment
+
+SAMPLE_TWEETS = [
+	u"hello, world",
+	u"I can't believe it's not butter!!! :) so GOOD",
+	u"Worst. Traffic. Ever... not happy :(",
+	u"rock-n-roll / jazz fans, the show's at 8:30 tonight",
+	u"caf\xe9 au lait ☕ is the best",
+	u"",
+]
+
+def test_TokenizedText_is_a_string():
+	"""
+	Functions tested:
+		- L{common_types.TokenizedText.__new__}
+	"""
+	text = TokenizedText(u"hello, world")
+	assert text == u"hello, world"
+	assert isinstance(text, unicode)
+	assert text.tokens == [u"hello,", u"world"]
+	assert text.bare_tokens == [u"hello", u"world"]
+	assert text.words == [u"hello", u"world"]
+
+def test_TokenizedText_patterns_are_shared():
+	"""
+	A TokenizedText is split with the same patterns the Markov parser and the sentiment analyzer use,
+	not copies of them.
+
+	Functions tested:
+		- L{common_types.TokenizedText.__new__}
+	"""
+	assert common_types.WORD_REGEX is markov_text.Parser('test', None).word_regex
+	assert common_types.PUNCTUATION_REGEX is vaderSentiment.vaderSentiment.regex_remove_punctuation
+
+def test_TokenizedText_matches_markov_parser():
+	"""
+	The words of a TokenizedText are the ones the Markov parser would have found itself.
+
+	Functions tested:
+		- L{common_types.TokenizedText.__new__}
+	"""
+	parser = markov_text.Parser('test', None)
+	for tweet in SAMPLE_TWEETS:
+		assert parser._words(TokenizedText(tweet), 2) == parser._words(tweet, 2)
+
+def test_TokenizedText_matches_sentiment():
+	"""
+	The sentiment of a TokenizedText is the same as that of the plain string.
+
+	Functions tested:
+		- L{common_types.TokenizedText.__new__}
+	"""
+	for tweet in SAMPLE_TWEETS[:-1]:
+		text = TokenizedText(tweet)
+		assert vaderSentiment.vaderSentiment.sentiment(text) == vaderSentiment.vaderSentiment.sentiment(tweet)
+		# the shared tokens are left as they were
+		assert text.tokens == tweet.split()
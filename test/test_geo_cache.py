@@ -0,0 +1,146 @@
+"""
+Unit tests for module L{geo_cache}
+"""
+import sys
+import os
+# Add the parent directory (one level above test/) to the import search path
+parent_dir = os.path.split(os.path.split(os.path.realpath(__file__))[0])[0]
+sys.path.append(parent_dir)
+
+import pytest
+from geo_cache import GeoCache, cell_key, radius_km, distance_km, contains, outermost
+from common_types import Location
+
+class FakeClock:
+	def __init__(self):
+		self.now = 1000.0
+	def __call__(self):
+		return self.now
+
+def test_cell_key_quantizes_location():
+	"""
+	Locations a few meters apart share a cell; different radii or units do not.
+
+	Functions tested:
+		- L{geo_cache.cell_key}
+	"""
+	assert cell_key(Location(33.6405, -117.8443, 10, False)) == cell_key(Location(33.6407, -117.8441, 10, False))
+	assert cell_key(Location(33.6405, -117.8443, 10, False)) != cell_key(Location(33.7405, -117.8443, 10, False))
+	assert cell_key(Location(33.6405, -117.8443, 10, False)) != cell_key(Location(33.6405, -117.8443, 5, False))
+	assert cell_key(Location(33.6405, -117.8443, 10, False)) != cell_key(Location(33.6405, -117.8443, 10, True))
+
+def test_GeoCache_hit_and_miss():
+	"""
+	GeoCache returns stored values for the same cell and counts hits and misses.
+
+	Functions tested:
+		- L{geo_cache.GeoCache.get}
+		- L{geo_cache.GeoCache.put}
+		- L{geo_cache.GeoCache.stats}
+	"""
+	cache = GeoCache(10, 60)
+	assert cache.get(Location(1.0, 1.0, 10, True)) is None
+	cache.put(Location(1.0, 1.0, 10, True), ['Tweet 1'])
+	assert cache.get(Location(1.001, 0.999, 10, True)) == ['Tweet 1']
+	stats = cache.stats()
+	assert stats['hits'] == 1
+	assert stats['misses'] == 1
+	assert stats['entries'] == 1
+
+def test_GeoCache_ttl():
+	"""
+	GeoCache treats entries older than the TTL as missing.
+
+	Functions tested:
+		- L{geo_cache.GeoCache.get}
+	"""
+	clock = FakeClock()
+	cache = GeoCache(10, 60, clock=clock)
+	cache.put(Location(1.0, 1.0, 10, True), ['Tweet 1'])
+	clock.now += 61
+	assert cache.get(Location(1.0, 1.0, 10, True)) is None
+	assert cache.stats()['expirations'] == 1
+	assert cache.stats()['entries'] == 0
+
+def test_GeoCache_lru_eviction():
+	"""
+	GeoCache evicts the least recently used entry when it holds too many entries.
+
+	Functions tested:
+		- L{geo_cache.GeoCache.put}
+	"""
+	cache = GeoCache(2, 60)
+	cache.put(Location(1.0, 1.0), 'a')
+	cache.put(Location(2.0, 2.0), 'b')
+	cache.get(Location(1.0, 1.0))
+	cache.put(Location(3.0, 3.0), 'c')
+	assert cache.get(Location(1.0, 1.0)) == 'a'
+	assert cache.get(Location(2.0, 2.0)) is None
+	assert cache.get(Location(3.0, 3.0)) == 'c'
+	assert cache.stats()['evictions'] == 1
+
+def test_GeoCache_size_cap():
+	"""
+	GeoCache evicts entries to stay under max_size, and does not store values larger than max_size.
+
+	Functions tested:
+		- L{geo_cache.GeoCache.put}
+	"""
+	cache = GeoCache(10, 60, max_size=5)
+	cache.put(Location(1.0, 1.0), 'abc')
+	cache.put(Location(2.0, 2.0), 'de')
+	cache.put(Location(3.0, 3.0), 'fg')
+	assert cache.get(Location(1.0, 1.0)) is None
+	assert cache.stats()['size'] == 4
+	cache.put(Location(4.0, 4.0), 'abcdef')
+	assert cache.get(Location(4.0, 4.0)) is None
+
+def test_distance_and_containment():
+	"""
+	Areas are compared in kilometers, whichever units their radius is given in.
+
+	Functions tested:
+		- L{geo_cache.radius_km}
+		- L{geo_cache.distance_km}
+		- L{geo_cache.contains}
+	"""
+	assert radius_km(Location(0.0, 0.0, 10, True)) == pytest.approx(16.09344)
+	assert radius_km(Location(0.0, 0.0, 10, False)) == 10
+	# One degree of latitude is about 111km
+	assert distance_km(Location(0.0, 0.0), Location(1.0, 0.0)) == pytest.approx(111.19, abs=0.01)
+	assert contains(Location(0.0, 0.0, 50, False), Location(0.2, 0.0, 10, False))
+	assert not contains(Location(0.0, 0.0, 50, False), Location(0.4, 0.0, 10, False))
+	assert contains(Location(0.0, 0.0, 50, True), Location(0.4, 0.0, 10, False))
+
+def test_outermost_skips_nested_areas():
+	"""
+	Functions tested:
+		- L{geo_cache.outermost}
+	"""
+	cell = (Location(0.0, 0.0, 1, False), 'cell')
+	region = (Location(0.0, 0.0, 10, False), 'region')
+	other_cell = (Location(0.5, 0.0, 1, False), 'other cell')
+	assert [value for _, value in outermost([cell, region, other_cell])] == ['region', 'other cell']
+
+def test_GeoCache_within():
+	"""
+	GeoCache finds the fresh entries whose areas lie within a larger area.
+
+	Functions tested:
+		- L{geo_cache.GeoCache.within}
+	"""
+	clock = FakeClock()
+	cache = GeoCache(10, 60, clock=clock)
+	cache.put(Location(0.0, 0.0, 50, False), 'metro')
+	cache.put(Location(0.1, 0.0, 5, False), 'inside')
+	cache.put(Location(1.0, 0.0, 5, False), 'outside')
+	clock.now += 30
+	cache.put(Location(0.0, 0.1, 5, False), 'also inside')
+	assert sorted(value for _, value in cache.within(Location(0.0, 0.0, 50, False))) == ['also inside', 'inside']
+	clock.now += 31
+	assert [value for _, value in cache.within(Location(0.0, 0.0, 50, False))] == ['also inside']
+	assert cache.stats()['hits'] == 0
+
+if __name__ == '__main__':
+	# Run pytest on this file
+	pytest.main([__file__])
@@ -14,13 +14,21 @@ from flask import json
 import fudge
 from fudge.inspector import arg
 from twython import TwythonAuthError
-from common_types import Location
+from common_types import Location, TokenizedText
+import markov_text
 
 # SETUP
 app.config['TESTING'] = True
 app.debug = True
 client = app.test_client()
 
+def setup_function(function):
+	# Each test fakes its own tweets, so none may be served from a previous test's cache
+	geo_poetry_server.TWEET_CACHE.clear()
+	geo_poetry_server.MARKOV_WINDOWS.clear()
+	geo_poetry_server.MARKOV_MODEL_CACHE.clear()
+	geo_poetry_server.SENTIMENT_CACHE.clear()
+
 def test_ping():
 	"""
 	The ping method returns the JSON {'up': true, 'version': geo_poetry_server.VERSION}.
@@ -225,7 +233,7 @@ def test_get_geo_poetry_song_energy_out_of_range():
 	assert response.status_code == 400
 
 @fudge.patch('geo_twitter.GeoTweets', 'markov_text.MarkovGenerator', 
-	'vaderSentiment.vaderSentiment.sentiment', 'spotipy.oauth2.SpotifyClientCredentials',
+	'geo_poetry_server.SENTIMENT_ANALYZER.sentiment', 'spotipy.oauth2.SpotifyClientCredentials',
 	'spotipy.Spotify')
 def test_get_geo_poetry(MockGeoTweets, MockMarkovGenerator, MockGetSentiment, MockClientCredentials, MockSpotify):
 	"""
@@ -262,9 +270,10 @@ def test_get_geo_poetry(MockGeoTweets, MockMarkovGenerator, MockGetSentiment, Mo
 		.expects('Tweets').with_args(arg.passes_test(check_location_obj), arg.passes_test(check_is_boolean))
 		.returns(fake_tweets_list))
 	(MockMarkovGenerator.expects_call()
-		.with_args(['Tweet 1', 'Tweet 2'], MARKOV_DEPTH, ':memory:')
+		.with_args(None, MARKOV_DEPTH, None, db=arg.any()) # the chain trained as the tweets arrived
 		.returns_fake()
-		.expects('next').times_called(POEM_LINES_TO_GENERATE).returns(fake_poetry_line))
+		.expects('generate_many').with_args(POEM_LINES_TO_GENERATE,
+			max_words=MARKOV_MAX_WORDS, max_attempts=MARKOV_MAX_ATTEMPTS, time_limit=MARKOV_TIME_LIMIT).returns([fake_poetry_line] * POEM_LINES_TO_GENERATE))
 	(MockGetSentiment.expects_call()
 		.with_args('Tweet 1')
 		.returns({'compound': SENTIMENT_MIN_MAGNITUDE + 0.01})
@@ -301,6 +310,8 @@ def test_get_geo_poetry(MockGeoTweets, MockMarkovGenerator, MockGetSentiment, Mo
 	assert response_json[RESPONSE_KEY_AVG_SENTIMENT] == 0.0
 	assert response_json[RESPONSE_KEY_TRACK] == fake_spotify_uri
 	assert response_json[RESPONSE_KEY_GENRE] == fake_genre
+	# The tweets were added to a Markov chain as they arrived, ready for the generator
+	assert MARKOV_MODEL_CACHE.get(MARKOV_MODEL_CACHE.fingerprint(['Tweet 1', 'Tweet 2'], MARKOV_DEPTH)) is not None
 
 	# Set MIN_TWEETS_TO_READ back to normal
 	geo_poetry_server.MIN_TWEETS_TO_READ = prev_min_tweets
@@ -350,7 +361,7 @@ def test_get_geo_poetry_rate_limit(MockGeoTweets, MockMarkovGenerator):
 	geo_poetry_server.MIN_TWEETS_TO_READ = prev_min_tweets
 
 @fudge.patch('geo_twitter.GeoTweets', 'markov_text.MarkovGenerator', 
-	'vaderSentiment.vaderSentiment.sentiment', 'spotipy.oauth2.SpotifyClientCredentials',
+	'geo_poetry_server.SENTIMENT_ANALYZER.sentiment', 'spotipy.oauth2.SpotifyClientCredentials',
 	'spotipy.Spotify')
 def test_get_geo_poetry_tweet_limiting(MockGeoTweets, MockMarkovGenerator, MockGetSentiment, MockClientCredentials, MockSpotify):
 	"""
@@ -387,9 +398,10 @@ def test_get_geo_poetry_tweet_limiting(MockGeoTweets, MockMarkovGenerator, MockG
 		.expects('Tweets').with_args(arg.passes_test(check_location_obj), arg.passes_test(check_is_boolean))
 		.returns(fake_tweets_list))
 	(MockMarkovGenerator.expects_call()
-		.with_args(['Tweet 1'], MARKOV_DEPTH, ':memory:')
+		.with_args(None, MARKOV_DEPTH, None, db=arg.any()) # the chain trained as the tweets arrived
 		.returns_fake()
-		.expects('next').times_called(POEM_LINES_TO_GENERATE).returns(fake_poetry_line))
+		.expects('generate_many').with_args(POEM_LINES_TO_GENERATE,
+			max_words=MARKOV_MAX_WORDS, max_attempts=MARKOV_MAX_ATTEMPTS, time_limit=MARKOV_TIME_LIMIT).returns([fake_poetry_line] * POEM_LINES_TO_GENERATE))
 	(MockGetSentiment.expects_call()
 		.with_args('Tweet 1')
 		.returns({'compound': SENTIMENT_MIN_MAGNITUDE + 0.01}))
@@ -428,7 +440,7 @@ def test_get_geo_poetry_tweet_limiting(MockGeoTweets, MockMarkovGenerator, MockG
 	geo_poetry_server.MAX_TWEETS_TO_READ = prev_max_tweets
 
 @fudge.patch('geo_twitter.GeoTweets', 'markov_text.MarkovGenerator', 
-	'vaderSentiment.vaderSentiment.sentiment', 'spotipy.oauth2.SpotifyClientCredentials',
+	'geo_poetry_server.SENTIMENT_ANALYZER.sentiment', 'spotipy.oauth2.SpotifyClientCredentials',
 	'spotipy.Spotify')
 def test_get_geo_poetry_min_sentiment_magnitude(MockGeoTweets, MockMarkovGenerator, MockGetSentiment, MockClientCredentials, MockSpotify):
 	"""
@@ -463,9 +475,10 @@ def test_get_geo_poetry_min_sentiment_magnitude(MockGeoTweets, MockMarkovGenerat
 		.expects('Tweets').with_args(arg.passes_test(check_location_obj), arg.passes_test(check_is_boolean))
 		.returns(fake_tweets_list))
 	(MockMarkovGenerator.expects_call()
-		.with_args(['Tweet 1', 'Tweet 2'], MARKOV_DEPTH, ':memory:')
+		.with_args(None, MARKOV_DEPTH, None, db=arg.any()) # the chain trained as the tweets arrived
 		.returns_fake()
-		.expects('next').times_called(POEM_LINES_TO_GENERATE).returns(fake_poetry_line))
+		.expects('generate_many').with_args(POEM_LINES_TO_GENERATE,
+			max_words=MARKOV_MAX_WORDS, max_attempts=MARKOV_MAX_ATTEMPTS, time_limit=MARKOV_TIME_LIMIT).returns([fake_poetry_line] * POEM_LINES_TO_GENERATE))
 	(MockGetSentiment.expects_call()
 		.with_args('Tweet 1')
 		.returns({'compound': SENTIMENT_MIN_MAGNITUDE + 0.01})
@@ -505,7 +518,7 @@ def test_get_geo_poetry_min_sentiment_magnitude(MockGeoTweets, MockMarkovGenerat
 	geo_poetry_server.MIN_TWEETS_TO_READ = prev_min_tweets
 
 @fudge.patch('geo_twitter.GeoTweets', 'markov_text.MarkovGenerator', 
-	'vaderSentiment.vaderSentiment.sentiment', 'spotipy.oauth2.SpotifyClientCredentials',
+	'geo_poetry_server.SENTIMENT_ANALYZER.sentiment', 'spotipy.oauth2.SpotifyClientCredentials',
 	'spotipy.Spotify')
 def test_get_geo_poetry_unknown_genre(MockGeoTweets, MockMarkovGenerator, MockGetSentiment, MockClientCredentials, MockSpotify):
 	"""
@@ -541,9 +554,10 @@ def test_get_geo_poetry_unknown_genre(MockGeoTweets, MockMarkovGenerator, MockGe
 		.expects('Tweets').with_args(arg.passes_test(check_location_obj), arg.passes_test(check_is_boolean))
 		.returns(fake_tweets_list))
 	(MockMarkovGenerator.expects_call()
-		.with_args(['Tweet 1', 'Tweet 2'], MARKOV_DEPTH, ':memory:')
+		.with_args(None, MARKOV_DEPTH, None, db=arg.any()) # the chain trained as the tweets arrived
 		.returns_fake()
-		.expects('next').times_called(POEM_LINES_TO_GENERATE).returns(fake_poetry_line))
+		.expects('generate_many').with_args(POEM_LINES_TO_GENERATE,
+			max_words=MARKOV_MAX_WORDS, max_attempts=MARKOV_MAX_ATTEMPTS, time_limit=MARKOV_TIME_LIMIT).returns([fake_poetry_line] * POEM_LINES_TO_GENERATE))
 	(MockGetSentiment.expects_call()
 		.with_args('Tweet 1')
 		.returns({'compound': SENTIMENT_MIN_MAGNITUDE + 0.01})
@@ -573,6 +587,277 @@ def test_get_geo_poetry_unknown_genre(MockGeoTweets, MockMarkovGenerator, MockGe
 	# Set MIN_TWEETS_TO_READ back to normal
 	geo_poetry_server.MIN_TWEETS_TO_READ = prev_min_tweets
 
+@fudge.patch('geo_twitter.GeoTweets', 'markov_text.MarkovGenerator', 
+	'geo_poetry_server.SENTIMENT_ANALYZER.sentiment', 'spotipy.oauth2.SpotifyClientCredentials',
+	'spotipy.Spotify')
+def test_get_geo_poetry_tweet_cache_hit(MockGeoTweets, MockMarkovGenerator, MockGetSentiment, MockClientCredentials, MockSpotify):
+	"""
+	The get_geo_poetry method uses cached tweets for a nearby location instead of querying Twitter.
+
+	Functions tested:
+		- L{geo_poetry_server.get_geo_poetry}
+	"""
+	fake_poetry_line = 'A Line Of CG Poetry.'
+	fake_spotify_uri = 'spotify:track:example'
+	geo_poetry_server.TWEET_CACHE.put(Location(0.0, 0.0, 10, True), ['Tweet 1', 'Tweet 2'])
+	# MockGeoTweets has no expectations, so any call to it fails the test
+	(MockMarkovGenerator.expects_call()
+		.with_args(['Tweet 1', 'Tweet 2'], MARKOV_DEPTH, ':memory:', cache=MARKOV_MODEL_CACHE, backend=MARKOV_BACKEND)
+		.returns_fake()
+		.expects('generate_many').with_args(POEM_LINES_TO_GENERATE,
+			max_words=MARKOV_MAX_WORDS, max_attempts=MARKOV_MAX_ATTEMPTS, time_limit=MARKOV_TIME_LIMIT).returns([fake_poetry_line] * POEM_LINES_TO_GENERATE))
+	(MockGetSentiment.expects_call()
+		.with_args('Tweet 1')
+		.returns({'compound': SENTIMENT_MIN_MAGNITUDE + 0.01})
+		.next_call().with_args('Tweet 2')
+		.returns({'compound': -(SENTIMENT_MIN_MAGNITUDE + 0.01)}))
+	(MockClientCredentials.expects_call()
+		.with_args(client_id=SPOTIFY_CLIENT_ID, client_secret=SPOTIFY_CLIENT_SECRET)
+		.returns('Constant'))
+	(MockSpotify.expects_call()
+		.with_args(client_credentials_manager='Constant')
+		.returns_fake()
+		.expects('recommendations').with_args(
+			seed_genres = [SPOTIFY_DEFAULT_GENRE],
+			limit=1, target_instrumentalness=1.0,
+			target_energy=SPOTIFY_DEFAULT_ENERGY, target_valence = ((0.0)+1.0)/2.0)
+		.returns({
+				'tracks' : [ {
+					'uri': fake_spotify_uri
+				}]
+			}))
+
+	response = client.post("/geo-poetry", data=json.dumps({
+			'latitude' : 0.001,
+			'longitude' : -0.001,
+			'radius' : 10,
+			'imperial_units' : True}),
+		content_type='application/json')
+	response_json = json.loads(response.get_data())
+	assert response.status_code == 200
+	assert response_json[RESPONSE_KEY_TWEETS_READ_COUNT] == 2
+	assert response_json[RESPONSE_KEY_TRACK] == fake_spotify_uri
+
+@fudge.patch('markov_text.MarkovGenerator', 
+	'geo_poetry_server.SENTIMENT_ANALYZER.sentiment', 'spotipy.oauth2.SpotifyClientCredentials',
+	'spotipy.Spotify')
+def test_get_geo_poetry_markov_window(MockMarkovGenerator, MockGetSentiment, MockClientCredentials, MockSpotify):
+	"""
+	With MARKOV_WINDOW_SECONDS set, get_geo_poetry generates from the cell's window model,
+	adding only the tweets that aren't in it yet.
+
+	Functions tested:
+		- L{geo_poetry_server.get_geo_poetry}
+	"""
+	prev_window_seconds = geo_poetry_server.MARKOV_WINDOW_SECONDS
+	geo_poetry_server.MARKOV_WINDOW_SECONDS = 3600
+	geo_poetry_server.MARKOV_WINDOWS.ttl = 3600
+	location = Location(0.0, 0.0, 10, True)
+	window = markov_text.WindowModel(MARKOV_DEPTH, 3600)
+	window.update(['Tweet 1'])
+	geo_poetry_server.MARKOV_WINDOWS.put(location, window)
+	geo_poetry_server.TWEET_CACHE.put(location, ['Tweet 1', 'Tweet 2'])
+	fake_poetry_line = 'A Line Of CG Poetry.'
+	(MockMarkovGenerator.expects_call()
+		.with_args(None, MARKOV_DEPTH, None, db=arg.passes_test(lambda db: db is window.snapshot()))
+		.returns_fake()
+		.expects('generate_many').with_args(POEM_LINES_TO_GENERATE,
+			max_words=MARKOV_MAX_WORDS, max_attempts=MARKOV_MAX_ATTEMPTS, time_limit=MARKOV_TIME_LIMIT).returns([fake_poetry_line] * POEM_LINES_TO_GENERATE))
+	(MockGetSentiment.expects_call()
+		.returns({'compound': 0.0}))
+	(MockClientCredentials.expects_call()
+		.returns('Constant'))
+	(MockSpotify.expects_call()
+		.returns_fake()
+		.expects('recommendations')
+		.returns({
+				'tracks' : [ {
+					'uri': 'spotify:track:example'
+				}]
+			}))
+
+	try:
+		response = client.post("/geo-poetry", data=json.dumps({
+				'latitude' : 0.0,
+				'longitude' : 0.0,
+				'radius' : 10,
+				'imperial_units' : True}),
+			content_type='application/json')
+	finally:
+		geo_poetry_server.MARKOV_WINDOW_SECONDS = prev_window_seconds
+		geo_poetry_server.MARKOV_WINDOWS.ttl = prev_window_seconds or 0
+	assert response.status_code == 200
+	assert len(window) == 2
+	assert window.db.get_word_count(['^']) == {'Tweet': 2}
+	assert window.snapshot().get_word_count(['^']) == {'Tweet': 2}
+
+def test_get_cache_stats():
+	"""
+	The get_cache_stats method reports the counters of the tweet cache, Markov model cache and Markov windows.
+
+	Functions tested:
+		- L{geo_poetry_server.get_cache_stats}
+	"""
+	response = client.get("/cache-stats")
+	response_json = json.loads(response.get_data())
+	assert response.status_code == 200
+	assert response_json['tweets'] == geo_poetry_server.TWEET_CACHE.stats()
+	assert response_json['markov'] == geo_poetry_server.MARKOV_MODEL_CACHE.stats()
+	assert response_json['windows'] == geo_poetry_server.MARKOV_WINDOWS.stats()
+	assert response_json['sentiment'] == geo_poetry_server.SENTIMENT_CACHE.stats()
+
+
+@fudge.patch('markov_text.MarkovGenerator', 
+	'geo_poetry_server.SENTIMENT_ANALYZER.sentiment', 'spotipy.oauth2.SpotifyClientCredentials',
+	'spotipy.Spotify')
+def test_get_geo_poetry_generation_budget_exceeded(MockMarkovGenerator, MockGetSentiment, MockClientCredentials, MockSpotify):
+	"""
+	When the Markov generator runs out of its budget, get_geo_poetry responds right away
+	with the lines of poetry generated so far, rather than with any of the tweets.
+
+	Functions tested:
+		- L{geo_poetry_server.get_geo_poetry}
+	"""
+	geo_poetry_server.TWEET_CACHE.put(Location(0.0, 0.0, 10, True), ['Tweet 1', 'Tweet 2'])
+	(MockMarkovGenerator.expects_call()
+		.returns_fake()
+		.expects('generate_many')
+		.raises(markov_text.GenerationBudgetExceeded('Ran out of time', ['A Line Of CG Poetry.'])))
+	(MockGetSentiment.expects_call()
+		.returns({'compound': 0.0}))
+	(MockClientCredentials.expects_call()
+		.returns('Constant'))
+	(MockSpotify.expects_call()
+		.returns_fake()
+		.expects('recommendations')
+		.returns({
+				'tracks' : [ {
+					'uri': 'spotify:track:example'
+				}]
+			}))
+
+	response = client.post("/geo-poetry", data=json.dumps({
+			'latitude' : 0.0,
+			'longitude' : 0.0,
+			'radius' : 10,
+			'imperial_units' : True}),
+		content_type='application/json')
+	response_json = json.loads(response.get_data())
+	assert response.status_code == 200
+	assert response_json[RESPONSE_KEY_POETRY] == 'A Line Of CG Poetry.'
+
+@fudge.patch('geo_twitter.GeoTweets', 'geo_poetry_server.SENTIMENT_ANALYZER.sentiment',
+	'spotipy.oauth2.SpotifyClientCredentials', 'spotipy.Spotify')
+def test_get_geo_poetry_merges_cached_areas(MockGeoTweets, MockGetSentiment, MockClientCredentials, MockSpotify):
+	"""
+	A request for a large area is served from the cached tweets and Markov chains of the smaller areas inside it,
+	leaving out those that share tweets with an area already taken.
+
+	Functions tested:
+		- L{geo_poetry_server.get_geo_poetry}
+		- L{geo_poetry_server.merge_cached_areas}
+	"""
+	prev_min_tweets = geo_poetry_server.MIN_TWEETS_TO_READ
+	geo_poetry_server.MIN_TWEETS_TO_READ = 3
+	for location, tweets_list in ((Location(0.0, 0.0, 5, False), ['the cat sat', 'a cat ran']),
+			(Location(0.2, 0.0, 5, False), ['the dog sat', 'a cat ran']),
+			(Location(0.0, 0.2, 5, False), ['the dog sat', 'the bird flew'])):
+		geo_poetry_server.TWEET_CACHE.put(location, tweets_list)
+		# the area's chain as its own request would have trained it
+		markov_text.MarkovGenerator(tweets_list, MARKOV_DEPTH, ':memory:', cache=MARKOV_MODEL_CACHE, backend=MARKOV_BACKEND)
+	prev_stats = MARKOV_MODEL_CACHE.stats()
+	# MockGeoTweets has no expectations, so any call to it fails the test
+	(MockGetSentiment.expects_call()
+		.returns({'compound': 0.0}))
+	(MockClientCredentials.expects_call()
+		.returns('Constant'))
+	(MockSpotify.expects_call()
+		.returns_fake()
+		.expects('recommendations')
+		.returns({
+				'tracks' : [ {
+					'uri': 'spotify:track:example'
+				}]
+			}))
+
+	try:
+		response = client.post("/geo-poetry", data=json.dumps({
+				'latitude' : 0.1,
+				'longitude' : 0.0,
+				'radius' : 50,
+				'imperial_units' : False}),
+			content_type='application/json')
+	finally:
+		geo_poetry_server.MIN_TWEETS_TO_READ = prev_min_tweets
+	response_json = json.loads(response.get_data())
+	assert response.status_code == 200
+	assert response_json[RESPONSE_KEY_TWEETS_READ_COUNT] == 4
+	stats = MARKOV_MODEL_CACHE.stats()
+	assert stats['builds'] - prev_stats['builds'] == 1 # only the merge, nothing retrained
+	# the chains of the two merged areas are looked up, but the merged chain is generated from without a lookup
+	assert stats['hits'] - prev_stats['hits'] == 2
+	merged_tweets = geo_poetry_server.TWEET_CACHE.get(Location(0.1, 0.0, 50, False))
+	assert sorted(merged_tweets) == ['a cat ran', 'the bird flew', 'the cat sat', 'the dog sat']
+	model = MARKOV_MODEL_CACHE.get(MARKOV_MODEL_CACHE.fingerprint(merged_tweets, MARKOV_DEPTH))
+	assert model.get_word_count(['a']) == {'cat': 1}
+	assert model.get_word_count(['the']) == {'cat': 1, 'dog': 1, 'bird': 1}
+
+@fudge.patch('geo_twitter.GeoTweets', 'geo_poetry_server.SENTIMENT_ANALYZER.sentiment',
+	'spotipy.oauth2.SpotifyClientCredentials', 'spotipy.Spotify')
+def test_get_geo_poetry_cold_request_no_cache_hit(MockGeoTweets, MockGetSentiment, MockClientCredentials, MockSpotify):
+	"""
+	A request whose tweets have just been fetched generates from the chain trained as they arrived,
+	without counting a hit on the Markov model cache, which it fills for later requests.
+
+	Functions tested:
+		- L{geo_poetry_server.get_geo_poetry}
+	"""
+	prev_min_tweets = geo_poetry_server.MIN_TWEETS_TO_READ
+	geo_poetry_server.MIN_TWEETS_TO_READ = 0
+	prev_stats = MARKOV_MODEL_CACHE.stats()
+	(MockGeoTweets.expects_call()
+		.returns_fake()
+		.expects('Tweets')
+		.returns(iter(['the cat sat', 'the dog ran'])))
+	(MockGetSentiment.expects_call()
+		.returns({'compound': 0.0}))
+	(MockClientCredentials.expects_call()
+		.returns('Constant'))
+	(MockSpotify.expects_call()
+		.returns_fake()
+		.expects('recommendations')
+		.returns({
+				'tracks' : [ {
+					'uri': 'spotify:track:example'
+				}]
+			}))
+
+	try:
+		response = client.post("/geo-poetry", data=json.dumps({
+				'latitude' : 0.0,
+				'longitude' : 0.0,
+				'radius' : 10,
+				'imperial_units' : False}),
+			content_type='application/json')
+	finally:
+		geo_poetry_server.MIN_TWEETS_TO_READ = prev_min_tweets
+	assert response.status_code == 200
+	stats = MARKOV_MODEL_CACHE.stats()
+	assert stats['hits'] - prev_stats['hits'] == 0
+	assert stats['builds'] - prev_stats['builds'] == 1
+	assert MARKOV_MODEL_CACHE.get(MARKOV_MODEL_CACHE.fingerprint(['the cat sat', 'the dog ran'], MARKOV_DEPTH)) is not None
+
+def test_tweets_size():
+	"""
+	The size of a list of tweets counts the tokens a TokenizedText carries along with its text.
+
+	Functions tested:
+		- L{geo_poetry_server.tweets_size}
+	"""
+	assert tweets_size([u'the cat, sat', u'a dog']) == 17
+	# tokens 'the', 'cat,', 'sat'; bare tokens and words 'the', 'cat', 'sat'
+	assert tweets_size([TokenizedText(u'the cat, sat')]) == 12 + 10 + 9 + 9
+
 
 if __name__ == '__main__':
 	# Run pytest on this file
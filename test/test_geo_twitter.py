@@ -3,13 +3,15 @@ Unit tests for module L{geo_twitter}
 """
 import sys
 import os
+import time
+import itertools
 # Add the parent directory (one level above test/) to the import search path
 parent_dir = os.path.split(os.path.split(os.path.realpath(__file__))[0])[0]
 sys.path.append(parent_dir)
 
 import fudge
 from fudge.inspector import arg
-from geo_twitter import GeoTweets, MIN_NUM_FOLLOWERS, MAX_NUM_FOLLOWERS
+from geo_twitter import GeoTweets, prefetch, MIN_NUM_FOLLOWERS, MAX_NUM_FOLLOWERS
 from twython import TwythonAuthError
 from common_types import Location
 import pytest
@@ -157,6 +159,7 @@ def test_GeoTweets_CleanTweets(MockTwython):
 	cleaned = [x for x in geo_tweets.CleanTweets([dirty_tweet, url_tweet])]
 	assert len(cleaned) == 1
 	assert cleaned[0] == clean_tweet
+	assert cleaned[0].words == ['hello', 'world']
 
 @fudge.patch('twython.Twython')
 def test_GeoTweets_FilterTweets(MockTwython):
@@ -220,6 +223,52 @@ def test_GeoTweets_ExtractText(MockTwython):
 	tweets = [{ 'text' : 'Text1' }, { 'text' : 'Text2' }]
 	assert [s for s in geo_tweets.ExtractText(tweets)] == ['Text1', 'Text2']
 
+def test_prefetch():
+	"""
+	prefetch yields the items of a generator in order, and re-raises its exceptions.
+
+	Functions tested:
+		- L{geo_twitter.prefetch}
+	"""
+	assert list(prefetch(iter(range(100)))) == range(100)
+	def failing():
+		yield 'Tweet 1'
+		raise TwythonAuthError("Example message.")
+	stream = prefetch(failing())
+	assert stream.next() == 'Tweet 1'
+	with pytest.raises(TwythonAuthError):
+		stream.next()
+	def interrupted():
+		yield 'Tweet 1'
+		raise KeyboardInterrupt()
+	stream = prefetch(interrupted())
+	assert stream.next() == 'Tweet 1'
+	with pytest.raises(KeyboardInterrupt):
+		stream.next()
+
+def test_prefetch_bounded():
+	"""
+	prefetch holds at most max_items items ahead of the caller, and its background thread
+	stops when the caller stops early.
+
+	Functions tested:
+		- L{geo_twitter.prefetch}
+	"""
+	produced = []
+	def counting():
+		for i in itertools.count():
+			produced.append(i)
+			yield i
+	stream = prefetch(counting(), 5)
+	assert stream.next() == 0
+	time.sleep(0.1)
+	assert len(produced) <= 7 # five queued, one waiting to be queued, one taken
+	stream.close()
+	time.sleep(0.1)
+	count = len(produced)
+	time.sleep(0.1)
+	assert len(produced) == count
+
 
 if __name__ == '__main__':
 	pytest.main([__file__])
\ No newline at end of file
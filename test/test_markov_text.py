@@ -0,0 +1,109 @@
+"""
+Unit tests for the L{markov_text.MarkovGenerator} interface used by the server
+"""
+import sys
+import os
+# Add the parent directory (one level above test/) to the import search path
+parent_dir = os.path.split(os.path.split(os.path.realpath(__file__))[0])[0]
+sys.path.append(parent_dir)
+
+import pytest
+import markov_text
+
+SENTENCES = ['the cat sat on the mat', 'the dog sat on the cat', 'a cat ran', 'the mat ran off']
+
+def memory_generator(sentences, seed):
+	return markov_text.MarkovGenerator(sentences, 2, None, backend=markov_text.MEMORY_BACKEND, seed=seed)
+
+def test_same_seed_generates_same_sentences():
+	"""
+	Functions tested:
+		- L{markov_text.MarkovGenerator.generate_many}
+	"""
+	first = memory_generator(SENTENCES, 7).generate_many(20)
+	assert len(first) == 20
+	assert memory_generator(SENTENCES, 7).generate_many(20) == first
+
+def test_generate_many_matches_next():
+	"""
+	Functions tested:
+		- L{markov_text.MarkovGenerator.generate_many}
+		- L{markov_text.MarkovGenerator.next}
+	"""
+	generator = memory_generator(SENTENCES, 3)
+	sentences = [generator.next() for _ in range(5)]
+	assert memory_generator(SENTENCES, 3).generate_many(5) == sentences
+
+def test_generate_many_skips_empty_sentences():
+	"""
+	Functions tested:
+		- L{markov_text.MarkovGenerator.generate_many}
+	"""
+	sentences = memory_generator(SENTENCES + [''] * 20, 1).generate_many(50)
+	assert all(sentences)
+
+def test_seeded_rnd_repeats():
+	"""
+	Functions tested:
+		- L{markov_text.Rnd.randint}
+	"""
+	r1 = markov_text.Rnd(5)
+	r2 = markov_text.Rnd(5)
+	sequence = [r1.randint(100) for _ in range(10)]
+	assert sequence == [r2.randint(100) for _ in range(10)]
+	r3 = markov_text.Rnd(6)
+	assert sequence != [r3.randint(100) for _ in range(10)]
+	rnd = markov_text.Rnd(5)
+	assert all(1 <= rnd.randint(3) <= 3 for _ in range(50))
+
+class FakeClock:
+	def __init__(self, step):
+		self.now = 0.0
+		self.step = step
+	def __call__(self):
+		self.now += self.step
+		return self.now
+
+def test_max_words_cuts_sentences_off():
+	"""
+	Functions tested:
+		- L{markov_text.MarkovGenerator.generate_many}
+	"""
+	sentences = memory_generator(['a a a a a a a a b'] * 3, 1).generate_many(10, max_words=3)
+	assert all(len(sentence.split()) <= 3 for sentence in sentences)
+	assert 'a a a' in sentences
+
+def test_max_attempts_raises_on_empty_sentences():
+	"""
+	Functions tested:
+		- L{markov_text.MarkovGenerator.generate_many}
+	"""
+	generator = markov_text.MarkovGenerator([''], 2, None, backend=markov_text.MEMORY_BACKEND, max_attempts=5)
+	with pytest.raises(markov_text.GenerationBudgetExceeded) as err:
+		generator.next()
+	assert err.value.sentences == []
+
+def test_time_limit_returns_sentences_generated_in_time():
+	"""
+	Functions tested:
+		- L{markov_text.MarkovGenerator.generate_many}
+	"""
+	# The clock moves on a second every time it is read
+	generator = markov_text.MarkovGenerator(SENTENCES, 2, None, backend=markov_text.MEMORY_BACKEND, seed=1,
+		time_limit=2.5, clock=FakeClock(1.0))
+	with pytest.raises(markov_text.GenerationBudgetExceeded) as err:
+		generator.generate_many(10)
+	assert len(err.value.sentences) == 2
+	assert generator.generate_many(2, time_limit=10) # budgets given per call replace the defaults
+
+def test_cached_models_are_frozen_and_shared():
+	"""
+	Functions tested:
+		- L{markov_text.MarkovGenerator.__init__}
+	"""
+	cache = markov_text.ModelCache(4)
+	first = markov_text.MarkovGenerator(SENTENCES, 2, ':memory:', cache=cache)
+	second = markov_text.MarkovGenerator(SENTENCES, 2, ':memory:', cache=cache)
+	assert isinstance(first.generator.db, markov_text.FrozenDb)
+	assert second.generator.db is first.generator.db
+	assert cache.stats()['hits'] == 1
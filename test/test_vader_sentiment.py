@@ -0,0 +1,397 @@
+# coding: utf-8
+"""
+Unit tests for module L{vaderSentiment.vaderSentiment}
+"""
+import sys
+import os
+# Add the parent directory (one level above test/) to the import search path
+parent_dir = os.path.split(os.path.split(os.path.realpath(__file__))[0])[0]
+sys.path.append(parent_dir)
+
+import pytest
+import io
+import json
+import tempfile
+import shutil
+import pickle
+import vaderSentiment.vaderSentiment
+from vaderSentiment.vaderSentiment import SentimentAnalyzer, sentiment, negated, NEGATE, \
+	remove_short_words, strip_punctuation, first_indexes, contrast_around, compound_mean, sentiment_batch, \
+	ScoreCache, compile_lexicon, CompiledLexicon, load_lexicon, make_lex_dict, LEXICON_PATH, \
+	round_like_python, compound_mean_vectorized, CompoundMean
+from common_types import TokenizedText
+
+# Tweet-like texts and the scores the original implementation gave them; see vaderSentiment/benchmark.py
+GOLDEN_CORPUS_PATH = os.path.join(parent_dir, 'vaderSentiment', 'golden_corpus.json')
+
+# Scores given by the original, function-based implementation
+EXPECTED_SCORES = [
+	(u"VADER is VERY SMART, handsome, and FUNNY!!!", {'neg': 0.0, 'neu': 0.233, 'pos': 0.767, 'compound': 0.9342}),
+	(u"The book was kind of good.", {'neg': 0.0, 'neu': 0.657, 'pos': 0.343, 'compound': 0.3832}),
+	(u"At least it isn't a horrible book.", {'neg': 0.0, 'neu': 0.637, 'pos': 0.363, 'compound': 0.431}),
+	(u"Today kinda sux! But I'll get by, lol", {'neg': 0.195, 'neu': 0.531, 'pos': 0.274, 'compound': 0.2228}),
+	(u"Sentiment analysis with VADER has never been this good.", {'neg': 0.0, 'neu': 0.703, 'pos': 0.297, 'compound': 0.5228}),
+	(u"VADER sentiment analysis is the shit.", {'neg': 0.0, 'neu': 0.556, 'pos': 0.444, 'compound': 0.6124}),
+	(u"", {'neg': 0.0, 'neu': 0.0, 'pos': 0.0, 'compound': 0.0}),
+]
+
+def test_SentimentAnalyzer_scores():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.SentimentAnalyzer.sentiment}
+		- L{vaderSentiment.vaderSentiment.sentiment}
+	"""
+	analyzer = SentimentAnalyzer()
+	for text, expected in EXPECTED_SCORES:
+		assert analyzer.sentiment(text) == expected
+		assert sentiment(text) == expected
+		assert analyzer.sentiment(TokenizedText(text)) == expected
+
+def test_SentimentAnalyzer_repeated_calls():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.SentimentAnalyzer.sentiment}
+		- L{vaderSentiment.vaderSentiment.negated}
+	"""
+	analyzer = SentimentAnalyzer()
+	text, expected = EXPECTED_SCORES[2]
+	for _ in range(100):
+		assert analyzer.sentiment(text) == expected
+	assert isinstance(NEGATE, frozenset)
+	assert negated(["never"])
+	assert negated(["couldn't"])
+	assert not negated(["always"])
+
+def test_SentimentAnalyzer_lexicon():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.SentimentAnalyzer.__init__}
+	"""
+	analyzer = SentimentAnalyzer({'zorp': 2.0, 'blat': -2.0})
+	assert analyzer.sentiment(u"zorp")['compound'] > 0
+	assert analyzer.sentiment(u"blat")['compound'] < 0
+	assert analyzer.sentiment(u"good")['compound'] == 0.0
+
+def test_remove_short_words():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.remove_short_words}
+	"""
+	assert remove_short_words([]) == []
+	assert remove_short_words(['good', 'day']) == ['good', 'day']
+	# the word after a removed one is skipped
+	assert remove_short_words(['a', 'b', 'good', 'I', 'c']) == ['b', 'good', 'c']
+	# the first equal word is removed, not the current one
+	assert remove_short_words(['a', 'b', 'long', 'b', 'c']) == ['long', 'b', 'c']
+
+def test_strip_punctuation():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.strip_punctuation}
+	"""
+	assert strip_punctuation(['good!', '"bad"', '?!?sad', 'happy,', ':)', "isn't"], ['good', 'bad', 'sad', 'isnt']) == \
+		['good', '"bad"', 'sad', 'happy,', ':)', "isn't"]
+	assert strip_punctuation(['good!'], []) == ['good!']
+
+def test_first_indexes():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.first_indexes}
+	"""
+	assert first_indexes(['so', 'good', 'so', 'good', 'day']) == {'so': 0, 'good': 1, 'day': 4}
+
+def test_contrast_around():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.contrast_around}
+	"""
+	assert contrast_around([1.0, 2.0, 0, -2.0, 3.0], 2) == [0.5, 1.0, 0, -3.0, 4.5]
+	# 0.5 matches the already halved score before it, which is halved again
+	assert contrast_around([1.0, 0.5, 0, 2.0], 2) == [0.25, 0.5, 0, 3.0]
+
+def test_SentimentAnalyzer_long_text():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.SentimentAnalyzer.sentiment}
+	"""
+	text = u" ".join([u"so good, but not BAD!"] * 2000)
+	scores = SentimentAnalyzer().sentiment(text)
+	assert scores == sentiment(TokenizedText(text))
+	assert 0 < scores['pos'] < 1
+
+def test_compound_mean():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.compound_mean}
+	"""
+	assert compound_mean([]) == 0.0
+	assert compound_mean([{'compound': 0.1}, {'compound': -0.2}]) == 0.0
+	assert compound_mean([{'compound': 0.5}, {'compound': 0.1}, {'compound': -0.3}]) == pytest.approx(0.1)
+	assert compound_mean([{'compound': 0.5}, {'compound': 0.1}], min_magnitude=0.0) == pytest.approx(0.3)
+
+def test_CompoundMean():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.CompoundMean.add}
+		- L{vaderSentiment.vaderSentiment.CompoundMean.mean}
+	"""
+	scores = [{'compound': 0.5}, {'compound': 0.1}, {'compound': -0.3}, {'compound': 0.45}]
+	mean = CompoundMean(0.2)
+	assert mean.mean() == 0.0
+	for s in scores:
+		mean.add(s)
+	assert mean.mean() == compound_mean(scores, 0.2)
+	mean = CompoundMean(0.0)
+	mean.add({'compound': 0.1})
+	assert mean.mean() == 0.1
+
+def test_sentiment_batch():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.sentiment_batch}
+	"""
+	texts = [text for text, _ in EXPECTED_SCORES] * 5
+	expected_scores = [scores for _, scores in EXPECTED_SCORES] * 5
+	expected_mean = compound_mean(expected_scores, 0.2)
+	assert sentiment_batch([]) == ([], 0.0)
+	assert sentiment_batch(texts, workers=1, min_magnitude=0.2) == (expected_scores, expected_mean)
+	scores, mean = sentiment_batch([TokenizedText(text) for text in texts], workers=2, chunk_size=3, min_magnitude=0.2)
+	assert scores == expected_scores
+	assert mean == expected_mean
+
+def test_ScoreCache():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.ScoreCache.get}
+		- L{vaderSentiment.vaderSentiment.ScoreCache.put}
+		- L{vaderSentiment.vaderSentiment.ScoreCache.stats}
+	"""
+	cache = ScoreCache(2, max_chars=10)
+	assert cache.get(u"abc") is None
+	cache.put(u"abc", {'compound': 0.5})
+	scores = cache.get(TokenizedText(u"abc"))
+	assert scores == {'compound': 0.5}
+	scores['compound'] = 0.0 # callers get a copy
+	assert cache.get(u"abc") == {'compound': 0.5}
+	cache.put(u"def", {'compound': 0.1})
+	cache.put(u"ghi", {'compound': 0.2}) # evicts "abc", the least recently used
+	assert cache.get(u"abc") is None
+	cache.put(u"0123456789", {'compound': 0.3}) # evicts both others, for size
+	assert cache.get(u"def") is None and cache.get(u"ghi") is None
+	cache.put(u"01234567890", {'compound': 0.3}) # too large to cache
+	assert cache.get(u"01234567890") is None
+	stats = cache.stats()
+	assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries'], stats['size']) == (2, 5, 3, 1, 10)
+	assert stats['hit_rate'] == pytest.approx(2.0 / 7)
+	cache.clear()
+	assert cache.stats()['entries'] == 0
+
+def test_SentimentAnalyzer_cache():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.SentimentAnalyzer.sentiment}
+		- L{vaderSentiment.vaderSentiment.SentimentAnalyzer.set_lexicon}
+	"""
+	cache = ScoreCache(100)
+	analyzer = SentimentAnalyzer({'zorp': 2.0}, cache=cache)
+	first = analyzer.sentiment(u"zorp zorp")
+	assert analyzer.sentiment(TokenizedText(u"zorp zorp")) == first
+	assert cache.stats()['hits'] == 1
+	analyzer.set_lexicon({'zorp': -2.0})
+	assert cache.stats()['entries'] == 0
+	assert analyzer.sentiment(u"zorp zorp")['compound'] == -first['compound']
+
+def test_sentiment_batch_cache():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.sentiment_batch}
+	"""
+	texts = [text for text, _ in EXPECTED_SCORES] * 5
+	expected_scores = [scores for _, scores in EXPECTED_SCORES] * 5
+	cache = ScoreCache(100)
+	analyzer = SentimentAnalyzer(cache=cache)
+	assert sentiment_batch(texts, workers=2, chunk_size=3, analyzer=analyzer)[0] == expected_scores
+	assert cache.stats()['entries'] == len(EXPECTED_SCORES)
+	hits = cache.stats()['hits']
+	assert sentiment_batch(texts, workers=2, chunk_size=3, analyzer=analyzer)[0] == expected_scores
+	assert cache.stats()['hits'] == hits + len(texts)
+	assert vaderSentiment.vaderSentiment.default_analyzer.cache is None
+
+def test_sentiment_batch_analyzer_lexicon():
+	"""
+	sentiment_batch scores with the lexicon of the analyzer it is given, in worker processes too.
+
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.sentiment_batch}
+	"""
+	analyzer = SentimentAnalyzer({'zorp': 2.0})
+	texts = [u"zorp zorp", u"a zorp", u"no words here"] * 3
+	expected_scores = [analyzer.score(text) for text in texts]
+	assert expected_scores[0]['compound'] > 0
+	assert sentiment_batch(texts, workers=1, analyzer=analyzer)[0] == expected_scores
+	assert sentiment_batch(texts, workers=2, chunk_size=2, analyzer=analyzer)[0] == expected_scores
+
+def test_sentiment_batch_compiled_lexicon():
+	"""
+	sentiment_batch sends worker processes a custom CompiledLexicon by its path.
+
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.sentiment_batch}
+		- L{vaderSentiment.vaderSentiment.CompiledLexicon.__reduce__}
+	"""
+	directory = tempfile.mkdtemp()
+	try:
+		compile_lexicon({'zorp': 2.0, 'blarg': -3.0}, os.path.join(directory, 'lexicon.bin'))
+		compiled = CompiledLexicon(os.path.join(directory, 'lexicon.bin'))
+		copy = pickle.loads(pickle.dumps(compiled, pickle.HIGHEST_PROTOCOL))
+		assert (copy.file_path, len(copy), copy['zorp']) == (compiled.file_path, 2, 2.0)
+		copy.close()
+		analyzer = SentimentAnalyzer(compiled)
+		texts = [u"zorp zorp", u"a blarg", u"no words here"] * 3
+		expected_scores = [analyzer.score(text) for text in texts]
+		assert expected_scores[1]['compound'] < 0
+		assert sentiment_batch(texts, workers=2, chunk_size=2, analyzer=analyzer)[0] == expected_scores
+		compiled.close()
+	finally:
+		shutil.rmtree(directory)
+
+def test_CompiledLexicon():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.compile_lexicon}
+		- L{vaderSentiment.vaderSentiment.CompiledLexicon}
+	"""
+	directory = tempfile.mkdtemp()
+	try:
+		lexicon = make_lex_dict(LEXICON_PATH)
+		compile_lexicon(lexicon, os.path.join(directory, 'lexicon.bin'), 123, 456.5)
+		compiled = CompiledLexicon(os.path.join(directory, 'lexicon.bin'))
+		assert (compiled.source_size, compiled.source_mtime) == (123, 456.5)
+		assert len(compiled) == len(lexicon)
+		for word, valence in lexicon.iteritems():
+			assert word in compiled
+			assert compiled[word] == valence
+		assert 'not a word' not in compiled
+		assert compiled.get('not a word', 0.0) == 0.0
+		with pytest.raises(KeyError):
+			compiled['not a word']
+		assert u'good' in compiled
+		# like a dict of the byte strings in the lexicon file, non-ASCII unicode words never match them
+		assert ':\xde' in compiled
+		assert u':\xde' not in compiled
+		compiled.close()
+	finally:
+		shutil.rmtree(directory)
+
+def test_load_lexicon():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.load_lexicon}
+	"""
+	directory = tempfile.mkdtemp()
+	try:
+		path = os.path.join(directory, 'lexicon.txt')
+		compiled_path = os.path.join(directory, 'lexicon.bin')
+		with open(path, 'w') as f:
+			f.write('good\t1.9\t0.9\t[2, 2]\nbad\t-2.5\t0.6\t[-2, -3]\n')
+		lexicon = load_lexicon(path, compiled_path)
+		assert isinstance(lexicon, CompiledLexicon)
+		assert lexicon['good'] == 1.9
+		lexicon.close()
+		# the compiled file is used as long as the text file doesn't change...
+		os.utime(compiled_path, (0, 0))
+		compiled_mtime = os.stat(compiled_path).st_mtime
+		load_lexicon(path, compiled_path).close()
+		assert os.stat(compiled_path).st_mtime == compiled_mtime
+		# ...and compiled again when it does
+		with open(path, 'a') as f:
+			f.write('meh\t-0.3\t0.5\t[0, -1]\n')
+		lexicon = load_lexicon(path, compiled_path)
+		assert lexicon['meh'] == -0.3
+		lexicon.close()
+		# if the compiled file can't be written, the text file is used directly
+		lexicon = load_lexicon(path, os.path.join(directory, 'missing', 'lexicon.bin'))
+		assert lexicon == {'good': 1.9, 'bad': -2.5, 'meh': -0.3}
+	finally:
+		shutil.rmtree(directory)
+
+def test_SentimentAnalyzer_lazy_lexicon():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.SentimentAnalyzer.lexicon}
+		- L{vaderSentiment.vaderSentiment.default_lexicon}
+	"""
+	analyzer = SentimentAnalyzer()
+	assert analyzer._lexicon is None
+	assert analyzer.lexicon is vaderSentiment.vaderSentiment.default_lexicon()
+	assert analyzer.lexicon is vaderSentiment.vaderSentiment.default_lexicon()
+
+def test_SentimentAnalyzer_score_batch():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.SentimentAnalyzer.score_batch}
+		- L{vaderSentiment.vaderSentiment.batch_scores_from_sentiments}
+	"""
+	pytest.importorskip('numpy')
+	analyzer = SentimentAnalyzer()
+	texts = [text for text, _ in EXPECTED_SCORES] + [
+		u"not good at all!!!!!", u"the shit is the bomb", u"kind of good ??? yeah right", u"VERY very GOOD and BAD but NOT bad",
+		u"good good good but bad bad bad????", u"a b c I", u"least good at least good very least good", u":) :( <3"]
+	assert analyzer.score_batch([]) == []
+	assert analyzer.score_batch(texts) == [analyzer.score(text) for text in texts]
+	assert analyzer.score_batch([TokenizedText(text) for text in texts]) == [analyzer.score(text) for text in texts]
+
+def test_round_like_python():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.round_like_python}
+	"""
+	numpy = pytest.importorskip('numpy')
+	values = [0.0625, -0.0625, 0.0005, -0.0005, 0.12345, 2.675, 0.99995, -0.0, 1.0 / 3] + [n / 2000.0 for n in range(-2000, 2001)]
+	for ndigits in (3, 4):
+		assert [repr(value) for value in round_like_python(numpy.array(values), ndigits)] == \
+			[repr(round(value, ndigits)) for value in values]
+
+def test_compound_mean_vectorized():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.compound_mean_vectorized}
+	"""
+	pytest.importorskip('numpy')
+	scores = [{'compound': c} for c in (0.1, 0.3333, -0.25, 0.9, 0.2, -0.2, 0.7071)]
+	for min_magnitude in (0.0, 0.2, 0.5, 1.0):
+		assert compound_mean_vectorized(scores, min_magnitude) == compound_mean(scores, min_magnitude)
+	assert compound_mean_vectorized([]) == 0.0
+
+def test_sentiment_batch_vectorized():
+	"""
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.sentiment_batch}
+	"""
+	pytest.importorskip('numpy')
+	texts = [text for text, _ in EXPECTED_SCORES] * 5
+	expected = sentiment_batch(texts, workers=1)
+	assert sentiment_batch(texts, workers=1, vectorized=True) == expected
+	assert sentiment_batch(texts, workers=2, chunk_size=3, vectorized=True) == expected
+
+def test_golden_corpus():
+	"""
+	Every way of scoring text gives exactly the scores frozen in the golden corpus.
+
+	Functions tested:
+		- L{vaderSentiment.vaderSentiment.SentimentAnalyzer.score}
+		- L{vaderSentiment.vaderSentiment.SentimentAnalyzer.sentiment}
+		- L{vaderSentiment.vaderSentiment.SentimentAnalyzer.score_batch}
+	"""
+	corpus = json.load(io.open(GOLDEN_CORPUS_PATH, encoding='utf-8'))
+	texts = [text for text, _ in corpus]
+	expected = [scores for _, scores in corpus]
+	assert len(corpus) > 1000
+	analyzer = SentimentAnalyzer()
+	assert [analyzer.score(text) for text in texts] == expected
+	assert [analyzer.score(TokenizedText(text)) for text in texts] == expected
+	cached = SentimentAnalyzer(cache=ScoreCache(len(texts)))
+	assert [cached.sentiment(text) for text in texts] == expected
+	assert [cached.sentiment(text) for text in texts] == expected
+	if vaderSentiment.vaderSentiment.numpy is not None:
+		assert analyzer.score_batch(texts) == expected
@@ -0,0 +1,136 @@
+"""
+Throughput and latency benchmark for vaderSentiment.
+
+Usage: python benchmark.py [<path to txt file, one tweet per line>]
+       python benchmark.py --freeze
+
+Without a text file, the tweets of the golden corpus are used, and their scores are first checked
+against the ones frozen in it. Any change to the analyzer must keep those the same, bit for bit;
+if a change to the scores is intended, --freeze rewrites them with the current ones.
+"""
+from vaderSentiment import SentimentAnalyzer, ScoreCache, sentiment, sentiment_batch, numpy
+import sys
+import os
+import io
+import json
+import time
+import codecs
+import multiprocessing
+
+GOLDEN_CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden_corpus.json')
+PASSES = 5 # times each text is scored, for steadier timings
+LENGTH_BUCKETS = ((1, 5), (6, 10), (11, 20), (21, 40), (41, None)) # words per tweet
+PARALLEL_COPIES = 20 # times the corpus is repeated for the process pool, so workers have enough to do
+
+def load_golden_corpus(path=GOLDEN_CORPUS_PATH):
+    """
+    Returns the golden corpus as a list of (text, scores) pairs.
+    """
+    return [(text, scores) for text, scores in json.load(io.open(path, encoding='utf-8'))]
+
+def freeze_golden_corpus(path=GOLDEN_CORPUS_PATH):
+    """
+    Rewrites the scores of the golden corpus with the ones sentiment() gives now, one entry per line.
+    """
+    corpus = [[text, sentiment(text)] for text, _ in load_golden_corpus(path)]
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(u'[\n' + u',\n'.join(json.dumps(entry, ensure_ascii=False, sort_keys=True) for entry in corpus) + u'\n]\n')
+
+def check_golden_corpus(corpus):
+    """
+    Returns the texts of the golden corpus that no longer get exactly their frozen scores.
+    """
+    analyzer = SentimentAnalyzer()
+    return [text for text, scores in corpus if analyzer.score(text) != scores]
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+def report(label, count, unit, seconds):
+    print '%-28s %10.0f %s/sec  (%.3fs)' % (label, count / seconds if seconds else float('inf'), unit, seconds)
+
+def benchmark_throughput(texts):
+    print 'Scoring %d tweets, %d times over' % (len(texts), PASSES)
+    analyzer = SentimentAnalyzer()
+    analyzer.lexicon # loaded up front, so it isn't timed
+    start = time.time()
+    for _ in range(PASSES):
+        for text in texts:
+            analyzer.score(text)
+    report('scalar', PASSES * len(texts), 'tweets', time.time() - start)
+
+    if numpy is not None:
+        start = time.time()
+        for _ in range(PASSES):
+            analyzer.score_batch(texts)
+        report('vectorized batch', PASSES * len(texts), 'tweets', time.time() - start)
+
+    cached = SentimentAnalyzer(cache=ScoreCache(len(texts)))
+    for text in texts:
+        cached.sentiment(text)
+    start = time.time()
+    for _ in range(PASSES):
+        for text in texts:
+            cached.sentiment(text)
+    report('cached', PASSES * len(texts), 'tweets', time.time() - start)
+
+def benchmark_latency(texts):
+    print 'Per-tweet latency by tweet length, in microseconds'
+    analyzer = SentimentAnalyzer()
+    analyzer.lexicon
+    latencies = dict((bucket, []) for bucket in LENGTH_BUCKETS)
+    for text in texts:
+        length = len(text.split())
+        for bucket in LENGTH_BUCKETS:
+            if length >= bucket[0] and (bucket[1] is None or length <= bucket[1]):
+                break
+        else:
+            continue # no words
+        for _ in range(PASSES):
+            start = time.time()
+            analyzer.score(text)
+            latencies[bucket].append(time.time() - start)
+    print '%-28s %10s %10s %10s' % ('words', 'tweets', 'p50', 'p99')
+    for bucket in LENGTH_BUCKETS:
+        if not latencies[bucket]:
+            continue
+        values = sorted(latencies[bucket])
+        label = '%d-%d' % bucket if bucket[1] is not None else '%d+' % (bucket[0], )
+        print '%-28s %10d %10.1f %10.1f' % (label, len(values) / PASSES, 1e6 * percentile(values, 0.5), 1e6 * percentile(values, 0.99))
+
+def benchmark_parallel(texts):
+    texts = texts * PARALLEL_COPIES
+    print 'Scoring %d tweets with sentiment_batch' % (len(texts), )
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= multiprocessing.cpu_count():
+        worker_counts.append(worker_counts[-1] * 2)
+    baseline = None
+    for workers in worker_counts:
+        start = time.time()
+        sentiment_batch(texts, workers, vectorized=numpy is not None)
+        seconds = time.time() - start
+        if baseline is None:
+            baseline = seconds
+        report('%d worker(s)' % (workers, ), len(texts), 'tweets', seconds)
+        print '%-28s %10.2fx' % ('  speedup', baseline / seconds)
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--freeze']:
+        freeze_golden_corpus()
+        print 'Froze the scores of %d texts in %s' % (len(load_golden_corpus()), GOLDEN_CORPUS_PATH)
+        sys.exit(0)
+    if len(sys.argv) > 1:
+        tweets = [line.rstrip(u'\n') for line in codecs.open(sys.argv[1], 'r', 'utf-8')]
+    else:
+        corpus = load_golden_corpus()
+        mismatches = check_golden_corpus(corpus)
+        print 'Golden corpus: %d tweets, %d with different scores' % (len(corpus), len(mismatches))
+        for text in mismatches[:10]:
+            print '  ' + text.encode('utf-8')
+        print
+        tweets = [text for text, _ in corpus]
+    benchmark_throughput(tweets)
+    print
+    benchmark_latency(tweets)
+    print
+    benchmark_parallel(tweets)
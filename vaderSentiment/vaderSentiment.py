@@ -17,249 +17,611 @@ For example:
 '''
 
 import os, math, re, sys, fnmatch, string 
-reload(sys)
+import multiprocessing
+import threading
+import mmap
+import struct
+import zlib
+from collections import deque, OrderedDict
+from heapq import heappush, heappop
+try:
+    import numpy # optional, for SentimentAnalyzer.score_batch
+except ImportError:
+    numpy = None
+
+# empirically derived valence ratings for words, emoticons, slang, swear words, acronyms/initialisms
+LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vader_sentiment_lexicon.txt')
+# the same lexicon, compiled by compile_lexicon the first time it is needed
+COMPILED_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vader_sentiment_lexicon.bin')
 
 def make_lex_dict(f):
     return dict(map(lambda (w, m): (w, float(m)), [wmsr.strip().split('\t')[0:2] for wmsr in open(f) ]))
-    
-f = 'vader_sentiment_lexicon.txt' # empirically derived valence ratings for words, emoticons, slang, swear words, acronyms/initialisms
-try:
-    word_valence_dict = make_lex_dict(f)
-except:
-    f = os.path.join(os.path.dirname(__file__),'vader_sentiment_lexicon.txt')
-    word_valence_dict = make_lex_dict(f)
+
+# Compiled lexicon file format. All integers are little-endian, unsigned 32-bit values, except the source size.
+#   header      MAGIC, VERSION, word count, slot count, and the size (64-bit) and mtime (double) of the text file
+#   valences    word count doubles
+#   slots       slot count (a power of 2) word indexes + 1, or 0 for an empty slot, hashed by the CRC-32 of the word
+#               with linear probing
+#   offsets     (word count + 1) byte offsets into the word blob
+#   blob        every word as stored in the text file
+LEXICON_MAGIC   = 0x5845464c # 'LFEX'
+LEXICON_VERSION = 1
+LEXICON_HEADER  = struct.Struct('<4IQd')
+UINT            = struct.Struct('<I')
+UINT_PAIR       = struct.Struct('<2I')
+DOUBLE          = struct.Struct('<d')
+
+def compile_lexicon(lexicon, file_path, source_size=0, source_mtime=0.0):
+    """
+    Writes lexicon (a dict of words, as byte strings, to their valence) to file_path, for CompiledLexicon.
+    The file is written under a temporary name first, so other processes never see part of it.
+    """
+    words = sorted(lexicon)
+    slot_count = 8
+    while slot_count < 2 * len(words):
+        slot_count *= 2
+    slots = [0] * slot_count
+    for index, word in enumerate(words):
+        slot = zlib.crc32(word) & (slot_count - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = index + 1
+    offsets = [0]
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+
+    temp_path = '%s.%d.tmp' % (file_path, os.getpid())
+    with open(temp_path, 'wb') as f:
+        f.write(LEXICON_HEADER.pack(LEXICON_MAGIC, LEXICON_VERSION, len(words), slot_count, source_size, source_mtime))
+        f.write(struct.pack('<%dd' % (len(words), ), *[lexicon[word] for word in words]))
+        f.write(struct.pack('<%dI' % (slot_count, ), *slots))
+        f.write(struct.pack('<%dI' % (len(offsets), ), *offsets))
+        f.write(''.join(words))
+    os.rename(temp_path, file_path)
+
+class CompiledLexicon(object):
+    """
+    Read-only dict of words to their valence, over a file written by compile_lexicon.
+    The file is mmap'ed, so every process that uses it shares one copy through the OS page cache,
+    and nothing is loaded up front. Like a dict of byte strings, it never contains non-ASCII unicode words.
+    It is pickled as its file path, so worker processes open the file themselves rather than getting a copy.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.data) < LEXICON_HEADER.size:
+            raise ValueError('%s is not a compiled lexicon' % (file_path, ))
+        magic, version, self.word_count, slot_count, self.source_size, self.source_mtime = LEXICON_HEADER.unpack_from(self.data, 0)
+        if magic != LEXICON_MAGIC or version != LEXICON_VERSION:
+            raise ValueError('%s is not a compiled lexicon' % (file_path, ))
+        self.mask = slot_count - 1
+        self.valences_start = LEXICON_HEADER.size
+        self.slots_start = self.valences_start + 8 * self.word_count
+        self.offsets_start = self.slots_start + 4 * slot_count
+        self.blob_start = self.offsets_start + 4 * (self.word_count + 1)
+
+    def __reduce__(self):
+        return (CompiledLexicon, (self.file_path, ))
+
+    def close(self):
+        self.data.close()
+
+    def _index(self, word):
+        if isinstance(word, unicode):
+            try:
+                word = word.encode('ascii')
+            except UnicodeError:
+                return -1
+        data, mask, blob_start = self.data, self.mask, self.blob_start
+        slot = zlib.crc32(word) & mask
+        while True:
+            index = UINT.unpack_from(data, self.slots_start + 4 * slot)[0] - 1
+            if index < 0:
+                return -1
+            start, end = UINT_PAIR.unpack_from(data, self.offsets_start + 4 * index)
+            if end - start == len(word) and data[blob_start + start:blob_start + end] == word:
+                return index
+            slot = (slot + 1) & mask
+
+    def __len__(self):
+        return self.word_count
+
+    def __contains__(self, word):
+        return self._index(word) >= 0
+
+    def __getitem__(self, word):
+        index = self._index(word)
+        if index < 0:
+            raise KeyError(word)
+        return DOUBLE.unpack_from(self.data, self.valences_start + 8 * index)[0]
+
+    def get(self, word, default=None):
+        index = self._index(word)
+        if index < 0:
+            return default
+        return DOUBLE.unpack_from(self.data, self.valences_start + 8 * index)[0]
+
+def load_lexicon(path=LEXICON_PATH, compiled_path=COMPILED_LEXICON_PATH):
+    """
+    Returns the lexicon in the text file at path, as a CompiledLexicon.
+    The compiled file at compiled_path is used if it was compiled from the text file as it is now
+    (going by its size and modification time), and compiled again otherwise.
+    If it can't be written, the text file is read into a dict instead.
+    """
+    source = os.stat(path)
+    try:
+        lexicon = CompiledLexicon(compiled_path)
+        if lexicon.source_size == source.st_size and lexicon.source_mtime == source.st_mtime:
+            return lexicon
+        lexicon.close()
+    except (IOError, OSError, ValueError):
+        pass
+    try:
+        compile_lexicon(make_lex_dict(path), compiled_path, source.st_size, source.st_mtime)
+        return CompiledLexicon(compiled_path)
+    except (IOError, OSError):
+        return make_lex_dict(path)
+
+_default_lexicon = None
+_default_lexicon_lock = threading.Lock()
+
+def default_lexicon():
+    """
+    Returns the VADER lexicon, loading it the first time it is needed rather than when the module is imported.
+    """
+    global _default_lexicon
+    if _default_lexicon is None:
+        with _default_lexicon_lock:
+            if _default_lexicon is None:
+                _default_lexicon = load_lexicon()
+    return _default_lexicon
 
 # for removing punctuation
 regex_remove_punctuation = re.compile('[%s]' % re.escape(string.punctuation))
 
-def sentiment(text):
+# Constant tables used by SentimentAnalyzer. They are built once, when the module is imported.
+
+# adjacent & redundant punctuation to strip from words (order matters: it's the order they are tried in)
+PUNC_LIST = (".", "!", "?", ",", ";", ":", "-", "'", "\"",
+             "!!", "!!!", "??", "???", "?!?", "!?!", "?!?!", "!?!?")
+
+NEGATE = frozenset(["aint", "arent", "cannot", "cant", "couldnt", "darent", "didnt", "doesnt",
+                    "ain't", "aren't", "can't", "couldn't", "daren't", "didn't", "doesn't",
+                    "dont", "hadnt", "hasnt", "havent", "isnt", "mightnt", "mustnt", "neither",
+                    "don't", "hadn't", "hasn't", "haven't", "isn't", "mightn't", "mustn't",
+                    "neednt", "needn't", "never", "none", "nope", "nor", "not", "nothing", "nowhere",
+                    "oughtnt", "shant", "shouldnt", "uhuh", "wasnt", "werent",
+                    "oughtn't", "shan't", "shouldn't", "uh-uh", "wasn't", "weren't",
+                    "without", "wont", "wouldnt", "won't", "wouldn't", "rarely", "seldom", "despite"])
+
+B_INCR = 0.293 #(empirically derived mean sentiment intensity rating increase for booster words)
+B_DECR = -0.293
+C_INCR = 0.733 #(empirically derived mean sentiment intensity rating increase for using ALLCAPs to emphasize a word)
+N_SCALAR = -0.74
+
+# booster/dampener 'intensifiers' or 'degree adverbs' http://en.wiktionary.org/wiki/Category:English_degree_adverbs
+BOOSTER_DICT = {"absolutely": B_INCR, "amazingly": B_INCR, "awfully": B_INCR, "completely": B_INCR, "considerably": B_INCR,
+                "decidedly": B_INCR, "deeply": B_INCR, "effing": B_INCR, "enormously": B_INCR,
+                "entirely": B_INCR, "especially": B_INCR, "exceptionally": B_INCR, "extremely": B_INCR,
+                "fabulously": B_INCR, "flipping": B_INCR, "flippin": B_INCR,
+                "fricking": B_INCR, "frickin": B_INCR, "frigging": B_INCR, "friggin": B_INCR, "fully": B_INCR, "fucking": B_INCR,
+                "greatly": B_INCR, "hella": B_INCR, "highly": B_INCR, "hugely": B_INCR, "incredibly": B_INCR,
+                "intensely": B_INCR, "majorly": B_INCR, "more": B_INCR, "most": B_INCR, "particularly": B_INCR,
+                "purely": B_INCR, "quite": B_INCR, "really": B_INCR, "remarkably": B_INCR,
+                "so": B_INCR,  "substantially": B_INCR,
+                "thoroughly": B_INCR, "totally": B_INCR, "tremendously": B_INCR,
+                "uber": B_INCR, "unbelievably": B_INCR, "unusually": B_INCR, "utterly": B_INCR,
+                "very": B_INCR,
+
+                "almost": B_DECR, "barely": B_DECR, "hardly": B_DECR, "just enough": B_DECR,
+                "kind of": B_DECR, "kinda": B_DECR, "kindof": B_DECR, "kind-of": B_DECR,
+                "less": B_DECR, "little": B_DECR, "marginally": B_DECR, "occasionally": B_DECR, "partly": B_DECR,
+                "scarcely": B_DECR, "slightly": B_DECR, "somewhat": B_DECR,
+                "sort of": B_DECR, "sorta": B_DECR, "sortof": B_DECR, "sort-of": B_DECR}
+
+# special case idioms using a sentiment-laden keyword known to SAGE
+SPECIAL_CASE_IDIOMS = {"the shit": 3, "the bomb": 3, "bad ass": 1.5, "yeah right": -2,
+                       "cut the mustard": 2, "kiss of death": -1.5, "hand to mouth": -2}
+# future work: consider other sentiment-laden idioms
+#other_idioms = {"back handed": -2, "blow smoke": -2, "blowing smoke": -2, "upper hand": 1, "break a leg": 2,
+#                "cooking with gas": 2, "in the black": 2, "in the red": -2, "on the ball": 2,"under the weather": -2}
+
+def negated(wordList, includeNT=True):
+    for word in wordList:
+        if word in NEGATE:
+            return True
+    if includeNT:
+        for word in wordList:
+            if "n't" in word:
+                return True
+    if "least" in wordList:
+        i = wordList.index("least")
+        if i > 0 and wordList[i-1] != "at":
+            return True
+    return False
+
+def normalize(score, alpha=15):
+    # normalize the score to be between -1 and 1 using an alpha that approximates the max expected value
+    normScore = score/math.sqrt( ((score*score) + alpha) )
+    return normScore
+
+def wildCardMatch(patternWithWildcard, listOfStringsToMatchAgainst):
+    listOfMatches = fnmatch.filter(listOfStringsToMatchAgainst, patternWithWildcard)
+    return listOfMatches
+
+def isALLCAP_differential(wordList):
+    countALLCAPS= 0
+    for w in wordList:
+        if w.isupper():
+            countALLCAPS += 1
+    cap_differential = len(wordList) - countALLCAPS
+    if cap_differential > 0 and cap_differential < len(wordList):
+        isDiff = True
+    else: isDiff = False
+    return isDiff
+
+def scalar_inc_dec(word, valence, isCap_diff):
+    scalar = 0.0
+    word_lower = word.lower()
+    if word_lower in BOOSTER_DICT:
+        scalar = BOOSTER_DICT[word_lower]
+        if valence < 0: scalar *= -1
+        #check if booster/dampener word is in ALLCAPS (while others aren't)
+        if word.isupper() and isCap_diff:
+            if valence > 0: scalar += C_INCR
+            else:  scalar -= C_INCR
+    return scalar
+
+# The helpers below each do in one pass what the original code did by editing a list while iterating over it,
+# and give exactly the same results, quirks included, so scores don't change.
+
+def remove_short_words(wordList):
     """
-    Returns a float for sentiment strength based on the input text.
-    Positive values are positive valence, negative value are negative valence.
+    Returns wordList without empty or single letter "words" like 'a' and 'I'.
+    The original removed them in place while iterating, which skips the word after each one removed,
+    and removes the first equal word rather than the current one.
     """
-    wordsAndEmoticons = text.split() #doesn't separate words from adjacent punctuation (keeps emoticons & contractions)
-    text_mod = regex_remove_punctuation.sub('', text) # removes punctuation (but loses emoticons & contractions)
-    wordsOnly = text_mod.split()
-    # get rid of empty items or single letter "words" like 'a' and 'I' from wordsOnly
-    for word in wordsOnly:
-        if len(word) <= 1:
-            wordsOnly.remove(word)    
-    # now remove adjacent & redundant punctuation from [wordsAndEmoticons] while keeping emoticons and contractions
-    puncList = [".", "!", "?", ",", ";", ":", "-", "'", "\"", 
-                "!!", "!!!", "??", "???", "?!?", "!?!", "?!?!", "!?!?"] 
-    for word in wordsOnly:
-        for p in puncList:
-            pword = p + word
-            x1 = wordsAndEmoticons.count(pword)
-            while x1 > 0:
-                i = wordsAndEmoticons.index(pword)
-                wordsAndEmoticons.remove(pword)
-                wordsAndEmoticons.insert(i, word)
-                x1 = wordsAndEmoticons.count(pword)
-            
-            wordp = word + p
-            x2 = wordsAndEmoticons.count(wordp)
-            while x2 > 0:
-                i = wordsAndEmoticons.index(wordp)
-                wordsAndEmoticons.remove(wordp)
-                wordsAndEmoticons.insert(i, word)
-                x2 = wordsAndEmoticons.count(wordp)
-    # get rid of residual empty items or single letter "words" like 'a' and 'I' from wordsAndEmoticons
-    for word in wordsAndEmoticons:
-        if len(word) <= 1:
-            wordsAndEmoticons.remove(word)
-    
-    # remove stopwords from [wordsAndEmoticons]
-    #stopwords = [str(word).strip() for word in open('stopwords.txt')]
-    #for word in wordsAndEmoticons:
-    #    if word in stopwords:
-    #        wordsAndEmoticons.remove(word)
-    
-    # check for negation
-    negate = ["aint", "arent", "cannot", "cant", "couldnt", "darent", "didnt", "doesnt",
-              "ain't", "aren't", "can't", "couldn't", "daren't", "didn't", "doesn't",
-              "dont", "hadnt", "hasnt", "havent", "isnt", "mightnt", "mustnt", "neither",
-              "don't", "hadn't", "hasn't", "haven't", "isn't", "mightn't", "mustn't",
-              "neednt", "needn't", "never", "none", "nope", "nor", "not", "nothing", "nowhere", 
-              "oughtnt", "shant", "shouldnt", "uhuh", "wasnt", "werent",
-              "oughtn't", "shan't", "shouldn't", "uh-uh", "wasn't", "weren't",  
-              "without", "wont", "wouldnt", "won't", "wouldn't", "rarely", "seldom", "despite"]
-    def negated(list, nWords=[], includeNT=True):
-        nWords.extend(negate)
-        for word in nWords:
-            if word in list:
-                return True
-        if includeNT:
-            for word in list:
-                if "n't" in word:
-                    return True
-        if "least" in list:
-            i = list.index("least")
-            if i > 0 and list[i-1] != "at":
-                return True
-        return False
-        
-    def normalize(score, alpha=15):
-        # normalize the score to be between -1 and 1 using an alpha that approximates the max expected value 
-        normScore = score/math.sqrt( ((score*score) + alpha) )
-        return normScore
-    
-    def wildCardMatch(patternWithWildcard, listOfStringsToMatchAgainst):
-        listOfMatches = fnmatch.filter(listOfStringsToMatchAgainst, patternWithWildcard)
-        return listOfMatches
-        
-    
-    def isALLCAP_differential(wordList):
-        countALLCAPS= 0
-        for w in wordList:
-            if w.isupper(): 
-                countALLCAPS += 1
-        cap_differential = len(wordList) - countALLCAPS
-        if cap_differential > 0 and cap_differential < len(wordList):
-            isDiff = True
-        else: isDiff = False
-        return isDiff
-    isCap_diff = isALLCAP_differential(wordsAndEmoticons)
-    
-    b_incr = 0.293 #(empirically derived mean sentiment intensity rating increase for booster words)
-    b_decr = -0.293
-    # booster/dampener 'intensifiers' or 'degree adverbs' http://en.wiktionary.org/wiki/Category:English_degree_adverbs
-    booster_dict = {"absolutely": b_incr, "amazingly": b_incr, "awfully": b_incr, "completely": b_incr, "considerably": b_incr, 
-                    "decidedly": b_incr, "deeply": b_incr, "effing": b_incr, "enormously": b_incr, 
-                    "entirely": b_incr, "especially": b_incr, "exceptionally": b_incr, "extremely": b_incr,
-                    "fabulously": b_incr, "flipping": b_incr, "flippin": b_incr, 
-                    "fricking": b_incr, "frickin": b_incr, "frigging": b_incr, "friggin": b_incr, "fully": b_incr, "fucking": b_incr, 
-                    "greatly": b_incr, "hella": b_incr, "highly": b_incr, "hugely": b_incr, "incredibly": b_incr, 
-                    "intensely": b_incr, "majorly": b_incr, "more": b_incr, "most": b_incr, "particularly": b_incr, 
-                    "purely": b_incr, "quite": b_incr, "really": b_incr, "remarkably": b_incr, 
-                    "so": b_incr,  "substantially": b_incr, 
-                    "thoroughly": b_incr, "totally": b_incr, "tremendously": b_incr, 
-                    "uber": b_incr, "unbelievably": b_incr, "unusually": b_incr, "utterly": b_incr, 
-                    "very": b_incr, 
-                    
-                    "almost": b_decr, "barely": b_decr, "hardly": b_decr, "just enough": b_decr, 
-                    "kind of": b_decr, "kinda": b_decr, "kindof": b_decr, "kind-of": b_decr,
-                    "less": b_decr, "little": b_decr, "marginally": b_decr, "occasionally": b_decr, "partly": b_decr, 
-                    "scarcely": b_decr, "slightly": b_decr, "somewhat": b_decr, 
-                    "sort of": b_decr, "sorta": b_decr, "sortof": b_decr, "sort-of": b_decr}
-    sentiments = []
+    kept = []
+    shortPositions = {} # short word -> indexes in kept of its remaining copies, in order
+    skip = False
+    for word in wordList:
+        short = len(word) <= 1
+        if short:
+            shortPositions.setdefault(word, deque()).append(len(kept))
+        kept.append(word)
+        if skip:
+            skip = False
+        elif short:
+            kept[shortPositions[word].popleft()] = None
+            skip = True
+    return [word for word in kept if word is not None]
+
+def strip_punctuation(wordsAndEmoticons, wordsOnly):
+    """
+    Returns wordsAndEmoticons with each item that is one of wordsOnly with adjacent & redundant punctuation
+    replaced by the bare word, keeping emoticons and contractions.
+    """
+    bareWords = frozenset(wordsOnly)
+    if not bareWords:
+        return wordsAndEmoticons
+    stripped = []
     for item in wordsAndEmoticons:
-        v = 0
-        i = wordsAndEmoticons.index(item)
-        if (i < len(wordsAndEmoticons)-1 and item.lower() == "kind" and \
-           wordsAndEmoticons[i+1].lower() == "of") or item.lower() in booster_dict:
-            sentiments.append(v)
+        for p in PUNC_LIST:
+            if item.startswith(p) and item[len(p):] in bareWords:
+                item = item[len(p):]
+                break
+            if item.endswith(p) and item[:-len(p)] in bareWords:
+                item = item[:-len(p)]
+                break
+        stripped.append(item)
+    return stripped
+
+def first_indexes(wordList):
+    """
+    Returns a dict of each item in wordList to the index of its first occurrence, as list.index() would find it.
+    """
+    indexes = {}
+    for i, item in enumerate(wordList):
+        indexes.setdefault(item, i)
+    return indexes
+
+def contrast_around(sentiments, bi):
+    """
+    Returns sentiments with the scores before index bi halved and the ones after it increased by half,
+    for the contrastive conjunction 'but' at bi.
+    The original looked each score up with sentiments.index() as it went, so a score equal to an
+    earlier one (after that was scaled) scales the earlier one again instead of itself.
+    """
+    scaled = list(sentiments)
+    positions = {} # score -> heap of the indexes that may hold it; stale ones are dropped when found
+    for k, s in enumerate(sentiments):
+        heap = positions.setdefault(s, [])
+        heappush(heap, k)
+        while scaled[heap[0]] != s:
+            heappop(heap)
+        si = heap[0]
+        if si < bi:
+            scaled[si] = s*0.5
+        elif si > bi:
+            scaled[si] = s*1.5
+        else:
             continue
-        item_lowercase = item.lower() 
-        if  item_lowercase in word_valence_dict:
-            #get the sentiment valence
-            v = float(word_valence_dict[item_lowercase])
-            
-            #check if sentiment laden word is in ALLCAPS (while others aren't)
-            c_incr = 0.733 #(empirically derived mean sentiment intensity rating increase for using ALLCAPs to emphasize a word)
-            if item.isupper() and isCap_diff:
-                if v > 0: v += c_incr
-                else: v -= c_incr
-            
-            #check if the preceding words increase, decrease, or negate/nullify the valence
-            def scalar_inc_dec(word, valence):
-                scalar = 0.0
-                word_lower = word.lower()
-                if word_lower in booster_dict:
-                    scalar = booster_dict[word_lower]
-                    if valence < 0: scalar *= -1
-                    #check if booster/dampener word is in ALLCAPS (while others aren't)
-                    if word.isupper() and isCap_diff:
-                        if valence > 0: scalar += c_incr
-                        else:  scalar -= c_incr
-                return scalar
-            n_scalar = -0.74
-            if i > 0 and wordsAndEmoticons[i-1].lower() not in word_valence_dict:
-                s1 = scalar_inc_dec(wordsAndEmoticons[i-1], v)
-                v = v+s1
-                if negated([wordsAndEmoticons[i-1]]): v = v*n_scalar
-            if i > 1 and wordsAndEmoticons[i-2].lower() not in word_valence_dict:
-                s2 = scalar_inc_dec(wordsAndEmoticons[i-2], v)
-                if s2 != 0: s2 = s2*0.95
-                v = v+s2
-                # check for special use of 'never' as valence modifier instead of negation
-                if wordsAndEmoticons[i-2] == "never" and (wordsAndEmoticons[i-1] == "so" or wordsAndEmoticons[i-1] == "this"): 
-                    v = v*1.5                    
-                # otherwise, check for negation/nullification
-                elif negated([wordsAndEmoticons[i-2]]): v = v*n_scalar
-            if i > 2 and wordsAndEmoticons[i-3].lower() not in word_valence_dict:
-                s3 = scalar_inc_dec(wordsAndEmoticons[i-3], v)
-                if s3 != 0: s3 = s3*0.9
-                v = v+s3
-                # check for special use of 'never' as valence modifier instead of negation
-                if wordsAndEmoticons[i-3] == "never" and \
-                   (wordsAndEmoticons[i-2] == "so" or wordsAndEmoticons[i-2] == "this") or \
-                   (wordsAndEmoticons[i-1] == "so" or wordsAndEmoticons[i-1] == "this"):
-                    v = v*1.25
-                # otherwise, check for negation/nullification
-                elif negated([wordsAndEmoticons[i-3]]): v = v*n_scalar
-                
-                # check for special case idioms using a sentiment-laden keyword known to SAGE
-                special_case_idioms = {"the shit": 3, "the bomb": 3, "bad ass": 1.5, "yeah right": -2, 
-                                       "cut the mustard": 2, "kiss of death": -1.5, "hand to mouth": -2}
-                # future work: consider other sentiment-laden idioms
-                #other_idioms = {"back handed": -2, "blow smoke": -2, "blowing smoke": -2, "upper hand": 1, "break a leg": 2, 
-                #                "cooking with gas": 2, "in the black": 2, "in the red": -2, "on the ball": 2,"under the weather": -2}
-                onezero = u"{} {}".format(wordsAndEmoticons[i-1], wordsAndEmoticons[i])
-                twoonezero = u"{} {} {}".format(wordsAndEmoticons[i-2], wordsAndEmoticons[i-1], wordsAndEmoticons[i])
-                twoone = u"{} {}".format(wordsAndEmoticons[i-2], wordsAndEmoticons[i-1])
-                threetwoone = u"{} {} {}".format(wordsAndEmoticons[i-3], wordsAndEmoticons[i-2], wordsAndEmoticons[i-1])
-                threetwo = u"{} {}".format(wordsAndEmoticons[i-3], wordsAndEmoticons[i-2])                    
-                if onezero in special_case_idioms: v = special_case_idioms[onezero]
-                elif twoonezero in special_case_idioms: v = special_case_idioms[twoonezero]
-                elif twoone in special_case_idioms: v = special_case_idioms[twoone]
-                elif threetwoone in special_case_idioms: v = special_case_idioms[threetwoone]
-                elif threetwo in special_case_idioms: v = special_case_idioms[threetwo]
-                if len(wordsAndEmoticons)-1 > i:
-                    zeroone = u"{} {}".format(wordsAndEmoticons[i], wordsAndEmoticons[i+1])
-                    if zeroone in special_case_idioms: v = special_case_idioms[zeroone]
-                if len(wordsAndEmoticons)-1 > i+1:
-                    zeroonetwo = u"{} {}".format(wordsAndEmoticons[i], wordsAndEmoticons[i+1], wordsAndEmoticons[i+2])
-                    if zeroonetwo in special_case_idioms: v = special_case_idioms[zeroonetwo]
-                
-                # check for booster/dampener bi-grams such as 'sort of' or 'kind of'
-                if threetwo in booster_dict or twoone in booster_dict:
-                    v = v+b_decr
-            
-            # check for negation case using "least"
-            if i > 1 and wordsAndEmoticons[i-1].lower() not in word_valence_dict \
-                and wordsAndEmoticons[i-1].lower() == "least":
-                if (wordsAndEmoticons[i-2].lower() != "at" and wordsAndEmoticons[i-2].lower() != "very"):
-                    v = v*n_scalar
-            elif i > 0 and wordsAndEmoticons[i-1].lower() not in word_valence_dict \
-                and wordsAndEmoticons[i-1].lower() == "least":
-                v = v*n_scalar
-        sentiments.append(v) 
-            
-    # check for modification in sentiment due to contrastive conjunction 'but'
-    if 'but' in wordsAndEmoticons or 'BUT' in wordsAndEmoticons:
-        try: bi = wordsAndEmoticons.index('but')
-        except: bi = wordsAndEmoticons.index('BUT')
-        for s in sentiments:
-            si = sentiments.index(s)
-            if si < bi: 
-                sentiments.pop(si)
-                sentiments.insert(si, s*0.5)
-            elif si > bi: 
-                sentiments.pop(si)
-                sentiments.insert(si, s*1.5) 
-                
+        heappush(positions.setdefault(scaled[si], []), si)
+    return scaled
+
+class ScoreCache(object):
+    """
+    LRU cache of sentiment scores, keyed by the text they were worked out from.
+    Arguments:
+        max_entries              maximum number of texts to keep the scores of
+        max_chars (optional)     maximum total length of the cached texts
+    """
+
+    def __init__(self, max_entries, max_chars=None):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.lock = threading.Lock()
+        self.scores = OrderedDict() # text -> scores, least recently used first
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(text):
+        # common_types.TokenizedText is keyed by its plain text, so the cache doesn't hold on to its tokens
+        if type(text) in (str, unicode):
+            return text
+        return unicode(text)
+
+    def get(self, text):
+        """
+        Returns a copy of the cached scores of text, or None.
+        """
+        key = self.key(text)
+        with self.lock:
+            scores = self.scores.pop(key, None)
+            if scores is None:
+                self.misses += 1
+                return None
+            self.scores[key] = scores
+            self.hits += 1
+            return dict(scores)
+
+    def put(self, text, scores):
+        key = self.key(text)
+        with self.lock:
+            if self.scores.pop(key, None) is not None:
+                self.size -= len(key)
+            if self.max_chars is not None and len(key) > self.max_chars:
+                return
+            self.scores[key] = dict(scores)
+            self.size += len(key)
+            while len(self.scores) > self.max_entries or (self.max_chars is not None and self.size > self.max_chars):
+                evicted, _ = self.scores.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.scores.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits'      : self.hits,
+                'misses'    : self.misses,
+                'hit_rate'  : float(self.hits) / lookups if lookups else 0.0,
+                'evictions' : self.evictions,
+                'entries'   : len(self.scores),
+                'size'      : self.size}
+
+class SentimentAnalyzer(object):
+    """
+    Scores the sentiment of text against a valence lexicon.
+    The analyzer keeps no state between calls other than its cache, which is thread-safe,
+    so one instance can be shared by any number of threads.
+    Arguments:
+        lexicon (optional)    dict of lowercase words to their valence, defaults to the VADER lexicon
+                              (see default_lexicon)
+        cache (optional)      ScoreCache to memoize scores in; it must only be used by this analyzer
+    """
+
+    def __init__(self, lexicon=None, cache=None):
+        self._lexicon = lexicon
+        self.cache = cache
+
+    @property
+    def lexicon(self):
+        if self._lexicon is None:
+            self._lexicon = default_lexicon()
+        return self._lexicon
+
+    def set_lexicon(self, lexicon):
+        """
+        Replaces the lexicon, and drops the cached scores worked out with the old one.
+        """
+        self._lexicon = lexicon
+        if self.cache is not None:
+            self.cache.clear()
+
+    def sentiment(self, text):
+        """
+        Returns a float for sentiment strength based on the input text.
+        Positive values are positive valence, negative value are negative valence.
+        Scores are looked up in, and added to, the cache if there is one.
+        """
+        if self.cache is None:
+            return self.score(text)
+        scores = self.cache.get(text)
+        if scores is None:
+            scores = self.score(text)
+            self.cache.put(text, scores)
+        return scores
+
+    def score(self, text):
+        """
+        Works out the sentiment scores of text, without the cache.
+        """
+        return scores_from_sentiments(self.token_sentiments(text), text)
+
+    def score_batch(self, texts):
+        """
+        Works out the sentiment scores of a list of texts, without the cache, giving the same scores as score().
+        Only the valences of the words are worked out one text at a time; the scores are
+        worked out from them for all the texts at once with NumPy.
+        """
+        if numpy is None:
+            raise ImportError('NumPy is required to score texts in batches')
+        valences = []
+        offsets = [0]
+        for text in texts:
+            valences.extend(self.token_sentiments(text))
+            offsets.append(len(valences))
+        ep_counts = [text.count("!") for text in texts]
+        qm_counts = [text.count("?") for text in texts]
+        return batch_scores_from_sentiments(valences, offsets, ep_counts, qm_counts)
+
+    def token_sentiments(self, text):
+        """
+        Returns the valence of each word of text, in context: after boosters, negations, idioms, etc.
+        """
+        word_valence_dict = self.lexicon
+        if hasattr(text, 'tokens'):
+            # text was tokenized ahead of time (see common_types.TokenizedText); copy the tokens, they are modified below
+            wordsAndEmoticons = list(text.tokens)
+            wordsOnly = list(text.bare_tokens)
+        else:
+            wordsAndEmoticons = text.split() #doesn't separate words from adjacent punctuation (keeps emoticons & contractions)
+            text_mod = regex_remove_punctuation.sub('', text) # removes punctuation (but loses emoticons & contractions)
+            wordsOnly = text_mod.split()
+        # get rid of empty items or single letter "words" like 'a' and 'I' from wordsOnly
+        wordsOnly = remove_short_words(wordsOnly)
+        # now remove adjacent & redundant punctuation from [wordsAndEmoticons] while keeping emoticons and contractions
+        wordsAndEmoticons = strip_punctuation(wordsAndEmoticons, wordsOnly)
+        # get rid of residual empty items or single letter "words" like 'a' and 'I' from wordsAndEmoticons
+        wordsAndEmoticons = remove_short_words(wordsAndEmoticons)
+
+        # remove stopwords from [wordsAndEmoticons]
+        #stopwords = [str(word).strip() for word in open('stopwords.txt')]
+        #for word in wordsAndEmoticons:
+        #    if word in stopwords:
+        #        wordsAndEmoticons.remove(word)
+
+        isCap_diff = isALLCAP_differential(wordsAndEmoticons)
+
+        # a repeated item is scored at its first occurrence, like the original's wordsAndEmoticons.index(item)
+        firstIndexes = first_indexes(wordsAndEmoticons)
+        # each item is looked up in the lexicon once, rather than again for every word after it
+        valences = [word_valence_dict.get(word.lower()) for word in wordsAndEmoticons]
+        itemSentiments = {}
+        sentiments = []
+        for item in wordsAndEmoticons:
+            if item in itemSentiments:
+                sentiments.append(itemSentiments[item])
+                continue
+            v = 0
+            i = firstIndexes[item]
+            if (i < len(wordsAndEmoticons)-1 and item.lower() == "kind" and \
+               wordsAndEmoticons[i+1].lower() == "of") or item.lower() in BOOSTER_DICT:
+                itemSentiments[item] = v
+                sentiments.append(v)
+                continue
+            if  valences[i] is not None:
+                #get the sentiment valence
+                v = float(valences[i])
+
+                #check if sentiment laden word is in ALLCAPS (while others aren't)
+                if item.isupper() and isCap_diff:
+                    if v > 0: v += C_INCR
+                    else: v -= C_INCR
+
+                #check if the preceding words increase, decrease, or negate/nullify the valence
+                if i > 0 and valences[i-1] is None:
+                    s1 = scalar_inc_dec(wordsAndEmoticons[i-1], v, isCap_diff)
+                    v = v+s1
+                    if negated([wordsAndEmoticons[i-1]]): v = v*N_SCALAR
+                if i > 1 and valences[i-2] is None:
+                    s2 = scalar_inc_dec(wordsAndEmoticons[i-2], v, isCap_diff)
+                    if s2 != 0: s2 = s2*0.95
+                    v = v+s2
+                    # check for special use of 'never' as valence modifier instead of negation
+                    if wordsAndEmoticons[i-2] == "never" and (wordsAndEmoticons[i-1] == "so" or wordsAndEmoticons[i-1] == "this"):
+                        v = v*1.5
+                    # otherwise, check for negation/nullification
+                    elif negated([wordsAndEmoticons[i-2]]): v = v*N_SCALAR
+                if i > 2 and valences[i-3] is None:
+                    s3 = scalar_inc_dec(wordsAndEmoticons[i-3], v, isCap_diff)
+                    if s3 != 0: s3 = s3*0.9
+                    v = v+s3
+                    # check for special use of 'never' as valence modifier instead of negation
+                    if wordsAndEmoticons[i-3] == "never" and \
+                       (wordsAndEmoticons[i-2] == "so" or wordsAndEmoticons[i-2] == "this") or \
+                       (wordsAndEmoticons[i-1] == "so" or wordsAndEmoticons[i-1] == "this"):
+                        v = v*1.25
+                    # otherwise, check for negation/nullification
+                    elif negated([wordsAndEmoticons[i-3]]): v = v*N_SCALAR
+
+                    # check for special case idioms
+                    onezero = u"{} {}".format(wordsAndEmoticons[i-1], wordsAndEmoticons[i])
+                    twoonezero = u"{} {} {}".format(wordsAndEmoticons[i-2], wordsAndEmoticons[i-1], wordsAndEmoticons[i])
+                    twoone = u"{} {}".format(wordsAndEmoticons[i-2], wordsAndEmoticons[i-1])
+                    threetwoone = u"{} {} {}".format(wordsAndEmoticons[i-3], wordsAndEmoticons[i-2], wordsAndEmoticons[i-1])
+                    threetwo = u"{} {}".format(wordsAndEmoticons[i-3], wordsAndEmoticons[i-2])
+                    if onezero in SPECIAL_CASE_IDIOMS: v = SPECIAL_CASE_IDIOMS[onezero]
+                    elif twoonezero in SPECIAL_CASE_IDIOMS: v = SPECIAL_CASE_IDIOMS[twoonezero]
+                    elif twoone in SPECIAL_CASE_IDIOMS: v = SPECIAL_CASE_IDIOMS[twoone]
+                    elif threetwoone in SPECIAL_CASE_IDIOMS: v = SPECIAL_CASE_IDIOMS[threetwoone]
+                    elif threetwo in SPECIAL_CASE_IDIOMS: v = SPECIAL_CASE_IDIOMS[threetwo]
+                    if len(wordsAndEmoticons)-1 > i:
+                        zeroone = u"{} {}".format(wordsAndEmoticons[i], wordsAndEmoticons[i+1])
+                        if zeroone in SPECIAL_CASE_IDIOMS: v = SPECIAL_CASE_IDIOMS[zeroone]
+                    if len(wordsAndEmoticons)-1 > i+1:
+                        zeroonetwo = u"{} {}".format(wordsAndEmoticons[i], wordsAndEmoticons[i+1], wordsAndEmoticons[i+2])
+                        if zeroonetwo in SPECIAL_CASE_IDIOMS: v = SPECIAL_CASE_IDIOMS[zeroonetwo]
+
+                    # check for booster/dampener bi-grams such as 'sort of' or 'kind of'
+                    if threetwo in BOOSTER_DICT or twoone in BOOSTER_DICT:
+                        v = v+B_DECR
+
+                # check for negation case using "least"
+                if i > 1 and valences[i-1] is None \
+                    and wordsAndEmoticons[i-1].lower() == "least":
+                    if (wordsAndEmoticons[i-2].lower() != "at" and wordsAndEmoticons[i-2].lower() != "very"):
+                        v = v*N_SCALAR
+                elif i > 0 and valences[i-1] is None \
+                    and wordsAndEmoticons[i-1].lower() == "least":
+                    v = v*N_SCALAR
+            itemSentiments[item] = v
+            sentiments.append(v)
+
+        # check for modification in sentiment due to contrastive conjunction 'but'
+        if 'but' in wordsAndEmoticons or 'BUT' in wordsAndEmoticons:
+            try: bi = wordsAndEmoticons.index('but')
+            except: bi = wordsAndEmoticons.index('BUT')
+            sentiments = contrast_around(sentiments, bi)
+
+        return sentiments
+
+def scores_from_sentiments(sentiments, text):
+    """
+    Returns the sentiment scores of text, given the valences of its words from SentimentAnalyzer.token_sentiments().
+    """
     if sentiments:                      
         sum_s = float(sum(sentiments))
         #print sentiments, sum_s
-        
+
         # check for added emphasis resulting from exclamation points (up to 4 of them)
         ep_count = text.count("!")
         if ep_count > 4: ep_count = 4
         ep_amplifier = ep_count*0.292 #(empirically derived mean sentiment intensity rating increase for exclamation points)
         if sum_s > 0:  sum_s += ep_amplifier
         elif  sum_s < 0: sum_s -= ep_amplifier
-        
+
         # check for added emphasis resulting from question marks (2 or 3+)
         qm_count = text.count("?")
         qm_amplifier = 0
@@ -270,7 +632,7 @@ def sentiment(text):
             elif  sum_s < 0: sum_s -= qm_amplifier
 
         compound = normalize(sum_s)
-        
+
         # want separate positive versus negative sentiment scores
         pos_sum = 0.0
         neg_sum = 0.0
@@ -282,26 +644,235 @@ def sentiment(text):
                 neg_sum += (float(sentiment_score) -1) # when used with math.fabs(), compensates for neutrals
             if sentiment_score == 0:
                 neu_count += 1
-        
+
         if pos_sum > math.fabs(neg_sum): pos_sum += (ep_amplifier+qm_amplifier)
         elif pos_sum < math.fabs(neg_sum): neg_sum -= (ep_amplifier+qm_amplifier)
-        
+
         total = pos_sum + math.fabs(neg_sum) + neu_count
         pos = math.fabs(pos_sum / total)
         neg = math.fabs(neg_sum / total)
         neu = math.fabs(neu_count / total)
-        
+
     else:
         compound = 0.0; pos = 0.0; neg = 0.0; neu = 0.0
-        
+
     s = {"neg" : round(neg, 3), 
          "neu" : round(neu, 3),
          "pos" : round(pos, 3),
          "compound" : round(compound, 4)}
     return s
 
+def batch_scores_from_sentiments(valences, offsets, ep_counts, qm_counts):
+    """
+    Does what scores_from_sentiments() does for a batch of texts at once, with NumPy, and gives exactly the same scores.
+    Arguments:
+        valences     the valences of the words of all the texts, one after another
+        offsets      index in valences of the first word of each text, followed by len(valences)
+        ep_counts    number of exclamation points in each text
+        qm_counts    number of question marks in each text
+    """
+    count = len(offsets) - 1
+    lengths = numpy.diff(numpy.array(offsets, dtype=numpy.int64))
+    width = int(lengths.max()) if count else 0
+    # one row per text, padded with zeros; positions past the end of a text are masked out where zeros count
+    matrix = numpy.zeros((count, width))
+    rows = numpy.repeat(numpy.arange(count), lengths)
+    columns = numpy.arange(len(valences)) - numpy.repeat(numpy.array(offsets[:-1], dtype=numpy.int64), lengths)
+    matrix[rows, columns] = valences
+    in_text = numpy.arange(width) < lengths[:, numpy.newaxis]
+
+    # The sums are built up one column at a time, which adds up each text's valences in the same order
+    # as the scalar loops and so rounds the same way (adding the 0.0 padding changes nothing)
+    sum_s = numpy.zeros(count)
+    pos_sum = numpy.zeros(count)
+    neg_sum = numpy.zeros(count)
+    for column in matrix.T:
+        sum_s += column
+        pos_sum += numpy.where(column > 0, column + 1, 0.0)
+        neg_sum += numpy.where(column < 0, column - 1, 0.0)
+    neu_count = ((matrix == 0) & in_text).sum(axis=1)
+
+    ep_amplifier = numpy.minimum(numpy.array(ep_counts, dtype=numpy.int64), 4) * 0.292
+    sum_s = numpy.where(sum_s > 0, sum_s + ep_amplifier, numpy.where(sum_s < 0, sum_s - ep_amplifier, sum_s))
+    qm_counts = numpy.array(qm_counts, dtype=numpy.int64)
+    qm_amplifier = numpy.where(qm_counts > 1, numpy.where(qm_counts <= 3, qm_counts * 0.18, 0.96), 0.0)
+    sum_s = numpy.where(sum_s > 0, sum_s + qm_amplifier, numpy.where(sum_s < 0, sum_s - qm_amplifier, sum_s))
+    compound = sum_s / numpy.sqrt(sum_s * sum_s + 15)
+
+    amplifier = ep_amplifier + qm_amplifier
+    abs_neg_sum = numpy.fabs(neg_sum)
+    pos_sum, neg_sum = numpy.where(pos_sum > abs_neg_sum, pos_sum + amplifier, pos_sum), \
+                       numpy.where(pos_sum < abs_neg_sum, neg_sum - amplifier, neg_sum)
+    total = pos_sum + numpy.fabs(neg_sum) + neu_count
+    total[lengths == 0] = 1 # texts without words score 0.0 across the board
+    pos = numpy.fabs(pos_sum / total)
+    neg = numpy.fabs(neg_sum / total)
+    neu = numpy.fabs(neu_count / total)
+
+    return [{"neg" : neg_n, "neu" : neu_n, "pos" : pos_n, "compound" : compound_n} for neg_n, neu_n, pos_n, compound_n in
+            zip(round_like_python(neg, 3), round_like_python(neu, 3), round_like_python(pos, 3), round_like_python(compound, 4))]
+
+def round_like_python(values, ndigits):
+    """
+    Returns a list of the values in a NumPy array, each rounded to ndigits decimal places exactly as round() would.
+    numpy.round() gives the same result, except near halfway cases, which round() rounds away from zero
+    and numpy.round() to even, after a multiplication that may have moved them across the halfway point.
+    Those are rounded by round().
+    """
+    rounded = numpy.round(values, ndigits)
+    scaled = values * 10.0 ** ndigits
+    near_half = numpy.fabs(numpy.fabs(scaled - numpy.floor(scaled)) - 0.5) < 1e-6
+    rounded = rounded.tolist()
+    for n in numpy.flatnonzero(near_half).tolist():
+        rounded[n] = round(values[n], ndigits)
+    return rounded
+
+# shared by every caller of sentiment(); give it a ScoreCache to memoize scores
+default_analyzer = SentimentAnalyzer()
+
+def sentiment(text):
+    """
+    Returns a float for sentiment strength based on the input text.
+    Positive values are positive valence, negative value are negative valence.
+    """
+    return default_analyzer.sentiment(text)
+
+# the analyzer the worker processes of sentiment_batch score with, set up by _init_worker
+_worker_analyzer = default_analyzer
+
+def _init_worker(lexicon):
+    # Runs in each worker process of sentiment_batch. The worker gets the caller's lexicon but not its cache:
+    # a worker's copy of the cache would be thrown away, and its lock may have been copied while another thread held it.
+    global _worker_analyzer
+    _worker_analyzer = SentimentAnalyzer(lexicon)
+
+def _score_chunk(texts):
+    return [_worker_analyzer.score(text) for text in texts]
+
+def _score_chunk_vectorized(texts):
+    # like _score_chunk, for sentiment_batch(vectorized=True)
+    return _worker_analyzer.score_batch(texts)
+
+BATCH_CHUNK_SIZE = 100 # texts sent to a worker process at a time by sentiment_batch
+MIN_MAGNITUDE = 0.2 # compound scores closer to 0 than this are left out of averages as relatively neutral
+
+class CompoundMean(object):
+    """
+    Running mean of the compound scores of texts, as they are scored one at a time.
+    Relatively neutral scores (within min_magnitude of 0) are left out.
+    """
+
+    def __init__(self, min_magnitude=MIN_MAGNITUDE):
+        self.min_magnitude = min_magnitude
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, scores):
+        """
+        Adds the sentiment scores of a text, as returned by sentiment().
+        """
+        if (scores['compound'] > self.min_magnitude) or (scores['compound'] < -self.min_magnitude):
+            self.total += scores['compound']
+            self.count += 1
+
+    def mean(self):
+        """
+        Returns the mean of the compound scores added so far, or 0.0 if there are none.
+        """
+        if self.count == 0:
+            return 0.0
+        return self.total / self.count
+
+def compound_mean(scores, min_magnitude=MIN_MAGNITUDE):
+    """
+    Returns the mean compound score of the given sentiment scores, leaving out the relatively neutral ones
+    (within min_magnitude of 0), or 0.0 if there are none left.
+    """
+    mean = CompoundMean(min_magnitude)
+    for s in scores:
+        mean.add(s)
+    return mean.mean()
+
+def compound_mean_vectorized(scores, min_magnitude=MIN_MAGNITUDE):
+    """
+    Does what compound_mean() does with NumPy, and gives exactly the same mean.
+    """
+    compounds = numpy.fromiter((s['compound'] for s in scores), numpy.float64, len(scores))
+    compounds = compounds[(compounds > min_magnitude) | (compounds < -min_magnitude)]
+    if len(compounds) == 0:
+        return 0.0
+    # a running total adds them up in order, like compound_mean(), where numpy.sum() would add them pairwise
+    return float(numpy.cumsum(compounds)[-1] / len(compounds))
+
+def sentiment_batch(texts, workers=None, chunk_size=BATCH_CHUNK_SIZE, min_magnitude=MIN_MAGNITUDE, vectorized=False,
+        analyzer=None):
+    """
+    Scores a list of texts across a pool of worker processes.
+    Only texts that aren't in the cache of the analyzer are scored, and their scores are added to it.
+    Returns a tuple of the list of sentiment scores, in the same order as texts, and their compound_mean().
+    Arguments:
+        texts                    list of strings (or common_types.TokenizedText) to score
+        workers (optional)       number of worker processes; defaults to the number of CPUs.
+                                 With 1 worker, the texts are scored in this process
+        chunk_size (optional)    number of texts sent to a worker at a time
+        min_magnitude (optional) compound scores closer to 0 than this are left out of the mean
+        vectorized (optional)    whether to score each chunk of texts, and work out the mean, with NumPy
+                                 (see SentimentAnalyzer.score_batch); the scores are the same either way
+        analyzer (optional)      SentimentAnalyzer to score with, defaults to the one sentiment() uses.
+                                 Worker processes are sent a copy of its lexicon (or the path of a CompiledLexicon),
+                                 unless it is the VADER lexicon
+    """
+    if analyzer is None:
+        analyzer = default_analyzer
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if not vectorized and (workers == 1 or len(texts) <= chunk_size):
+        scores = [analyzer.sentiment(text) for text in texts]
+    else:
+        cache = analyzer.cache
+        scores = [cache.get(text) for text in texts] if cache is not None else [None] * len(texts)
+        missing = [n for n, scores_n in enumerate(scores) if scores_n is None]
+        chunks = [[texts[n] for n in missing[start:start + chunk_size]] for start in range(0, len(missing), chunk_size)]
+        if workers == 1 or len(chunks) <= 1:
+            if vectorized:
+                chunk_scores = map(analyzer.score_batch, chunks)
+            else:
+                chunk_scores = [map(analyzer.score, chunk) for chunk in chunks]
+        else:
+            # the workers load the VADER lexicon themselves, and open any other CompiledLexicon from its file
+            lexicon = analyzer._lexicon
+            if lexicon is _default_lexicon:
+                lexicon = None
+            score_chunk = _score_chunk_vectorized if vectorized else _score_chunk
+            pool = multiprocessing.Pool(workers, _init_worker, (lexicon, ))
+            try:
+                chunk_scores = pool.map(score_chunk, chunks)
+                pool.close()
+            except:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+        missing_scores = [scores_n for chunk in chunk_scores for scores_n in chunk]
+        for n, scores_n in zip(missing, missing_scores):
+            scores[n] = scores_n
+            if cache is not None:
+                cache.put(texts[n], scores_n)
+    if vectorized:
+        return scores, compound_mean_vectorized(scores, min_magnitude)
+    return scores, compound_mean(scores, min_magnitude)
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        # re-score tweet logs (the "cleaned" files written with LOG_TWEETS, one tweet per line) on all CPUs
+        import codecs
+        texts = []
+        for path in sys.argv[1:]:
+            texts.extend(line.rstrip(u'\n') for line in codecs.open(path, 'r', 'utf-8'))
+        scores, mean = sentiment_batch(texts, vectorized=numpy is not None)
+        print "%d texts, mean compound sentiment %.4f" % (len(scores), mean)
+        sys.exit(0)
+
     # --- examples -------
     sentences = [
                 "VADER is smart, handsome, and funny.",       # positive sentence example
@@ -326,8 +897,7 @@ if __name__ == '__main__':
     Unbelievably bad acting!! Poor direction. VERY poor production. \
     The movie was bad. Very bad movie. VERY bad movie. VERY BAD movie. VERY BAD movie!"
     
-    from nltk import tokenize
-    lines_list = tokenize.sent_tokenize(paragraph)
+    lines_list = re.split(r'(?<=[.!?])\s+', paragraph) # one sentence per line
     sentences.extend(lines_list)
     
     tricky_sentences = [
@@ -358,6 +928,6 @@ if __name__ == '__main__':
     for sentence in sentences:
         print sentence,
         ss = sentiment(sentence)
-        print "\t" + ss
+        print "\t" + str(ss)
     
     print "\n\n Done!"